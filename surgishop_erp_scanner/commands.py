@@ -0,0 +1,114 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("surgishop-scanner-load-test")
+@click.option("--sessions", default=10, type=int, help="Number of concurrent scanner stations")
+@click.option("--duration", default=60, type=int, help="Test duration in seconds")
+@click.option("--url", "base_url", default=None, help="Site URL (defaults to the site URL)")
+@click.option("--api-key", default=None, help="API key of the scanning user")
+@click.option("--api-secret", default=None, help="API secret of the scanning user")
+@click.option("--think-time", default=0.5, type=float, help="Mean pause between scans per station, in seconds")
+@click.option("--lot-pool-size", default=20, type=int, help="Distinct new lots shared by all stations")
+@pass_context
+def scanner_load_test(context, sessions, duration, base_url, api_key, api_secret, think_time, lot_pool_size):
+	"""Replay a concurrent scanner workload and report latency percentiles."""
+	import frappe
+
+	from surgishop_erp_scanner.surgishop_erp_scanner.scanner_load_test import format_report, run_load_test
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		report = run_load_test(
+			sessions=sessions,
+			duration=duration,
+			base_url=base_url,
+			api_key=api_key,
+			api_secret=api_secret,
+			think_time=think_time,
+			lot_pool_size=lot_pool_size,
+		)
+		click.echo(format_report(report))
+	finally:
+		frappe.destroy()
+
+
+@click.command("surgishop-import-scan-file")
+@click.argument("file_path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+	"--doctype",
+	"target_doctype",
+	default="Purchase Receipt",
+	type=click.Choice(["Purchase Receipt", "Stock Entry"]),
+	help="Draft document to create (Stock Entry is a Material Receipt)",
+)
+@click.option("--company", required=True, help="Company of the new document")
+@click.option("--warehouse", required=True, help="Receiving warehouse")
+@click.option("--supplier", default=None, help="Supplier (required for Purchase Receipt)")
+@click.option("--column", default=0, type=int, help="CSV column holding the scanned value")
+@click.option("--qty-column", default=None, type=int, help="CSV column holding a quantity per line")
+@pass_context
+def import_scan_file(context, file_path, target_doctype, company, warehouse, supplier, column, qty_column):
+	"""Import a file of raw GS1 scans into a draft receiving document."""
+	import frappe
+
+	from surgishop_erp_scanner.surgishop_erp_scanner.scan_file_import import (
+		format_import_summary,
+		import_scan_file as run_import,
+	)
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		summary = run_import(
+			file_path,
+			target_doctype,
+			company,
+			warehouse,
+			supplier=supplier,
+			column=column,
+			qty_column=qty_column,
+		)
+		frappe.db.commit()
+		click.echo(format_import_summary(summary))
+	finally:
+		frappe.destroy()
+
+
+@click.command("surgishop-import-item-barcodes")
+@click.argument("file_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--item-column", default=0, type=int, help="CSV column holding the item code")
+@click.option("--barcode-column", default=1, type=int, help="CSV column holding the GTIN")
+@click.option("--uom-column", default=None, type=int, help="CSV column holding the barcode UOM")
+@click.option("--dry-run", is_flag=True, default=False, help="Only analyse the file and write the report")
+@pass_context
+def import_item_barcodes(context, file_path, item_column, barcode_column, uom_column, dry_run):
+	"""Import a supplier GTIN catalog into Item Barcode, reporting conflicts."""
+	import frappe
+
+	from surgishop_erp_scanner.surgishop_erp_scanner.barcode_import import (
+		format_barcode_import_summary,
+		import_item_barcodes as run_import,
+	)
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		summary = run_import(
+			file_path,
+			item_column=item_column,
+			barcode_column=barcode_column,
+			uom_column=uom_column,
+			dry_run=dry_run,
+		)
+		frappe.db.commit()
+		click.echo(format_barcode_import_summary(summary))
+	finally:
+		frappe.destroy()
+
+
+commands = [scanner_load_test, import_scan_file, import_item_barcodes]
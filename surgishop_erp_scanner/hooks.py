@@ -29,10 +29,11 @@ required_frappe_version = ">=16.0.0"
 
 # include js, css files in header of desk.html
 # app_include_css = "/assets/surgishop_erp_scanner/css/surgishop_erp_scanner.css"
+# The scanner itself (surgishop_scanner.bundle.js) is loaded on demand by the loader;
+# GS1 utils, batch expiry auto-fetch and the serial/batch selector load for everyone
 app_include_js = [
-	"/assets/surgishop_erp_scanner/js/gs1-utils.js",
-	"/assets/surgishop_erp_scanner/js/custom-barcode-scanner.js",
-	"/assets/surgishop_erp_scanner/js/custom-serial-batch-selector.js"
+	"surgishop_stock.bundle.js",
+	"/assets/surgishop_erp_scanner/js/scanner-loader.js"
 ]
 
 # include js, css files in header of web template
@@ -98,7 +99,8 @@ after_migrate = [
 	"surgishop_erp_scanner.surgishop_erp_scanner.install.cleanup_old_workspaces",
 	"surgishop_erp_scanner.surgishop_erp_scanner.install.fix_settings_defaults",
 	"surgishop_erp_scanner.surgishop_erp_scanner.condition_options.apply_condition_options_after_migrate",
-	"surgishop_erp_scanner.surgishop_erp_scanner.workspace_setup.ensure_surgishop_workspace_condition_settings_link"
+	"surgishop_erp_scanner.surgishop_erp_scanner.workspace_setup.ensure_surgishop_workspace_condition_settings_link",
+	"surgishop_erp_scanner.surgishop_erp_scanner.scanner_cache.enqueue_cache_warmup"
 ]
 
 # Uninstallation
@@ -154,47 +156,72 @@ after_migrate = [
 # Hook on document methods and events
 
 doc_events = {
+	"Item": {
+		"on_update": [
+			"surgishop_erp_scanner.surgishop_erp_scanner.scanner_cache.invalidate_item_barcodes",
+			"surgishop_erp_scanner.surgishop_erp_scanner.api.catalog.on_item_change",
+			"surgishop_erp_scanner.surgishop_erp_scanner.item_flags.invalidate_item_flags"
+		],
+		"on_trash": [
+			"surgishop_erp_scanner.surgishop_erp_scanner.scanner_cache.invalidate_item_barcodes",
+			"surgishop_erp_scanner.surgishop_erp_scanner.api.catalog.on_item_change",
+			"surgishop_erp_scanner.surgishop_erp_scanner.item_flags.invalidate_item_flags"
+		],
+		"after_rename": [
+			"surgishop_erp_scanner.surgishop_erp_scanner.scanner_cache.invalidate_item_barcodes",
+			"surgishop_erp_scanner.surgishop_erp_scanner.api.catalog.on_item_change",
+			"surgishop_erp_scanner.surgishop_erp_scanner.item_flags.invalidate_item_flags"
+		]
+	},
 	"Purchase Receipt": {
-		"validate": "surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller.validate_serialized_batch_with_expired_override",
+		"validate": [
+			"surgishop_erp_scanner.surgishop_erp_scanner.overrides.batch_expiry.fill_batch_expiry_dates",
+			"surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller.validate_serialized_batch_with_expired_override"
+		],
 		"on_submit": "surgishop_erp_scanner.surgishop_erp_scanner.overrides.condition_tracking.sync_purchase_receipt_condition_to_sle"
 	},
 	"Purchase Invoice": {
-		"validate": "surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller.validate_serialized_batch_with_expired_override"
+		"validate": [
+			"surgishop_erp_scanner.surgishop_erp_scanner.overrides.batch_expiry.fill_batch_expiry_dates",
+			"surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller.validate_serialized_batch_with_expired_override"
+		]
 	},
 	"Stock Entry": {
-		"validate": "surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller.validate_serialized_batch_with_expired_override"
+		"validate": [
+			"surgishop_erp_scanner.surgishop_erp_scanner.overrides.batch_expiry.fill_batch_expiry_dates",
+			"surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller.validate_serialized_batch_with_expired_override"
+		]
 	},
 	"Stock Reconciliation": {
 		"validate": "surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller.validate_serialized_batch_with_expired_override"
 	},
 	"Sales Invoice": {
-		"validate": "surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller.validate_serialized_batch_with_expired_override"
+		"validate": [
+			"surgishop_erp_scanner.surgishop_erp_scanner.overrides.batch_expiry.fill_batch_expiry_dates",
+			"surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller.validate_serialized_batch_with_expired_override"
+		]
 	},
 	"Delivery Note": {
-		"validate": "surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller.validate_serialized_batch_with_expired_override"
+		"validate": [
+			"surgishop_erp_scanner.surgishop_erp_scanner.overrides.batch_expiry.fill_batch_expiry_dates",
+			"surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller.validate_serialized_batch_with_expired_override"
+		]
 	}
 }
 
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-# 	"all": [
-# 		"surgishop_erp_scanner.tasks.all"
-# 	],
-# 	"daily": [
-# 		"surgishop_erp_scanner.tasks.daily"
-# 	],
-# 	"hourly": [
-# 		"surgishop_erp_scanner.tasks.hourly"
-# 	],
-# 	"weekly": [
-# 		"surgishop_erp_scanner.tasks.weekly"
-# 	],
-# 	"monthly": [
-# 		"surgishop_erp_scanner.tasks.monthly"
-# 	],
-# }
+scheduler_events = {
+	"all": [
+		"surgishop_erp_scanner.surgishop_erp_scanner.scan_side_effects.process_scan_side_effects",
+		"surgishop_erp_scanner.surgishop_erp_scanner.api.ingest.process_pending_ingest",
+		"surgishop_erp_scanner.surgishop_erp_scanner.scan_journal.flush_scan_journal"
+	],
+	"hourly": [
+		"surgishop_erp_scanner.surgishop_erp_scanner.scanner_cache.refresh_scanner_cache"
+	],
+}
 
 # Testing
 # -------
@@ -227,12 +254,12 @@ doc_events = {
 # Request Events
 # ----------------
 # before_request = ["surgishop_erp_scanner.utils.before_request"]
-# after_request = ["surgishop_erp_scanner.utils.after_request"]
+after_request = ["surgishop_erp_scanner.surgishop_erp_scanner.scan_replica.close_replica"]
 
 # Job Events
 # ----------
 # before_job = ["surgishop_erp_scanner.utils.before_job"]
-# after_job = ["surgishop_erp_scanner.utils.after_job"]
+after_job = ["surgishop_erp_scanner.surgishop_erp_scanner.scan_replica.close_replica"]
 
 # User Data Protection
 # --------------------
@@ -268,9 +295,10 @@ doc_events = {
 # Automatically update python controller files with type annotations for this app.
 # export_python_type_annotations = True
 
-# default_log_clearing_doctypes = {
-# 	"Logging DocType Name": 30  # days to retain logs
-# }
+default_log_clearing_doctypes = {
+	"SurgiShop Scan Profile": 30,
+	"SurgiShop Scan Event": 90
+}
 
 # Fixtures
 # --------
@@ -0,0 +1,101 @@
+/**
+ * SurgiShop ERP Scanner - Batch expiry auto-fetch
+ * Part of surgishop_stock.bundle.js, loaded for every desk user.
+ */
+
+if (typeof window.surgishop === "undefined") {
+  window.surgishop = {};
+}
+
+/**
+ * Keep custom_expiration_date in sync with batch_no in child tables.
+ *
+ * Batch changes are collected across all rows of the form and hydrated
+ * together after a short pause: one get_batch_expiries call for all pending
+ * batches, then one write pass and one refresh per table. Rows set
+ * programmatically (imports, mapped documents) no longer fire a request each.
+ * The server fills the field again on validate for anything missed here.
+ */
+const BATCH_EXPIRY_DEBOUNCE_MS = 150;
+
+window.surgishop.batchExpiryHydrator = {
+  pending: new Map(),
+  timer: null,
+
+  queue(frm, cdt, cdn) {
+    this.pending.set(cdn, { frm, cdt, cdn });
+    clearTimeout(this.timer);
+    this.timer = setTimeout(() => this.flush(), BATCH_EXPIRY_DEBOUNCE_MS);
+  },
+
+  flush() {
+    const entries = Array.from(this.pending.values());
+    this.pending.clear();
+
+    const batchNos = [
+      ...new Set(
+        entries
+          .map(({ cdt, cdn }) => locals[cdt] && locals[cdt][cdn])
+          .filter((row) => row && row.batch_no)
+          .map((row) => row.batch_no)
+      ),
+    ];
+
+    const fetch_expiries = batchNos.length
+      ? frappe
+          .call({
+            method:
+              "surgishop_erp_scanner.surgishop_erp_scanner.api.batch.get_batch_expiries",
+            args: { batch_nos: batchNos },
+          })
+          .then((r) => (r && r.message) || {})
+      : Promise.resolve({});
+
+    fetch_expiries.then((expiries) => {
+      const touched = new Map();
+
+      entries.forEach(({ frm, cdt, cdn }) => {
+        const row = locals[cdt] && locals[cdt][cdn];
+        if (!row || !frappe.meta.has_field(cdt, "custom_expiration_date")) {
+          return;
+        }
+
+        const expiry = row.batch_no ? expiries[row.batch_no] || null : null;
+        if ((row.custom_expiration_date || null) === expiry) {
+          return;
+        }
+
+        row.custom_expiration_date = expiry;
+        touched.set(`${frm.docname}|${row.parentfield}`, {
+          frm,
+          parentfield: row.parentfield,
+        });
+      });
+
+      touched.forEach(({ frm, parentfield }) => {
+        frm.dirty();
+        frm.refresh_field(parentfield);
+      });
+    });
+  },
+};
+
+function setupBatchExpiryAutoFetch() {
+  const childDoctypes = [
+    "Purchase Receipt Item",
+    "Purchase Invoice Item",
+    "Stock Entry Detail",
+    "Delivery Note Item",
+    "Sales Invoice Item",
+  ];
+
+  childDoctypes.forEach((childDoctype) => {
+    frappe.ui.form.on(childDoctype, {
+      batch_no: function (frm, cdt, cdn) {
+        window.surgishop.batchExpiryHydrator.queue(frm, cdt, cdn);
+      },
+    });
+  });
+}
+
+setupBatchExpiryAutoFetch();
@@ -49,6 +49,182 @@ window.surgishop.forcePromptQty = false;
 window.surgishop.pendingCondition = null;
 window.surgishop.pendingConditionWarehouse = null;
 
+// Scan rate limit backpressure (see call_scanner_api)
+window.surgishop.throttledUntil = 0;
+window.surgishop.throttledQueue = Promise.resolve();
+
+/**
+ * Run a scanner API call after the current throttle window, one at a time
+ * and in scan order.
+ * @param {Function} send Sends the call and returns its promise
+ */
+function queueThrottledScan(send) {
+  const run = window.surgishop.throttledQueue
+    .then(
+      () =>
+        new Promise((resolve) =>
+          setTimeout(
+            resolve,
+            Math.max(0, window.surgishop.throttledUntil - Date.now())
+          )
+        )
+    )
+    .then(send);
+  window.surgishop.throttledQueue = run.catch(() => {});
+  return run;
+}
+
+/**
+ * Set-based index of the serial numbers in a form's item rows.
+ * Duplicate checks are O(1) however many serials a tray holds, and each row's
+ * newline-joined serial field is written back once per frame instead of being
+ * split and joined on every scan. Rows edited by hand are re-read on the next
+ * lookup; removed rows are dropped.
+ */
+class SerialIndex {
+  /**
+   * Get the index of a form, rebuilding it when the document was reloaded
+   * @param {object} frm The form
+   * @param {string} table Items table fieldname
+   * @param {string} field Serial number fieldname
+   * @returns {SerialIndex}
+   */
+  static for(frm, table, field) {
+    let index = frm.surgishop_serial_index;
+    if (
+      !index ||
+      index.doc !== frm.doc ||
+      index.table !== table ||
+      index.field !== field
+    ) {
+      index = frm.surgishop_serial_index = new SerialIndex(frm, table, field);
+    }
+    return index;
+  }
+
+  constructor(frm, table, field) {
+    this.frm = frm;
+    this.doc = frm.doc;
+    this.table = table;
+    this.field = field;
+    this.rows = new Map(); // row name -> Set of serials
+    this.texts = new Map(); // row name -> field text the Set matches
+    this.owners = new Map(); // serial -> name of the row holding it
+    this.dirty = new Map(); // row name -> row waiting to be written
+    this.frame = null;
+    this.timer = null;
+  }
+
+  /**
+   * Re-read rows whose field changed outside the index, drop removed rows
+   */
+  sync() {
+    const present = new Set();
+    for (const row of this.doc[this.table] || []) {
+      present.add(row.name);
+      const text = row[this.field] || "";
+      if (!this.dirty.has(row.name) && this.texts.get(row.name) !== text) {
+        this.read_row(row.name, text);
+      }
+    }
+    for (const name of this.rows.keys()) {
+      if (!present.has(name)) {
+        this.drop_row(name);
+      }
+    }
+  }
+
+  read_row(name, text) {
+    this.drop_row(name);
+    const serials = new Set();
+    for (const serial_no of text.split("\n")) {
+      const value = serial_no.trim();
+      if (value) {
+        serials.add(value);
+        if (!this.owners.has(value)) {
+          this.owners.set(value, name);
+        }
+      }
+    }
+    this.rows.set(name, serials);
+    this.texts.set(name, text);
+  }
+
+  drop_row(name) {
+    for (const serial_no of this.rows.get(name) || []) {
+      if (this.owners.get(serial_no) === name) {
+        this.owners.delete(serial_no);
+      }
+    }
+    this.rows.delete(name);
+    this.texts.delete(name);
+    this.dirty.delete(name);
+  }
+
+  /**
+   * @param {string} serial_no Serial number
+   * @returns {object|null} The row already holding the serial
+   */
+  find(serial_no) {
+    this.sync();
+    const name = this.owners.get(serial_no);
+    if (!name) {
+      return null;
+    }
+    return (this.doc[this.table] || []).find((row) => row.name === name) || null;
+  }
+
+  /**
+   * Add a serial to a row; the field is written on the next frame
+   * @param {object} row Item row
+   * @param {string} serial_no Serial number
+   */
+  add(row, serial_no) {
+    if (!this.rows.has(row.name)) {
+      this.read_row(row.name, row[this.field] || "");
+    }
+    this.rows.get(row.name).add(serial_no);
+    if (!this.owners.has(serial_no)) {
+      this.owners.set(serial_no, row.name);
+    }
+    this.dirty.set(row.name, row);
+
+    if (!this.frame) {
+      this.frame = requestAnimationFrame(() => this.flush());
+      // Frames do not run in background tabs
+      this.timer = setTimeout(() => this.flush(), 250);
+    }
+  }
+
+  /**
+   * Write the serial field of every changed row
+   * @returns {Promise}
+   */
+  flush() {
+    cancelAnimationFrame(this.frame);
+    clearTimeout(this.timer);
+    this.frame = this.timer = null;
+
+    const rows = Array.from(this.dirty.values());
+    this.dirty.clear();
+    return Promise.all(
+      rows
+        .filter((row) => this.rows.has(row.name))
+        .map((row) => {
+          const text = Array.from(this.rows.get(row.name)).join("\n");
+          this.texts.set(row.name, text);
+          return Promise.resolve(
+            frappe.model.set_value(row.doctype, row.name, this.field, text)
+          ).catch(() => {
+            // ERPNext internal refresh errors - safe to ignore
+          });
+        })
+    );
+  }
+}
+
+surgishop.SerialIndex = SerialIndex;
+
 // Settings (will be loaded from SurgiShop Settings)
 window.surgishop.settings = {
   enableScanSounds: true,
@@ -64,6 +240,10 @@ window.surgishop.settings = {
   updateMissingExpiry: true,
   strictGtinValidation: false,
   promptCreateItemOnUnknownGtin: true,
+  offlineCatalog: false,
+  suggestFefoBatches: false,
+  clientTelemetry: false,
+  clientTelemetrySampleRate: 0,
 };
 
 /**
@@ -455,20 +635,38 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
     this.play_success_sound();
   }
 
-  process_scan() {
+  /**
+   * Process the value in the scan field, or a scan replayed from the offline
+   * journal
+   * @param {string} [queued_input] Replayed scan value
+   */
+  process_scan(queued_input) {
     return new Promise((resolve, reject) => {
       try {
-        const input = this.scan_barcode_field.value;
-        this.scan_barcode_field.set_value("");
+        const input = queued_input || this.scan_barcode_field.value;
+        if (!queued_input) {
+          this.scan_barcode_field.set_value("");
+        }
+        this.scanned_input = input;
         if (!input) {
           return resolve();
         }
 
+        this.scan_trace = window.surgishop.telemetry.start(
+          this.frm,
+          this.items_table_name
+        );
+
         // Check for trigger barcodes first
         if (this.check_trigger_barcode(input)) {
           return resolve();
         }
 
+        // Count sessions aggregate on the server and leave the grid alone
+        if (this.frm.surgishop_count_session) {
+          return this.count_scan(input).then(resolve, reject);
+        }
+
         // Try to parse as GS1 first
         const gs1_data = this.parse_gs1_string(input);
 
@@ -482,9 +680,15 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
             this.handle_api_response(r, resolve, reject)
           );
         } else {
-          this.scan_api_call(input, (r) =>
-            this.handle_api_response(r, resolve, reject)
-          );
+          this.resolve_from_catalog(input).then((data) => {
+            if (data) {
+              this.handle_api_response({ message: data }, resolve, reject);
+            } else {
+              this.scan_api_call(input, (r) =>
+                this.handle_api_response(r, resolve, reject)
+              );
+            }
+          });
         }
       } catch (e) {
         reject(e);
@@ -492,9 +696,87 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
     });
   }
 
+  /**
+   * Resolve a plain item barcode from the offline catalog. Serial numbers,
+   * batches and warehouses are not in the catalog and go to the server.
+   * @param {string} input Scanned value
+   * @returns {Promise<object|null>} Scan result, or null when not found
+   */
+  resolve_from_catalog(input) {
+    if (!window.surgishop.settings.offlineCatalog) {
+      return Promise.resolve(null);
+    }
+    return window.surgishop.catalog
+      .lookup(input)
+      .then((entry) => {
+        // Batch items on outbound documents need the server's FEFO batch
+        if (
+          !entry ||
+          entry.disabled ||
+          (entry.has_batch_no && this.get_fefo_context())
+        ) {
+          return null;
+        }
+        return {
+          barcode: entry.barcode,
+          item_code: entry.item_code,
+          uom: entry.uom,
+          item_name: entry.item_name,
+          stock_uom: entry.stock_uom,
+          has_batch_no: entry.has_batch_no,
+          has_serial_no: entry.has_serial_no,
+        };
+      })
+      .catch(() => null);
+  }
+
+  /**
+   * Whether a failed scanner call should be queued for replay
+   * @param {object} xhr Failed request
+   */
+  is_offline_failure(xhr) {
+    return (
+      window.surgishop.settings.offlineCatalog &&
+      (!navigator.onLine || (xhr && xhr.status === 0))
+    );
+  }
+
+  /**
+   * Journal the current scan for replay once the connection is back
+   * @param {function} callback Called with the queued response
+   */
+  queue_offline_scan(callback) {
+    window.surgishop.catalog
+      .journal({
+        doctype: this.frm.doctype,
+        docname: this.frm.docname,
+        input: this.scanned_input,
+        queued_at: Date.now(),
+      })
+      .then(
+        () => callback({ message: { queued_offline: 1 } }),
+        () =>
+          callback({
+            message: { error: "Offline and the scan could not be queued" },
+          })
+      );
+  }
+
   handle_api_response(r, resolve, reject) {
     try {
       const data = r && r.message;
+      window.surgishop.telemetry.mark(this.scan_trace, "api");
+      if (data && data.queued_offline) {
+        this.show_alert(
+          "Offline: scan queued, it is applied when the connection is back",
+          "orange",
+          5
+        );
+        this.clean_up();
+        resolve();
+        return;
+      }
+
       if (!data || Object.keys(data).length === 0 || data.error) {
         const error_msg =
           data && data.error
@@ -536,8 +818,12 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
         return;
       }
 
+      this.apply_batch_allocation(data);
+
       this.update_table(data)
         .then((row) => {
+          window.surgishop.telemetry.mark(this.scan_trace, "applied");
+          window.surgishop.telemetry.finish(this.scan_trace);
           this.play_success_sound();
           resolve(row);
         })
@@ -550,6 +836,82 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
     }
   }
 
+  /**
+   * Add a scan to the document's count session (Stock Reconciliation).
+   * Only the running tally is updated; rows are written when the session
+   * is materialized.
+   * @param {string} input The raw scanned string
+   */
+  count_scan(input) {
+    const condition = window.surgishop.pendingCondition;
+    window.surgishop.pendingCondition = null;
+    const warehouse = condition ? this.get_condition_warehouse() : null;
+
+    const shouldPromptQty = window.surgishop.forcePromptQty || this.prompt_qty;
+    window.surgishop.forcePromptQty = false;
+
+    const get_qty = shouldPromptQty
+      ? new Promise((resolve) =>
+          frappe.prompt(
+            {
+              fieldtype: "Float",
+              label: "Counted quantity",
+              fieldname: "value",
+              default: this.default_qty,
+              reqd: 1,
+            },
+            ({ value }) => resolve(value),
+            "Enter Quantity",
+            "Add"
+          )
+        )
+      : Promise.resolve(this.default_qty);
+
+    return get_qty
+      .then((qty) =>
+        this.call_scanner_api(`${COUNT_SESSION_API}.add_count_scan`, {
+          docname: this.frm.doc.name,
+          raw_value: input,
+          qty: qty,
+          warehouse: warehouse,
+          condition: condition,
+        })
+      )
+      .then((r) => {
+        const data = (r && r.message) || {};
+        if (data.error) {
+          this.show_alert(`Error: ${data.error}`, "red");
+          this.play_fail_sound();
+          throw new Error(data.error);
+        }
+
+        if (!data.item_code) {
+          this.frm.surgishop_count_session.warehouse = data.warehouse;
+          renderCountSession(this.frm);
+          this.show_alert(`Counting in: ${data.warehouse}`, "green", 3);
+          this.play_success_sound();
+          return;
+        }
+
+        Object.assign(this.frm.surgishop_count_session, {
+          scans: data.scans,
+          rows: data.rows,
+          warehouse: data.warehouse,
+        });
+        renderCountSession(this.frm);
+
+        const batch_msg = data.batch_no ? ` (${data.batch_no})` : "";
+        this.show_alert(
+          `${data.item_code}${batch_msg}: ${data.counted} counted`,
+          "green"
+        );
+        if (data.expiry_warning) {
+          this.show_alert(data.expiry_warning, "orange", 5);
+        }
+        this.play_success_sound();
+      });
+  }
+
   handle_warehouse_scan(warehouse_name) {
     if (frappe.meta.has_field(this.frm.doctype, "set_warehouse")) {
       frappe.model.set_value(
@@ -680,7 +1042,7 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
           fieldname: "inline_info",
           options: `
             <p style="color: var(--text-muted); font-size: 12px; margin-top: 5px;">
-              <strong>Note:</strong> Item will be created with Batch tracking and Expiry Date enabled.
+              <strong>Note:</strong> Item will be created with Batch tracking and Expiry Date enabled, and the scan added to this document.
             </p>
           `,
         },
@@ -837,7 +1199,9 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
   }
 
   /**
-   * Create a new Item inline with batch/expiry tracking enabled
+   * Create a new Item inline with batch/expiry tracking enabled, together with
+   * its GS1 barcode and the scanned batch, in one request, then add the scan
+   * to the document.
    * @param {string} item_name - The name for the new item
    * @param {string} gtin - The GTIN/barcode
    * @param {string} lot - The lot number (optional)
@@ -848,38 +1212,30 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
     const self = this;
 
     frappe.call({
-      method: "frappe.client.insert",
+      method:
+        "surgishop_erp_scanner.surgishop_erp_scanner.api.gs1_parser.create_item_from_gs1",
       args: {
-        doc: {
-          doctype: "Item",
-          item_code: item_name,
-          item_name: item_name,
-          item_group: "Products", // Default group - will be overridden if needed
-          stock_uom: "Nos",
-          is_stock_item: 1,
-          has_batch_no: 1,
-          create_new_batch: 1,
-          has_expiry_date: 1,
-          barcodes: [
-            {
-              barcode: gtin,
-              barcode_type: "GS1",
-            },
-          ],
-        },
+        item_name: item_name,
+        gtin: gtin,
+        lot: lot,
+        expiry: expiry,
       },
       freeze: true,
       freeze_message: "Creating new item...",
       callback: function (r) {
         if (r && r.message) {
-          const new_item_code = r.message.name;
           dialog.hide();
           self.show_alert(
-            `Item "${new_item_code}" created with barcode ${gtin}. Scan again to add to document.`,
+            `Item "${r.message.item_code}" created with barcode ${gtin}.`,
             "green",
             5
           );
-          self.play_success_sound();
+          // The result is scan-ready: add it like a regular scan
+          self.handle_api_response(
+            r,
+            () => {},
+            () => {}
+          );
         }
       },
       error: function (r) {
@@ -926,25 +1282,78 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
     this.show_alert(`Creating new Item with barcode: ${gtin}`, "blue", 5);
   }
 
+  /**
+   * Call a scanner API with a fresh idempotency key. If the request or its
+   * response is lost (no connection, gateway errors), it is retried once with
+   * the same key, so the server replays the first result instead of doing
+   * the work twice.
+   *
+   * When the server rate limit answers `throttled`, the scan is held and sent
+   * again after `retry_after_ms`; scans made while throttled queue up behind
+   * it in order.
+   * @param {string} method The whitelisted method
+   * @param {object} args Method arguments
+   * @returns {Promise} The frappe.call promise
+   */
+  call_scanner_api(method, args) {
+    const idempotency_key = frappe.utils.get_random(20);
+    const request = () =>
+      frappe.call({
+        method: method,
+        args: Object.assign({}, args, {
+          idempotency_key,
+          scan_doctype: this.frm.doctype,
+        }),
+      });
+    const call = () =>
+      request().catch((xhr) => {
+        if (xhr && (xhr.status === 0 || [502, 503, 504].includes(xhr.status))) {
+          return request();
+        }
+        throw xhr;
+      });
+
+    const send = () =>
+      call().then((r) => {
+        const data = r && r.message;
+        if (!data || !data.throttled) {
+          return r;
+        }
+
+        const wait = data.retry_after_ms || 1000;
+        window.surgishop.throttledUntil = Date.now() + wait;
+        this.show_alert("Scanning too fast: scan queued", "orange", 2);
+        return new Promise((resolve) => setTimeout(resolve, wait)).then(send);
+      });
+
+    if (Date.now() < window.surgishop.throttledUntil) {
+      return queueThrottledScan(send);
+    }
+    return send();
+  }
+
   gs1_api_call(gs1_data, callback) {
-    frappe
-      .call({
-        method: this.gs1_parser_api,
-        args: {
-          gtin: gs1_data.gtin,
-          lot: gs1_data.lot,
-          expiry: gs1_data.expiry,
-        },
-      })
+    this.call_scanner_api(this.gs1_parser_api, {
+      gtin: gs1_data.gtin,
+      lot: gs1_data.lot,
+      expiry: gs1_data.expiry,
+    })
       .then((r) => {
         if (r && r.message && r.message.found_item) {
           r.message.item_code = r.message.found_item;
           r.message.batch_no = r.message.batch;
           r.message.batch_expiry_date = r.message.batch_expiry_date;
         }
+        if (r && r.message && r.message.expiry_warning) {
+          this.show_alert(r.message.expiry_warning, "orange", 5);
+        }
         callback(r);
       })
-      .catch(() => {
+      .catch((xhr) => {
+        if (this.is_offline_failure(xhr)) {
+          this.queue_offline_scan(callback);
+          return;
+        }
         callback({
           message: {
             error:
@@ -955,21 +1364,22 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
   }
 
   scan_api_call(input, callback) {
-    frappe
-      .call({
-        method: this.scan_api,
-        args: {
-          search_value: input,
-          ctx: {
-            set_warehouse: this.frm.doc.set_warehouse,
-            company: this.frm.doc.company,
-          },
-        },
-      })
+    this.call_scanner_api(this.scan_api, {
+      search_value: input,
+      ctx: {
+        set_warehouse: this.frm.doc.set_warehouse,
+        company: this.frm.doc.company,
+        ...this.get_fefo_context(),
+      },
+    })
       .then((r) => {
         callback(r);
       })
-      .catch(() => {
+      .catch((xhr) => {
+        if (this.is_offline_failure(xhr)) {
+          this.queue_offline_scan(callback);
+          return;
+        }
         callback({
           message: {
             error:
@@ -979,6 +1389,98 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
       });
   }
 
+  /**
+   * FEFO batch suggestion context for outbound documents
+   * @returns {object|null} Context for scan_barcode, or null when batches are
+   *   not suggested on this form
+   */
+  get_fefo_context() {
+    if (!window.surgishop.settings.suggestFefoBatches) {
+      return null;
+    }
+
+    const doc = this.frm.doc;
+    let warehouse = doc.set_warehouse;
+    if (doc.doctype === "Stock Entry") {
+      if (!["Material Issue", "Material Transfer"].includes(doc.purpose)) {
+        return null;
+      }
+      warehouse = doc.from_warehouse;
+    } else if (["Delivery Note", "Sales Invoice"].includes(doc.doctype)) {
+      if (doc.is_return) {
+        return null;
+      }
+    } else if (["Purchase Receipt", "Purchase Invoice"].includes(doc.doctype)) {
+      if (!doc.is_return) {
+        return null;
+      }
+    } else {
+      return null;
+    }
+    if (doc.doctype.endsWith("Invoice") && !doc.update_stock) {
+      return null;
+    }
+
+    // Quantities of each batch the draft already takes from the warehouse
+    const allocated = {};
+    (doc[this.items_table_name] || []).forEach((row) => {
+      const row_warehouse = row.s_warehouse || row.warehouse;
+      if (!row.batch_no || (warehouse && row_warehouse !== warehouse)) {
+        return;
+      }
+      allocated[row.batch_no] =
+        (allocated[row.batch_no] || 0) + Number(row[this.qty_field] || 0);
+    });
+
+    return {
+      fefo: 1,
+      doctype: doc.doctype,
+      purpose: doc.purpose,
+      is_return: doc.is_return,
+      posting_date: doc.posting_date,
+      warehouse: warehouse,
+      qty: this.default_qty,
+      allocated: allocated,
+    };
+  }
+
+  /**
+   * Take the first batch of the server's FEFO allocation as the scanned
+   * batch when it covers the scanned quantity; otherwise the batch selector
+   * opens as usual
+   * @param {object} data Scan result
+   */
+  apply_batch_allocation(data) {
+    const allocation = data.batch_allocation;
+    if (data.batch_no || !allocation) {
+      return;
+    }
+
+    if (!allocation.length) {
+      this.show_alert(
+        `No available batch of ${data.item_code} in the source warehouse`,
+        "orange",
+        5
+      );
+      return;
+    }
+    if (allocation[0].qty < this.default_qty) {
+      this.show_alert(
+        `No single batch of ${data.item_code} covers the quantity, choose batches`,
+        "orange",
+        5
+      );
+      return;
+    }
+
+    data.batch_no = allocation[0].batch_no;
+    data.batch_expiry_date = allocation[0].expiry_date;
+    const expiry = data.batch_expiry_date
+      ? ` (expires ${frappe.datetime.str_to_user(data.batch_expiry_date)})`
+      : "";
+    this.show_alert(`FEFO batch ${data.batch_no}${expiry}`, "blue", 2);
+  }
+
   update_table(data) {
     return new Promise((resolve, reject) => {
       let cur_grid = this.frm.fields_dict[this.items_table_name].grid;
@@ -994,6 +1496,14 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
         default_warehouse,
       } = data;
 
+      // Serials already anywhere in the document are rejected before any
+      // row or pending trigger is touched
+      if (serial_no && this.is_duplicate_serial_no(serial_no)) {
+        this.clean_up();
+        reject();
+        return;
+      }
+
       // Check for pending condition FIRST
       // Condition scans should ALWAYS create a new row
       const pendingCondition = window.surgishop.pendingCondition;
@@ -1054,12 +1564,6 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
         this.frm.has_items = false;
       }
 
-      if (this.is_duplicate_serial_no(row, serial_no)) {
-        this.clean_up();
-        reject();
-        return;
-      }
-
       // Longer delay for new rows to ensure DOM is fully rendered
       const initialDelay = is_new_row ? 500 : 100;
 
@@ -1194,26 +1698,18 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
     });
   }
 
-  async set_serial_no(row, serial_no) {
-    if (serial_no && frappe.meta.has_field(row.doctype, this.serial_no_field)) {
-      try {
-        const existing_serial_nos = row[this.serial_no_field];
-        let new_serial_nos = "";
+  get_serial_index() {
+    return SerialIndex.for(
+      this.frm,
+      this.items_table_name,
+      this.serial_no_field
+    );
+  }
 
-        if (!!existing_serial_nos) {
-          new_serial_nos = existing_serial_nos + "\n" + serial_no;
-        } else {
-          new_serial_nos = serial_no;
-        }
-        await frappe.model.set_value(
-          row.doctype,
-          row.name,
-          this.serial_no_field,
-          new_serial_nos
-        );
-      } catch (e) {
-        // ERPNext internal refresh errors - safe to ignore
-      }
+  set_serial_no(row, serial_no) {
+    if (serial_no && frappe.meta.has_field(row.doctype, this.serial_no_field)) {
+      // Written to the row on the next frame, batched with other scans
+      this.get_serial_index().add(row, serial_no);
     }
   }
 
@@ -1322,8 +1818,35 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
     }
 
     // Apply condition warehouse - use dialog selection if available, else fall back to settings
-    const settings = window.surgishop.settings;
     const warehouse_field = this.get_warehouse_field();
+    const targetWarehouse = this.get_condition_warehouse();
+
+    if (
+      targetWarehouse &&
+      warehouse_field &&
+      frappe.meta.has_field(row.doctype, warehouse_field)
+    ) {
+      try {
+        await frappe.model.set_value(
+          row.doctype,
+          row.name,
+          warehouse_field,
+          targetWarehouse
+        );
+      } catch (e) {
+        // ERPNext internal refresh errors - safe to ignore
+      }
+    }
+  }
+
+  /**
+   * Warehouse for stock scanned with a condition: the accepted/rejected choice
+   * from the condition dialog, else the default behavior from settings.
+   * Clears the pending dialog choice.
+   * @returns {string|null} Warehouse, or null to keep the default
+   */
+  get_condition_warehouse() {
+    const settings = window.surgishop.settings;
 
     // Check for user selection from dialog first
     const dialogWarehouse = window.surgishop.pendingConditionWarehouse;
@@ -1353,22 +1876,7 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
     // Clear the pending warehouse selection
     window.surgishop.pendingConditionWarehouse = null;
 
-    if (
-      targetWarehouse &&
-      warehouse_field &&
-      frappe.meta.has_field(row.doctype, warehouse_field)
-    ) {
-      try {
-        await frappe.model.set_value(
-          row.doctype,
-          row.name,
-          warehouse_field,
-          targetWarehouse
-        );
-      } catch (e) {
-        // ERPNext internal refresh errors - safe to ignore
-      }
-    }
+    return targetWarehouse;
   }
 
   get_warehouse_field() {
@@ -1388,13 +1896,13 @@ surgishop.CustomBarcodeScanner = class CustomBarcodeScanner {
     }
   }
 
-  is_duplicate_serial_no(row, serial_no) {
-    if (
-      row &&
-      row[this.serial_no_field] &&
-      row[this.serial_no_field].includes(serial_no)
-    ) {
-      this.show_alert(`Serial No ${serial_no} is already added`, "orange");
+  is_duplicate_serial_no(serial_no) {
+    const row = this.get_serial_index().find(serial_no);
+    if (row) {
+      this.show_alert(
+        `Row #${row.idx}: Serial No ${serial_no} is already added`,
+        "orange"
+      );
       return true;
     }
     return false;
@@ -1548,6 +2056,10 @@ function loadSurgiShopScannerSettings() {
         "condition_warehouse_behavior",
         "accepted_warehouse",
         "rejected_warehouse",
+        "enable_offline_catalog",
+        "suggest_fefo_batches",
+        "enable_client_telemetry",
+        "client_telemetry_sample_rate",
       ],
     },
     async: true,
@@ -1574,133 +2086,684 @@ function loadSurgiShopScannerSettings() {
             s.condition_warehouse_behavior || "No Change",
           acceptedWarehouse: s.accepted_warehouse || null,
           rejectedWarehouse: s.rejected_warehouse || null,
+          offlineCatalog: s.enable_offline_catalog === 1,
+          suggestFefoBatches: s.suggest_fefo_batches === 1,
+          clientTelemetry: s.enable_client_telemetry === 1,
+          clientTelemetrySampleRate: Number(s.client_telemetry_sample_rate || 0),
         };
 
         // Apply global flag to disable serial/batch selector
         if (window.surgishop.settings.disableSerialBatchSelector) {
           frappe.flags.hide_serial_batch_dialog = true;
         }
+
+        if (window.surgishop.settings.offlineCatalog) {
+          window.surgishop.catalog.start();
+        }
       }
     },
   });
 }
 
-// Roles that are allowed to use the scanner
-const SCANNER_ALLOWED_ROLES = [
-  "System Manager",
-  "Stock Manager",
-  "Stock User",
-  "Purchase Manager",
-  "Purchase User",
-];
-
 /**
- * Check if current user has permission to use the scanner
+ * Apply rows resolved from headless scan ingestion (fixed-mount / conveyor
+ * scanners posting to api.ingest.ingest_scans). The server pushes resolved rows
+ * to the open form; they are applied one at a time, like desk scans.
  */
-function userCanUseScanner() {
-  if (!frappe.user || !frappe.user.has_role) {
-    return false;
+window.surgishop.ingestQueue = Promise.resolve();
+
+frappe.realtime.on("surgishop_scanner_rows", (data) => {
+  if (!surgishop.userCanUseScanner() || !data || !data.rows) {
+    return;
   }
-  return SCANNER_ALLOWED_ROLES.some((role) => frappe.user.has_role(role));
-}
 
-// Load settings on page load (only for authorized users)
-$(document).ready(() => {
-  if (!userCanUseScanner()) {
-    return; // Don't initialize scanner for users without appropriate roles
+  const frm = cur_frm;
+  if (!frm || frm.doctype !== data.doctype || frm.docname !== data.docname) {
+    return;
   }
-  loadSurgiShopScannerSettings();
+
+  const scanner = makeScanner(frm);
+
+  data.rows.forEach((row) => {
+    window.surgishop.ingestQueue = window.surgishop.ingestQueue.then(
+      () =>
+        new Promise((resolve, reject) =>
+          scanner.handle_api_response({ message: row }, resolve, reject)
+        ).catch(() => {
+          // Errors are already shown by handle_api_response
+        })
+    );
+  });
 });
 
 /**
- * This is the main override logic.
- * We wrap this in a router 'change' event to ensure the Frappe framework is fully
- * loaded and ready before we try to attach our form-specific hooks.
+ * Count sessions for Stock Reconciliation (api.count_session). While a session
+ * is running, scans are aggregated on the server and the form only shows a
+ * running tally; the counts are written to the items table in one save.
  */
-frappe.router.on("change", () => {
-  // Skip scanner initialization for users without appropriate roles
-  if (!userCanUseScanner()) {
+const COUNT_SESSION_API =
+  "surgishop_erp_scanner.surgishop_erp_scanner.api.count_session";
+
+function renderCountSession(frm) {
+  const group = __("Count Session");
+  [__("Start"), __("Add Counts to Items"), __("Discard")].forEach((label) =>
+    frm.remove_custom_button(label, group)
+  );
+
+  const session = frm.surgishop_count_session;
+  if (!session && frm.surgishop_count_intro) {
+    frm.set_intro("");
+    frm.surgishop_count_intro = false;
+  }
+
+  if (frm.doc.docstatus !== 0 || frm.is_new()) {
+    return;
+  }
+
+  if (!session) {
+    frm.add_custom_button(
+      __("Start"),
+      () =>
+        frappe
+          .call({
+            method: `${COUNT_SESSION_API}.start_count_session`,
+            args: { docname: frm.doc.name },
+          })
+          .then((r) => {
+            frm.surgishop_count_session = r.message;
+            renderCountSession(frm);
+          }),
+      group
+    );
+    return;
+  }
+
+  const warehouse = session.warehouse || frm.doc.set_warehouse;
+  frm.set_intro(
+    __("Count session: {0} scans, {1} distinct rows{2}", [
+      session.scans,
+      session.rows,
+      warehouse ? __(" in {0}", [warehouse]) : "",
+    ]),
+    "blue"
+  );
+  frm.surgishop_count_intro = true;
+
+  frm.add_custom_button(
+    __("Add Counts to Items"),
+    () =>
+      frappe.confirm(
+        __("Add the {0} counted rows to the items table?", [session.rows]),
+        () =>
+          (frm.is_dirty() ? frm.save() : Promise.resolve())
+            .then(() =>
+              frappe.call({
+                method: `${COUNT_SESSION_API}.materialize_count_session`,
+                args: { docname: frm.doc.name },
+                freeze: true,
+              })
+            )
+            .then((r) => {
+              frappe.show_alert({
+                message: __("{0} rows updated, {1} rows added", [
+                  r.message.updated,
+                  r.message.added,
+                ]),
+                indicator: "green",
+              });
+              frm.surgishop_count_session = null;
+              frm.reload_doc();
+            })
+      ),
+    group
+  );
+
+  frm.add_custom_button(
+    __("Discard"),
+    () =>
+      frappe.confirm(__("Discard all counts of this session?"), () =>
+        frappe
+          .call({
+            method: `${COUNT_SESSION_API}.discard_count_session`,
+            args: { docname: frm.doc.name },
+          })
+          .then(() => {
+            frm.surgishop_count_session = null;
+            renderCountSession(frm);
+          })
+      ),
+    group
+  );
+}
+
+function loadCountSession(frm) {
+  if (frm.doc.docstatus !== 0 || frm.is_new()) {
+    frm.surgishop_count_session = null;
+    renderCountSession(frm);
     return;
   }
-  const doctypes_to_override = [
-    "Stock Entry",
-    "Purchase Order",
-    "Purchase Receipt",
-    "Purchase Invoice",
-    "Sales Invoice",
-    "Delivery Note",
-    "Stock Reconciliation",
-  ];
+
+  // The session lives on the server, so it survives reloads and crashes
+  const docname = frm.doc.name;
+  frappe
+    .call({
+      method: `${COUNT_SESSION_API}.get_count_session`,
+      args: { docname: docname },
+    })
+    .then((r) => {
+      if (frm.doc.name !== docname) return;
+      frm.surgishop_count_session = r.message || null;
+      renderCountSession(frm);
+    });
+}
+
+function setupCountSession() {
+  frappe.ui.form.on("Stock Reconciliation", {
+    refresh: function (frm) {
+      loadCountSession(frm);
+    },
+  });
+}
+
+/**
+ * Bulk Serial and Batch Bundles (api.bundles). Saved drafts with scanned
+ * batch or serial rows get a button that builds the bundles of all rows in
+ * one server call, instead of one selector dialog per row.
+ */
+const BUNDLE_API =
+  "surgishop_erp_scanner.surgishop_erp_scanner.api.bundles.build_bundles_for_draft";
+const BUNDLE_DOCTYPES = [
+  "Purchase Receipt",
+  "Purchase Invoice",
+  "Delivery Note",
+  "Sales Invoice",
+  "Stock Entry",
+];
+// Invoices only move stock, and get bundles, with Update Stock checked
+const BUNDLE_INVOICE_DOCTYPES = ["Purchase Invoice", "Sales Invoice"];
+
+function renderBundleButton(frm) {
+  const label = __("Build Serial/Batch Bundles");
+  frm.remove_custom_button(label);
 
   if (
-    frappe.get_route() &&
-    frappe.get_route()[0] === "Form" &&
-    doctypes_to_override.includes(frappe.get_route()[1])
+    !BUNDLE_DOCTYPES.includes(frm.doctype) ||
+    (BUNDLE_INVOICE_DOCTYPES.includes(frm.doctype) && !frm.doc.update_stock) ||
+    frm.doc.docstatus !== 0 ||
+    frm.is_new()
   ) {
-    const frm = cur_frm;
-    if (frm && !frm.custom_scanner_attached) {
-      frappe.ui.form.on(frappe.get_route()[1], {
-        scan_barcode: function (frm) {
-          const opts = frm.events.get_barcode_scanner_options
-            ? frm.events.get_barcode_scanner_options(frm)
-            : {};
-          opts.frm = frm;
-
-          const scanner = new surgishop.CustomBarcodeScanner(opts);
-          scanner.process_scan().catch(() => {
-            frappe.show_alert({
-              message: "Barcode scan failed. Please try again.",
-              indicator: "red",
-            });
-          });
-        },
-      });
-      frm.custom_scanner_attached = true;
-    }
+    return;
+  }
+  const rows = (frm.doc.items || []).filter(
+    (row) => row.batch_no || row.serial_no
+  );
+  if (!rows.length) {
+    return;
   }
-});
+
+  frm.add_custom_button(label, () =>
+    (frm.is_dirty() ? frm.save() : Promise.resolve())
+      .then(() =>
+        frappe.call({
+          method: BUNDLE_API,
+          args: { doctype: frm.doctype, docname: frm.doc.name },
+          freeze: true,
+          freeze_message: __("Building bundles for {0} rows", [rows.length]),
+        })
+      )
+      .then((r) => {
+        frappe.show_alert({
+          message: __("{0} Serial and Batch Bundles built", [r.message.bundles]),
+          indicator: "green",
+        });
+        frm.reload_doc();
+      })
+  );
+}
 
 /**
- * Auto-fetch expiry date when batch_no is manually changed in child tables
- * This handles cases where users select a batch manually (not via scanner)
+ * Offline barcode catalog (api.catalog). When enabled in SurgiShop Settings,
+ * every item barcode is kept in IndexedDB and synced by modified watermark,
+ * so plain barcode scans resolve locally. Scans that need the server while
+ * the connection is down are journaled and replayed on the same draft once
+ * it is back.
  */
-function setupBatchExpiryAutoFetch() {
-  const childDoctypes = [
-    "Purchase Receipt Item",
-    "Purchase Invoice Item",
-    "Stock Entry Detail",
-    "Delivery Note Item",
-    "Sales Invoice Item",
-  ];
-
-  childDoctypes.forEach((childDoctype) => {
-    frappe.ui.form.on(childDoctype, {
-      batch_no: function (frm, cdt, cdn) {
-        const row = locals[cdt][cdn];
-        const batchNo = row.batch_no;
-
-        if (batchNo) {
-          frappe.db.get_value("Batch", batchNo, "expiry_date", (r) => {
-            if (r && r.expiry_date) {
-              frappe.model.set_value(
-                cdt,
-                cdn,
-                "custom_expiration_date",
-                r.expiry_date
-              );
-            } else {
-              frappe.model.set_value(cdt, cdn, "custom_expiration_date", null);
+const CATALOG_API =
+  "surgishop_erp_scanner.surgishop_erp_scanner.api.catalog.get_barcode_catalog";
+const CATALOG_SYNC_INTERVAL_MS = 5 * 60 * 1000;
+const CATALOG_JOURNAL_MAX_AGE_MS = 7 * 24 * 60 * 60 * 1000;
+
+function idbRequest(request) {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+window.surgishop.catalog = {
+  db: null,
+  started: false,
+  syncing: null,
+  replaying: false,
+
+  /**
+   * Open the site's catalog database
+   * @returns {Promise<IDBDatabase>}
+   */
+  open() {
+    if (!this.db) {
+      const request = indexedDB.open(
+        `surgishop_scanner:${frappe.boot.sitename}`,
+        1
+      );
+      request.onupgradeneeded = () => {
+        const db = request.result;
+        db.createObjectStore("barcodes", { keyPath: "barcode" });
+        db.createObjectStore("meta");
+        db.createObjectStore("journal", { keyPath: "id", autoIncrement: true });
+      };
+      this.db = idbRequest(request);
+    }
+    return this.db;
+  },
+
+  store(name, mode = "readonly") {
+    return this.open().then((db) =>
+      db.transaction(name, mode).objectStore(name)
+    );
+  },
+
+  /**
+   * Start syncing; called once the settings are loaded
+   */
+  start() {
+    if (this.started || !window.indexedDB) {
+      return;
+    }
+    this.started = true;
+
+    window.addEventListener("online", () =>
+      this.sync().finally(() => this.replay(cur_frm))
+    );
+    setInterval(() => this.sync(), CATALOG_SYNC_INTERVAL_MS);
+    this.sync().finally(() => this.replay(cur_frm));
+  },
+
+  /**
+   * Fetch catalog pages until the local copy is current
+   * @returns {Promise}
+   */
+  sync() {
+    if (this.syncing || !navigator.onLine) {
+      return this.syncing || Promise.resolve();
+    }
+
+    const next = (state) =>
+      frappe
+        .xcall(CATALOG_API, {
+          since: state.since,
+          after: state.after,
+          epoch: state.epoch,
+        })
+        .then((page) => this.apply_page(state, page))
+        .then(({ state, more }) => (more ? next(state) : null));
+
+    this.syncing = this.store("meta")
+      .then((meta) => idbRequest(meta.get("state")))
+      .then((state) => next(state || {}))
+      .catch((e) => console.warn("SurgiShop: catalog sync failed", e))
+      .finally(() => {
+        this.syncing = null;
+      });
+    return this.syncing;
+  },
+
+  /**
+   * Write one page and its watermark in a single transaction
+   * @returns {Promise<{state: object, more: boolean}>}
+   */
+  apply_page(state, page) {
+    return this.open().then(
+      (db) =>
+        new Promise((resolve, reject) => {
+          const tx = db.transaction(["barcodes", "meta"], "readwrite");
+          const barcodes = tx.objectStore("barcodes");
+          if (page.reset) {
+            barcodes.clear();
+          }
+          page.rows.forEach((row) => {
+            barcodes.put({
+              barcode: row[0],
+              item_code: row[1],
+              uom: row[2],
+              item_name: row[3],
+              stock_uom: row[4],
+              has_batch_no: row[5],
+              has_serial_no: row[6],
+              disabled: row[7],
+            });
+          });
+
+          const new_state = { epoch: page.epoch };
+          if (page.watermark) {
+            new_state.since = page.watermark.since;
+            new_state.after = page.more ? page.watermark.after : null;
+          } else if (!page.reset) {
+            new_state.since = state.since;
+          }
+          tx.objectStore("meta").put(new_state, "state");
+
+          tx.oncomplete = () =>
+            resolve({ state: new_state, more: Boolean(page.more) });
+          tx.onerror = () => reject(tx.error);
+        })
+    );
+  },
+
+  /**
+   * @param {string} barcode Scanned value
+   * @returns {Promise<object|undefined>} Catalog entry
+   */
+  lookup(barcode) {
+    return this.store("barcodes").then((store) =>
+      idbRequest(store.get(barcode))
+    );
+  },
+
+  /**
+   * Queue a scan made while offline
+   * @param {object} entry doctype, docname, input and queued_at
+   */
+  journal(entry) {
+    return this.store("journal", "readwrite").then((store) =>
+      idbRequest(store.add(entry))
+    );
+  },
+
+  remove(id) {
+    return this.store("journal", "readwrite").then((store) =>
+      idbRequest(store.delete(id))
+    );
+  },
+
+  /**
+   * Replay the scans queued for a draft, in scan order. Entries for other
+   * documents wait until that document is opened; stale ones are dropped.
+   * @param {object} frm Open form
+   */
+  replay(frm) {
+    if (
+      this.replaying ||
+      !navigator.onLine ||
+      !frm ||
+      !frm.doc ||
+      !surgishop.SCANNER_DOCTYPES.includes(frm.doctype)
+    ) {
+      return Promise.resolve();
+    }
+    this.replaying = true;
+
+    return this.store("journal")
+      .then((store) => idbRequest(store.getAll()))
+      .then((entries) => {
+        const cutoff = Date.now() - CATALOG_JOURNAL_MAX_AGE_MS;
+        const stale = entries.filter((entry) => entry.queued_at < cutoff);
+        const queued = entries.filter(
+          (entry) =>
+            entry.queued_at >= cutoff &&
+            entry.doctype === frm.doctype &&
+            entry.docname === frm.docname
+        );
+
+        let chain = Promise.all(stale.map((entry) => this.remove(entry.id)));
+        if (!queued.length || frm.doc.docstatus !== 0) {
+          return chain;
+        }
+
+        frappe.show_alert({
+          message: `Applying ${queued.length} scan(s) queued while offline`,
+          indicator: "blue",
+        });
+        const scanner = makeScanner(frm);
+        queued.forEach((entry) => {
+          chain = chain.then(() => {
+            if (!navigator.onLine) {
+              return null;
             }
+            // Removed first: a scan that fails offline again is re-queued
+            return this.remove(entry.id).then(() =>
+              scanner.process_scan(entry.input).catch(() => {
+                // Errors are already shown by handle_api_response
+              })
+            );
           });
-        } else {
-          frappe.model.set_value(cdt, cdn, "custom_expiration_date", null);
+        });
+        return chain;
+      })
+      .catch((e) => console.warn("SurgiShop: offline replay failed", e))
+      .finally(() => {
+        this.replaying = false;
+      });
+  },
+};
+
+/**
+ * Client scan telemetry (api.metrics.record_client_scan_timings). When
+ * enabled, a sample of desk scans is timed from input to server response, to
+ * row applied and to grid rendered. Timings are aggregated into histograms
+ * per document type and row count in the browser and sent once a minute, or
+ * when the page is hidden.
+ */
+const TELEMETRY_API =
+  "surgishop_erp_scanner.surgishop_erp_scanner.api.metrics.record_client_scan_timings";
+const TELEMETRY_FLUSH_MS = 60 * 1000;
+
+// Bucket upper bounds in seconds, labelled like scan_metrics.LATENCY_BUCKETS
+const TELEMETRY_BUCKETS = [
+  "0.005",
+  "0.01",
+  "0.025",
+  "0.05",
+  "0.1",
+  "0.25",
+  "0.5",
+  "1.0",
+  "2.5",
+  "5.0",
+  "10.0",
+];
+
+// Row counts, labelled like scan_metrics.ROW_COUNT_BUCKETS
+const TELEMETRY_ROW_BUCKETS = [
+  [10, "0-10"],
+  [50, "11-50"],
+  [200, "51-200"],
+  [500, "201-500"],
+];
+
+window.surgishop.telemetry = {
+  pending: {},
+  timer: null,
+
+  /**
+   * Start timing a scan, if it is sampled
+   * @param {object} frm Form
+   * @param {string} table Items table fieldname
+   * @returns {object|null} Trace
+   */
+  start(frm, table) {
+    const settings = window.surgishop.settings;
+    if (
+      !settings.clientTelemetry ||
+      Math.random() * 100 >= settings.clientTelemetrySampleRate
+    ) {
+      return null;
+    }
+
+    const count = (frm.doc[table] || []).length;
+    const bucket = TELEMETRY_ROW_BUCKETS.find(([limit]) => count <= limit);
+    return {
+      doctype: frm.doctype,
+      rows: bucket ? bucket[1] : "500+",
+      started: performance.now(),
+      marks: {},
+    };
+  },
+
+  mark(trace, phase) {
+    if (trace && !(phase in trace.marks)) {
+      trace.marks[phase] = performance.now();
+    }
+  },
+
+  /**
+   * Record a scan once the browser has painted its row
+   * @param {object} trace Trace with api and applied marks
+   */
+  finish(trace) {
+    if (!trace || !trace.marks.api || !trace.marks.applied) {
+      return;
+    }
+
+    requestAnimationFrame(() =>
+      setTimeout(() => {
+        const { api, applied } = trace.marks;
+        const rendered = performance.now();
+        this.add(trace, {
+          api: api - trace.started,
+          apply: applied - api,
+          render: rendered - applied,
+          total: rendered - trace.started,
+        });
+      }, 0)
+    );
+  },
+
+  add(trace, phases) {
+    Object.entries(phases).forEach(([phase, ms]) => {
+      const key = `${trace.doctype}|${trace.rows}|${phase}`;
+      if (!this.pending[key]) {
+        this.pending[key] = {
+          doctype: trace.doctype,
+          rows: trace.rows,
+          phase: phase,
+          buckets: {},
+          count: 0,
+          sum: 0,
+        };
+      }
+
+      const histogram = this.pending[key];
+      const seconds = ms / 1000;
+      const bound =
+        TELEMETRY_BUCKETS.find((label) => seconds <= Number(label)) || "+Inf";
+      histogram.buckets[bound] = (histogram.buckets[bound] || 0) + 1;
+      histogram.count += 1;
+      histogram.sum += seconds;
+    });
+
+    if (!this.timer) {
+      this.timer = setInterval(() => this.flush(), TELEMETRY_FLUSH_MS);
+      document.addEventListener("visibilitychange", () => {
+        if (document.visibilityState === "hidden") {
+          this.flush(true);
         }
-      },
+      });
+    }
+  },
+
+  /**
+   * Send the pending histograms; timings are dropped if the call fails
+   * @param {boolean} beacon Send with navigator.sendBeacon (page unloading)
+   */
+  flush(beacon = false) {
+    const histograms = Object.values(this.pending);
+    if (!histograms.length) {
+      return;
+    }
+    this.pending = {};
+
+    if (beacon && navigator.sendBeacon) {
+      const body = new FormData();
+      body.append("histograms", JSON.stringify(histograms));
+      body.append("csrf_token", frappe.csrf_token);
+      navigator.sendBeacon(`/api/method/${TELEMETRY_API}`, body);
+      return;
+    }
+    frappe.xcall(TELEMETRY_API, { histograms: histograms }).catch(() => {
+      // Telemetry must never disturb scanning
     });
-  });
+  },
+};
+
+/**
+ * Build a scanner for a form with the form's scanner options
+ * @param {object} frm Form
+ */
+function makeScanner(frm) {
+  const opts = frm.events.get_barcode_scanner_options
+    ? frm.events.get_barcode_scanner_options(frm)
+    : {};
+  opts.frm = frm;
+  return new surgishop.CustomBarcodeScanner(opts);
 }
 
-// Initialize batch expiry auto-fetch on page ready
-$(document).ready(() => {
-  setupBatchExpiryAutoFetch();
-});
+/**
+ * Refresh work of a scanner doctype form: the bundle button and the replay
+ * of scans journaled while offline.
+ * @param {object} frm
+ */
+function refreshScannerForm(frm) {
+  renderBundleButton(frm);
+  if (window.surgishop.settings.offlineCatalog) {
+    window.surgishop.catalog.replay(frm);
+  }
+}
+
+/**
+ * Entry point used by scanner-loader.js, which loads this bundle for users
+ * with a scanner role when a scanner doctype form opens.
+ */
+const attachedDoctypes = new Set();
+
+surgishop.scanner = {
+  /**
+   * Attach the custom scanner to a scanner doctype's forms
+   * @param {string} doctype One of surgishop.SCANNER_DOCTYPES
+   */
+  attach(doctype) {
+    if (!attachedDoctypes.has(doctype)) {
+      attachedDoctypes.add(doctype);
+      frappe.ui.form.on(doctype, {
+        validate: function (frm) {
+          // Serials scanned within the last frame are not written yet
+          if (frm.surgishop_serial_index) {
+            frm.surgishop_serial_index.flush();
+          }
+        },
+        refresh: refreshScannerForm,
+        scan_barcode: function (frm) {
+          makeScanner(frm)
+            .process_scan()
+            .catch(() => {
+              frappe.show_alert({
+                message: "Barcode scan failed. Please try again.",
+                indicator: "red",
+              });
+            });
+        },
+      });
+    }
+
+    // The form may have refreshed before the bundle arrived
+    if (cur_frm && cur_frm.doctype === doctype && cur_frm.doc) {
+      refreshScannerForm(cur_frm);
+      if (doctype === "Stock Reconciliation") {
+        loadCountSession(cur_frm);
+      }
+    }
+  },
+};
+
+loadSurgiShopScannerSettings();
+setupCountSession();
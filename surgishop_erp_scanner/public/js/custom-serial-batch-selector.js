@@ -1,5 +1,30 @@
 // SurgiShop ERP Scanner - Custom Serial Batch Selector
 
+/**
+ * Call a rate limited scanner endpoint with an idempotency key. While the
+ * server answers `throttled`, the call is sent again with the same key after
+ * `retry_after_ms`.
+ * @param {object} opts frappe.call options
+ * @returns {Promise<*>} The response message
+ */
+function callThrottledScanApi(opts) {
+  const args = Object.assign({}, opts.args, {
+    idempotency_key: frappe.utils.get_random(20),
+  });
+  const send = () =>
+    frappe.call(Object.assign({}, opts, { args })).then((r) => {
+      const data = r.message;
+      if (data && data.throttled) {
+        // Rate limited: try again once the server has capacity
+        return new Promise((resolve) =>
+          setTimeout(resolve, data.retry_after_ms || 1000)
+        ).then(send);
+      }
+      return data;
+    });
+  return send();
+}
+
 // Patch Original Constructor
 if (erpnext.SerialBatchPackageSelector) {
   // Patch constructor
@@ -75,8 +100,8 @@ if (erpnext.SerialBatchPackageSelector) {
             // Format batch_no
             const formattedBatchNo = `${this.item.item_code}-${parsed.lot}`;
 
-            // Call API
-            frappe.call({
+            // Call API; held and retried while the scan rate limit is hit
+            callThrottledScanApi({
               method:
                 "surgishop_erp_scanner.surgishop_erp_scanner.api.gs1_parser.parse_gs1_and_get_batch",
               args: {
@@ -85,102 +110,107 @@ if (erpnext.SerialBatchPackageSelector) {
                 lot: parsed.lot,
                 item_code: this.item.item_code,
               },
-              callback: (res) => {
-                if (!res.message || res.message.error) {
-                  frappe.show_alert(
-                    {
-                      message: __(
-                        "Error creating or getting batch: " +
-                          (res.message.error || "Unknown error")
-                      ),
-                      indicator: "red",
-                    },
-                    5
-                  );
-                  scanField.set_value("");
-                  frappe.utils.play_sound("error");
-                  return;
-                }
-
-                const batch = res.message.batch;
-                const batchExpiry = res.message.batch_expiry_date;
-
-                // Format scanned expiry to 'YYYY-MM-DD'
-                const scannedExpiry =
-                  "20" +
-                  parsed.expiry.slice(0, 2) +
-                  "-" +
-                  parsed.expiry.slice(2, 4) +
-                  "-" +
-                  parsed.expiry.slice(4, 6);
+            }).then((data) => {
+              if (!data || data.error) {
+                frappe.show_alert(
+                  {
+                    message: __(
+                      "Error creating or getting batch: " +
+                        ((data && data.error) || "Unknown error")
+                    ),
+                    indicator: "red",
+                  },
+                  5
+                );
+                scanField.set_value("");
+                frappe.utils.play_sound("error");
+                return;
+              }
+
+              const batch = data.batch;
+              const batchExpiry = data.batch_expiry_date;
 
+              // Format scanned expiry to 'YYYY-MM-DD'
+              const scannedExpiry =
+                "20" +
+                parsed.expiry.slice(0, 2) +
+                "-" +
+                parsed.expiry.slice(2, 4) +
+                "-" +
+                parsed.expiry.slice(4, 6);
+
+              if (data.expiry_warning) {
+                // Same as the desk scanner: the batch is used, the mismatch is noted on it
+                frappe.show_alert(
+                  { message: data.expiry_warning, indicator: "orange" },
+                  5
+                );
+              } else if (batchExpiry !== scannedExpiry) {
                 // Validate expiry matches scanned
-                if (batchExpiry !== scannedExpiry) {
-                  frappe.show_alert(
-                    {
-                      message: __("Batch expiry does not match scanned expiry"),
-                      indicator: "orange",
-                    },
-                    5
-                  );
-                  scanField.set_value("");
-                  frappe.utils.play_sound("error");
-                  return;
-                }
-
-                // Add to grid data directly (dialog grids work differently than form child tables)
-                const grid = this.dialog.fields_dict.entries.grid;
-
-                // Get the grid's data array
-                const gridData = grid.get_data ? grid.get_data() : [];
-
-                // Check if batch already exists in the grid
-                const existingRow = gridData.find(
-                  (row) => row.batch_no === batch
+                frappe.show_alert(
+                  {
+                    message: __("Batch expiry does not match scanned expiry"),
+                    indicator: "orange",
+                  },
+                  5
                 );
+                scanField.set_value("");
+                frappe.utils.play_sound("error");
+                return;
+              }
 
-                if (existingRow) {
-                  // Increment quantity if batch already exists
-                  existingRow.qty = (existingRow.qty || 0) + 1;
-                  frappe.show_alert(
-                    {
-                      message: __(
-                        `Batch ${batch}: Qty increased to ${existingRow.qty}`
-                      ),
-                      indicator: "green",
-                    },
-                    3
-                  );
-                } else {
-                  // Create a new row object if batch doesn't exist
-                  const newRow = {
-                    batch_no: batch,
-                    qty: 1,
-                    expiry_date: batchExpiry,
-                  };
-
-                  // Add the new row to the data
-                  gridData.push(newRow);
-
-                  frappe.show_alert(
-                    {
-                      message: __(`Batch ${batch} added with qty 1`),
-                      indicator: "green",
-                    },
-                    3
-                  );
-                }
-
-                // Set the grid data and refresh
-                if (grid.df && grid.df.data) {
-                  grid.df.data = gridData;
-                }
-
-                grid.refresh();
+              // Add to grid data directly (dialog grids work differently than form child tables)
+              const grid = this.dialog.fields_dict.entries.grid;
 
-                scanField.set_value("");
-                frappe.utils.play_sound("submit"); // Play success sound
-              },
+              // Get the grid's data array
+              const gridData = grid.get_data ? grid.get_data() : [];
+
+              // Check if batch already exists in the grid
+              const existingRow = gridData.find(
+                (row) => row.batch_no === batch
+              );
+
+              if (existingRow) {
+                // Increment quantity if batch already exists
+                existingRow.qty = (existingRow.qty || 0) + 1;
+                frappe.show_alert(
+                  {
+                    message: __(
+                      `Batch ${batch}: Qty increased to ${existingRow.qty}`
+                    ),
+                    indicator: "green",
+                  },
+                  3
+                );
+              } else {
+                // Create a new row object if batch doesn't exist
+                const newRow = {
+                  batch_no: batch,
+                  qty: 1,
+                  expiry_date: batchExpiry,
+                };
+
+                // Add the new row to the data
+                gridData.push(newRow);
+
+                frappe.show_alert(
+                  {
+                    message: __(`Batch ${batch} added with qty 1`),
+                    indicator: "green",
+                  },
+                  3
+                );
+              }
+
+              // Set the grid data and refresh
+              if (grid.df && grid.df.data) {
+                grid.df.data = gridData;
+              }
+
+              grid.refresh();
+
+              scanField.set_value("");
+              frappe.utils.play_sound("submit"); // Play success sound
             });
           })
           .catch((err) => {
@@ -195,8 +225,164 @@ if (erpnext.SerialBatchPackageSelector) {
             frappe.utils.play_sound("error");
           });
       };
+
+      // Bulk paste: resolve a whole list of GS1 labels in one request
+      $(
+        `<button class="btn btn-xs btn-default" style="margin-top: 4px;">${__(
+          "Paste Multiple Labels"
+        )}</button>`
+      )
+        .insertAfter(scanField.$wrapper.find(".control-input-wrapper"))
+        .on("click", (e) => {
+          e.preventDefault();
+          this.surgishop_bulk_paste();
+        });
     }
   };
+
+  /**
+   * Multi-line GS1 input: every line is parsed client-side, all lines are
+   * resolved with a single parse_gs1_batches call and the grid is filled in
+   * one pass. Lines that fail (invalid GS1, GTIN not on this item, ...) are
+   * listed per line.
+   */
+  erpnext.SerialBatchPackageSelector.prototype.surgishop_bulk_paste =
+    function () {
+      const dialog = new frappe.ui.Dialog({
+        title: __("Paste GS1 Labels - Item: {0}", [this.item.item_code]),
+        fields: [
+          {
+            fieldtype: "Small Text",
+            fieldname: "labels",
+            label: __("GS1 Labels"),
+            description: __("One scanned label per line"),
+            reqd: 1,
+          },
+        ],
+        primary_action_label: __("Add Batches"),
+        primary_action: ({ labels }) => {
+          dialog.hide();
+          this.surgishop_add_gs1_lines(labels.split(/\r?\n/));
+        },
+      });
+      dialog.show();
+    };
+
+  erpnext.SerialBatchPackageSelector.prototype.surgishop_add_gs1_lines =
+    function (lines) {
+      const errors = [];
+      const entries = [];
+      const lineNumbers = [];
+
+      lines.forEach((line, i) => {
+        const value = line.trim();
+        if (!value) return;
+
+        const parsed = window.surgishop.GS1Parser.parse(value);
+        if (!parsed || !parsed.gtin || !parsed.lot) {
+          errors.push([i + 1, value, __("Invalid GS1 barcode format")]);
+          return;
+        }
+        entries.push({
+          gtin: parsed.gtin,
+          lot: parsed.lot,
+          expiry: parsed.expiry,
+        });
+        lineNumbers.push([i + 1, value]);
+      });
+
+      const finish = (results) => {
+        const grid = this.dialog.fields_dict.entries.grid;
+        const gridData = grid.get_data ? grid.get_data() : [];
+        const rowsByBatch = {};
+        gridData.forEach((row) => {
+          if (row.batch_no) rowsByBatch[row.batch_no] = row;
+        });
+
+        const newRows = [];
+        let added = 0;
+        results.forEach((res, i) => {
+          const [lineNo, value] = lineNumbers[i];
+          if (!res || !res.batch) {
+            errors.push([
+              lineNo,
+              value,
+              (res && res.error) || __("Unknown error"),
+            ]);
+            return;
+          }
+          if (res.expiry_warning) {
+            errors.push([lineNo, value, res.expiry_warning]);
+          }
+
+          added += 1;
+          const row = rowsByBatch[res.batch];
+          if (row) {
+            row.qty = (row.qty || 0) + 1;
+          } else {
+            rowsByBatch[res.batch] = {
+              batch_no: res.batch,
+              qty: 1,
+              expiry_date: res.batch_expiry_date,
+            };
+            newRows.push(rowsByBatch[res.batch]);
+          }
+        });
+
+        // Expiries are already known: skip the per-row lookups of set_data
+        if (newRows.length) {
+          originalSetData.call(this, newRows);
+        } else {
+          grid.refresh();
+        }
+
+        frappe.utils.play_sound(errors.length ? "error" : "submit");
+        frappe.show_alert(
+          {
+            message: __("{0} labels added", [added]),
+            indicator: added ? "green" : "red",
+          },
+          5
+        );
+
+        if (errors.length) {
+          const rows = errors
+            .sort((a, b) => a[0] - b[0])
+            .map(
+              ([lineNo, value, error]) =>
+                `<tr><td>${lineNo}</td><td>${frappe.utils.escape_html(
+                  value
+                )}</td><td>${frappe.utils.escape_html(error)}</td></tr>`
+            )
+            .join("");
+          frappe.msgprint({
+            title: __("{0} lines need attention", [errors.length]),
+            indicator: "orange",
+            message: `<table class="table table-bordered table-sm">
+              <thead><tr><th>${__("Line")}</th><th>${__("Label")}</th><th>${__(
+              "Error"
+            )}</th></tr></thead>
+              <tbody>${rows}</tbody></table>`,
+          });
+        }
+      };
+
+      if (!entries.length) {
+        finish([]);
+        return;
+      }
+
+      callThrottledScanApi({
+        method:
+          "surgishop_erp_scanner.surgishop_erp_scanner.api.gs1_parser.parse_gs1_batches",
+        args: {
+          entries: entries,
+          item_code: this.item.item_code,
+        },
+        freeze: true,
+        freeze_message: __("Resolving {0} labels...", [entries.length]),
+      }).then((data) => finish(data || []));
+    };
 }
 
 // Patch get_dialog_table_fields to add expiry_date column in correct order
@@ -237,21 +423,28 @@ erpnext.SerialBatchPackageSelector.prototype.get_dialog_table_fields =
 // Patch set_data to fetch expiry dates for initial data
 const originalSetData = erpnext.SerialBatchPackageSelector.prototype.set_data;
 erpnext.SerialBatchPackageSelector.prototype.set_data = function (data) {
-  const promises = data.map((d) => {
-    if (d.batch_no) {
-      return new Promise((resolve) => {
-        frappe.db.get_value("Batch", d.batch_no, "expiry_date", (r) => {
-          d.expiry_date = r.expiry_date;
-          resolve();
-        });
-      });
-    }
-    return Promise.resolve();
-  });
-
-  Promise.all(promises).then(() => {
+  const batchNos = [...new Set(data.map((d) => d.batch_no).filter(Boolean))];
+  if (!batchNos.length) {
     originalSetData.call(this, data);
-  });
+    return;
+  }
+
+  // One request for all rows instead of one per batch
+  frappe
+    .call({
+      method:
+        "surgishop_erp_scanner.surgishop_erp_scanner.api.batch.get_batch_expiries",
+      args: { batch_nos: batchNos },
+    })
+    .then((r) => {
+      const expiries = (r && r.message) || {};
+      data.forEach((d) => {
+        if (d.batch_no) {
+          d.expiry_date = expiries[d.batch_no] || null;
+        }
+      });
+      originalSetData.call(this, data);
+    });
 };
 
 // Safe DOM Modification for Dialog Title
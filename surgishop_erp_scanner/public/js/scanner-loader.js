@@ -0,0 +1,69 @@
+/**
+ * SurgiShop ERP Scanner - Loader
+ * Included on every desk page. The scanner itself (surgishop_scanner.bundle.js)
+ * is loaded on demand, the first time a user with a scanner role opens the
+ * form of a scanner doctype. Features that are not part of the scanner (batch
+ * expiry auto-fetch, serial/batch selector patches) are in
+ * surgishop_stock.bundle.js, which every desk user loads.
+ */
+
+if (typeof window.surgishop === "undefined") {
+  window.surgishop = {};
+}
+
+// Forms the scanner is attached to
+surgishop.SCANNER_DOCTYPES = [
+  "Stock Entry",
+  "Purchase Order",
+  "Purchase Receipt",
+  "Purchase Invoice",
+  "Sales Invoice",
+  "Delivery Note",
+  "Stock Reconciliation",
+];
+
+// Roles that are allowed to use the scanner
+surgishop.SCANNER_ALLOWED_ROLES = [
+  "System Manager",
+  "Stock Manager",
+  "Stock User",
+  "Purchase Manager",
+  "Purchase User",
+];
+
+/**
+ * Check if current user has permission to use the scanner
+ */
+surgishop.userCanUseScanner = function () {
+  if (!frappe.user || !frappe.user.has_role) {
+    return false;
+  }
+  return surgishop.SCANNER_ALLOWED_ROLES.some((role) =>
+    frappe.user.has_role(role)
+  );
+};
+
+/**
+ * Load the scanner bundle once
+ * @returns {Promise} Resolves when surgishop.scanner is available
+ */
+surgishop.loadScanner = function () {
+  if (!surgishop.scannerLoaded) {
+    surgishop.scannerLoaded = frappe.require("surgishop_scanner.bundle.js");
+  }
+  return surgishop.scannerLoaded;
+};
+
+frappe.router.on("change", () => {
+  const route = frappe.get_route();
+  if (
+    !route ||
+    route[0] !== "Form" ||
+    !surgishop.SCANNER_DOCTYPES.includes(route[1]) ||
+    !surgishop.userCanUseScanner()
+  ) {
+    return;
+  }
+
+  surgishop.loadScanner().then(() => surgishop.scanner.attach(route[1]));
+});
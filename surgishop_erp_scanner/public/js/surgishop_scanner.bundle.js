@@ -0,0 +1,3 @@
+// SurgiShop ERP Scanner - scanner bundle, loaded on demand by scanner-loader.js
+// (GS1 utils come with surgishop_stock.bundle.js)
+import "./custom-barcode-scanner.js";
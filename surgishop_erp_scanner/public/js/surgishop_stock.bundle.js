@@ -0,0 +1,5 @@
+// SurgiShop ERP Scanner - stock form enhancements for every desk user:
+// GS1 utils, batch expiry auto-fetch and the serial/batch selector patches
+import "./gs1-utils.js";
+import "./batch-expiry.js";
+import "./custom-serial-batch-selector.js";
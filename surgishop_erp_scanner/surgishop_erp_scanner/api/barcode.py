@@ -4,32 +4,67 @@
 import frappe
 from frappe import _
 
+from surgishop_erp_scanner.surgishop_erp_scanner.batch_allocation import add_fefo_allocation
+from surgishop_erp_scanner.surgishop_erp_scanner.item_flags import get_item_flags
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_idempotency import idempotent_scan_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_journal import describe_barcode_scan, journal_scan_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_metrics import (
+	log_scan,
+	log_scan_error,
+	scan_stage,
+	scan_timer,
+)
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_profiler import profile_scanner_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_rate_limit import rate_limited_scan_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_replica import read_from_replica, replica_cached_value
+from surgishop_erp_scanner.surgishop_erp_scanner.scanner_cache import get_barcode_item, record_scan
+
 
 @frappe.whitelist()
+@rate_limited_scan_call
+@idempotent_scan_call("scan_barcode")
+@journal_scan_call("scan_barcode", describe_barcode_scan)
+@profile_scanner_call("scan_barcode")
 def scan_barcode(search_value: str, ctx: dict | str | None = None) -> dict:
 	"""
 	Custom barcode scanning function for SurgiShop ERP Scanner.
 	Overrides ERPNext's default barcode scanning with custom logic.
+
+	With `fefo` in the context, batch item results on outbound documents get
+	a `batch_allocation`, see `batch_allocation`.
 	"""
-	if ctx is None:
-		ctx = frappe._dict()
+	ctx = frappe._dict(frappe.parse_json(ctx) or {})
+
+	with scan_timer("scan_barcode"):
+		log_scan("Custom barcode scan for: %s", search_value)
+
+		# Runs on the read replica when configured; misses are retried on the primary
+		with scan_stage("lookup"):
+			scan_result = read_from_replica(_lookup_scan_value, search_value)
+
+		if scan_result.get("item_code"):
+			# On the primary: ERPNext's item details read through the shared document
+			# cache, which must not be filled with lagging replica rows
+			scan_result = _get_item_details(scan_result, ctx)
+
+		if ctx.get("fefo") and scan_result.get("item_code"):
+			# On the primary: a lagging replica could offer a batch that was just consumed
+			with scan_stage("allocation"):
+				add_fefo_allocation(scan_result, ctx)
+
+		if scan_result:
+			record_scan(search_value)
+
+		return scan_result
 
-	frappe.logger().info(
-		f"🏥 SurgiShop ERP Scanner: Custom barcode scan for: {search_value}"
-	)
 
+def _lookup_scan_value(search_value: str) -> dict:
+	"""Resolve a scanned value to an item barcode, serial no, batch or warehouse."""
 	# Search barcode in Item Barcode table
-	barcode_data = frappe.db.get_value(
-		"Item Barcode",
-		{"barcode": search_value},
-		["barcode", "parent as item_code", "uom"],
-		as_dict=True,
-	)
+	barcode_data = get_barcode_item(search_value)
 	if barcode_data:
-		frappe.logger().info(
-			f"🏥 SurgiShop ERP Scanner: Found barcode in Item Barcode: {barcode_data}"
-		)
-		return _get_item_details(barcode_data, ctx)
+		log_scan("Found barcode in Item Barcode: %s", barcode_data)
+		return barcode_data
 
 	# Search serial no
 	serial_no_data = frappe.db.get_value(
@@ -39,10 +74,8 @@ def scan_barcode(search_value: str, ctx: dict | str | None = None) -> dict:
 		as_dict=True,
 	)
 	if serial_no_data:
-		frappe.logger().info(
-			f"🏥 SurgiShop ERP Scanner: Found serial no: {serial_no_data}"
-		)
-		return _get_item_details(serial_no_data, ctx)
+		log_scan("Found serial no: %s", serial_no_data)
+		return serial_no_data
 
 	# Search batch no
 	batch_no_data = frappe.db.get_value(
@@ -52,20 +85,18 @@ def scan_barcode(search_value: str, ctx: dict | str | None = None) -> dict:
 		as_dict=True,
 	)
 	if batch_no_data:
-		if frappe.get_cached_value("Item", batch_no_data.item_code, "has_serial_no"):
+		if (get_item_flags(batch_no_data.item_code, ["has_serial_no"]) or {}).get("has_serial_no"):
 			frappe.throw(
 				_(
 					"Batch No {0} is linked with Item {1} which has serial no. Please scan serial no instead."
 				).format(search_value, batch_no_data.item_code)
 			)
 
-		frappe.logger().info(
-			f"🏥 SurgiShop ERP Scanner: Found batch no: {batch_no_data}"
-		)
-		return _get_item_details(batch_no_data, ctx)
+		log_scan("Found batch no: %s", batch_no_data)
+		return batch_no_data
 
 	# Search warehouse
-	warehouse = frappe.get_cached_value(
+	warehouse = replica_cached_value(
 		"Warehouse",
 		search_value,
 		("name", "disabled"),
@@ -73,15 +104,11 @@ def scan_barcode(search_value: str, ctx: dict | str | None = None) -> dict:
 	)
 	if warehouse and not warehouse.disabled:
 		warehouse_data = {"warehouse": warehouse.name}
-		frappe.logger().info(
-			f"🏥 SurgiShop ERP Scanner: Found warehouse: {warehouse_data}"
-		)
+		log_scan("Found warehouse: %s", warehouse_data)
 		return warehouse_data
 
 	# If no match found, return empty dict
-	frappe.logger().info(
-		f"🏥 SurgiShop ERP Scanner: No match found for: {search_value}"
-	)
+	log_scan("No match found for: %s", search_value)
 	return {}
 
 
@@ -91,53 +118,49 @@ def _get_item_details(scan_result: dict, ctx: dict) -> dict:
 	if not item_code:
 		return scan_result
 
-	# Get item details
-	item_info = frappe.get_cached_value(
-		"Item",
-		item_code,
-		("has_batch_no", "has_serial_no", "item_name", "stock_uom", "is_stock_item"),
-		as_dict=True,
-	)
-
-	if item_info:
-		scan_result.update(item_info)
+	with scan_stage("enrichment"):
+		# Get item details
+		item_info = get_item_flags(
+			item_code,
+			("has_batch_no", "has_serial_no", "item_name", "stock_uom", "is_stock_item"),
+		)
 
-	# Get default warehouse if available
-	if ctx and hasattr(ctx, 'get'):
-		try:
-			from erpnext.stock.get_item_details import get_item_warehouse_
-			if warehouse := get_item_warehouse_(
-				ctx,
-				frappe._dict(name=item_code),
-				overwrite_warehouse=True
-			):
-				scan_result["default_warehouse"] = warehouse
-		except Exception:
-			pass
+		if item_info:
+			scan_result.update(item_info)
+
+		# Get default warehouse if available
+		if ctx and hasattr(ctx, "get"):
+			try:
+				from erpnext.stock.get_item_details import get_item_warehouse_
+				if warehouse := get_item_warehouse_(
+					ctx,
+					frappe._dict(name=item_code),
+					overwrite_warehouse=True
+				):
+					scan_result["default_warehouse"] = warehouse
+			except Exception:
+				pass
 
 	# Get item rate if available
-	try:
-		from erpnext.stock.get_item_details import get_item_details
-		item_details = get_item_details({
-			"item_code": item_code,
-			"company": ctx.get("company") if ctx else None,
-			"warehouse": ctx.get("set_warehouse") if ctx else None,
-		})
-
-		if item_details:
-			scan_result["rate"] = item_details.get("rate", 0)
-			scan_result["stock_uom"] = item_details.get(
-				"stock_uom",
-				item_info.get("stock_uom") if item_info else None
-			)
-	except Exception as e:
-		frappe.logger().error(
-			f"🏥 SurgiShop ERP Scanner: Error getting item details: {str(e)}"
-		)
-
-	frappe.logger().info(
-		f"🏥 SurgiShop ERP Scanner: Enhanced scan result: {scan_result}"
-	)
+	with scan_stage("pricing"):
+		try:
+			from erpnext.stock.get_item_details import get_item_details
+			item_details = get_item_details({
+				"item_code": item_code,
+				"company": ctx.get("company") if ctx else None,
+				"warehouse": ctx.get("set_warehouse") if ctx else None,
+			})
+
+			if item_details:
+				scan_result["rate"] = item_details.get("rate", 0)
+				scan_result["stock_uom"] = item_details.get(
+					"stock_uom",
+					item_info.get("stock_uom") if item_info else None
+				)
+		except Exception as e:
+			log_scan_error("Error getting item details: %s", e)
+
+	log_scan("Enhanced scan result: %s", scan_result)
 	return scan_result
 
 
@@ -159,16 +182,18 @@ def validate_barcode(barcode: str) -> bool:
 	if not barcode:
 		return False
 
+	return bool(read_from_replica(_barcode_exists, barcode))
+
+
+def _barcode_exists(barcode: str):
 	# Check if barcode exists in any of the tables
-	exists = (
+	return (
 		frappe.db.exists("Item Barcode", {"barcode": barcode}) or
 		frappe.db.exists("Serial No", barcode) or
 		frappe.db.exists("Batch", barcode) or
 		frappe.db.exists("Warehouse", barcode)
 	)
 
-	return bool(exists)
-
 
 @frappe.whitelist()
 def get_condition_options() -> list:
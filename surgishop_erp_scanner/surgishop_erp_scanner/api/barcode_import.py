@@ -0,0 +1,92 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Background Item Barcode catalog import, see `barcode_import`.
+"""
+
+import frappe
+from frappe import _
+
+from surgishop_erp_scanner.surgishop_erp_scanner.barcode_import import import_item_barcodes
+
+
+@frappe.whitelist(methods=["POST"])
+def enqueue_item_barcode_import(file_url: str, dry_run: int = 0) -> dict:
+	"""
+	Import an uploaded GTIN catalog (item code, barcode, optional UOM columns)
+	in the background.
+
+	The user is notified with the counts and a link to the conflict report when
+	the job finishes.
+
+	Args:
+		file_url (str): URL of the uploaded CSV File
+		dry_run (int): 1 to only analyse the file
+
+	Returns:
+		dict: The queued file
+	"""
+	frappe.has_permission("Item", "write", throw=True)
+
+	file_name = frappe.db.get_value("File", {"file_url": file_url}, "name")
+	if not file_name:
+		frappe.throw(_("File {0} not found").format(file_url), frappe.DoesNotExistError)
+	frappe.get_doc("File", file_name).check_permission("read")
+
+	frappe.enqueue(
+		"surgishop_erp_scanner.surgishop_erp_scanner.api.barcode_import.run_item_barcode_import",
+		queue="long",
+		timeout=3600,
+		file_name=file_name,
+		dry_run=frappe.utils.cint(dry_run),
+	)
+	return {"file": file_name}
+
+
+def run_item_barcode_import(file_name, dry_run=0):
+	"""Background job: import a File and tell the user how it went."""
+	try:
+		summary = import_item_barcodes(
+			frappe.get_doc("File", file_name).get_full_path(),
+			dry_run=dry_run,
+		)
+	except Exception:
+		frappe.db.rollback()
+		frappe.log_error(title="SurgiShop Item Barcode Import Error", message=frappe.get_traceback())
+		frappe.publish_realtime(
+			"msgprint",
+			_("Item Barcode import of {0} failed. See the Error Log for details.").format(file_name),
+			user=frappe.session.user,
+		)
+		return
+
+	frappe.db.commit()
+	counts = summary["counts"]
+	if summary["dry_run"]:
+		message = _("Analysed {0} rows: {1} barcodes would be added.").format(
+			counts.get("rows", 0), counts.get("to_insert", 0)
+		)
+	else:
+		message = _("Imported {0} of {1} rows into Item Barcode.").format(
+			counts.get("inserted", 0), counts.get("rows", 0)
+		)
+
+	message += "<br>" + _(
+		"Already present: {0}, duplicates in file: {1}, conflicts: {2}, unknown items: {3}, invalid GTINs: {4}"
+	).format(
+		counts.get("existing", 0),
+		counts.get("duplicate", 0),
+		counts.get("conflict", 0),
+		counts.get("unknown_item", 0),
+		counts.get("invalid", 0),
+	)
+	if summary["ambiguous_existing"]:
+		message += "<br>" + _("{0} existing barcodes are assigned to more than one item.").format(
+			summary["ambiguous_existing"]
+		)
+	if summary["report_url"]:
+		message += '<br><a href="{0}" target="_blank">{1}</a>'.format(
+			summary["report_url"], _("Download the conflict report")
+		)
+	frappe.publish_realtime("msgprint", message, user=frappe.session.user)
@@ -0,0 +1,26 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+import json
+
+import frappe
+
+from surgishop_erp_scanner.surgishop_erp_scanner.overrides.batch_expiry import get_batch_expiry_map
+
+
+@frappe.whitelist()
+def get_batch_expiries(batch_nos):
+	"""
+	API endpoint returning the expiry dates of many batches at once.
+
+	Args:
+		batch_nos (list[str] | str): Batch names, as JSON or list
+
+	Returns:
+		dict: {batch_no: expiry_date or None} for the batches found
+	"""
+	if isinstance(batch_nos, str):
+		batch_nos = json.loads(batch_nos)
+
+	frappe.has_permission("Batch", "read", throw=True)
+	return get_batch_expiry_map(batch_nos or [])
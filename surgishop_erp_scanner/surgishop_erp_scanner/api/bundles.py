@@ -0,0 +1,43 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Bulk Serial and Batch Bundle API, see `bundle_builder`.
+"""
+
+import frappe
+from frappe import _
+
+from surgishop_erp_scanner.surgishop_erp_scanner.bundle_builder import (
+	SUPPORTED_DOCTYPES,
+	build_serial_batch_bundles,
+)
+
+
+@frappe.whitelist(methods=["POST"])
+def build_bundles_for_draft(doctype: str, docname: str) -> dict:
+	"""
+	Build the Serial and Batch Bundles of every scanned batch/serial row of a
+	saved draft in one transaction.
+
+	Args:
+		doctype (str): Purchase Receipt, Purchase Invoice, Delivery Note, Sales Invoice or Stock Entry
+		docname (str): Draft document name
+
+	Returns:
+		dict: Number of bundles built and of serial numbers created
+	"""
+	if doctype not in SUPPORTED_DOCTYPES:
+		frappe.throw(_("Serial and Batch Bundles cannot be built for {0}").format(doctype))
+
+	# Lock the document row so concurrent builds of one draft run one after the other
+	if not frappe.db.get_value(doctype, docname, "name", for_update=True):
+		frappe.throw(_("{0} {1} not found").format(_(doctype), docname), frappe.DoesNotExistError)
+
+	doc = frappe.get_doc(doctype, docname)
+	doc.check_permission("write")
+	if doc.docstatus != 0:
+		frappe.throw(_("{0} {1} is not a draft").format(_(doctype), docname))
+	frappe.has_permission("Serial and Batch Bundle", "create", throw=True)
+
+	return build_serial_batch_bundles(doc)
@@ -0,0 +1,109 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Barcode catalog for offline resolution in the browser scanner.
+
+The desk scanner keeps a copy of every item barcode with the item flags it
+needs in IndexedDB and syncs it by `modified` watermark. A row changes when its
+Item Barcode or its Item is modified. Removed barcodes cannot be seen through a
+watermark, so removing one (or renaming or deleting an item with barcodes)
+moves the catalog to a new epoch, and clients on an older epoch reload the
+whole catalog.
+"""
+
+import frappe
+from frappe.utils import add_to_date, get_datetime
+
+CATALOG_EPOCH_KEY = "surgishop_barcode_catalog_epoch"
+
+# Rows per response
+PAGE_SIZE = 5000
+
+# Seconds re-read before a client's watermark when a sync starts, to pick up
+# rows committed late with an older modified timestamp
+SYNC_OVERLAP = 120
+
+
+@frappe.whitelist()
+def get_barcode_catalog(since: str | None = None, after: str | None = None, epoch: str | None = None) -> dict:
+	"""
+	Return a page of the barcode catalog.
+
+	Args:
+		since (str): Modified watermark of the client's last synced row
+		after (str): Barcode of that row; set while paging through one sync
+		epoch (str): Catalog epoch the client holds
+
+	Returns:
+		dict: epoch, reset (the client must drop its copy first), rows as
+		      [barcode, item_code, uom, item_name, stock_uom, has_batch_no,
+		      has_serial_no, disabled], the new watermark and whether more
+		      rows follow
+	"""
+	frappe.has_permission("Item", "read", throw=True)
+
+	current_epoch = get_catalog_epoch()
+	reset = epoch != current_epoch
+	if reset:
+		since = after = None
+	elif since and not after:
+		since = add_to_date(get_datetime(since), seconds=-SYNC_OVERLAP)
+
+	conditions = ["ib.parenttype = 'Item'"]
+	if since and after:
+		conditions.append(
+			"(greatest(ib.modified, i.modified) > %(since)s"
+			" or (greatest(ib.modified, i.modified) = %(since)s and ib.barcode > %(after)s))"
+		)
+	elif since:
+		conditions.append("greatest(ib.modified, i.modified) >= %(since)s")
+
+	rows = frappe.db.sql(
+		f"""
+		select
+			ib.barcode, ib.parent, ib.uom, i.item_name, i.stock_uom,
+			i.has_batch_no, i.has_serial_no, i.disabled,
+			greatest(ib.modified, i.modified) as row_modified
+		from `tabItem Barcode` ib
+		inner join `tabItem` i on i.name = ib.parent
+		where {' and '.join(conditions)}
+		order by row_modified, ib.barcode
+		limit %(limit)s
+		""",
+		{"since": since, "after": after, "limit": PAGE_SIZE + 1},
+	)
+
+	more = len(rows) > PAGE_SIZE
+	rows = rows[:PAGE_SIZE]
+	watermark = {"since": str(rows[-1][8]), "after": rows[-1][0]} if rows else None
+
+	return {
+		"epoch": current_epoch,
+		"reset": int(reset),
+		"rows": [list(row[:8]) for row in rows],
+		"watermark": watermark,
+		"more": int(more),
+	}
+
+
+def get_catalog_epoch():
+	return frappe.db.get_global(CATALOG_EPOCH_KEY) or "0"
+
+
+def bump_catalog_epoch():
+	frappe.db.set_global(CATALOG_EPOCH_KEY, frappe.generate_hash(length=10))
+
+
+def on_item_change(doc, method=None, *args):
+	"""Item doc event: start a new epoch when barcodes disappear from the catalog."""
+	current = {row.barcode for row in doc.get("barcodes") or []}
+
+	if method in ("on_trash", "after_rename"):
+		removed = bool(current)
+	else:
+		before = doc.get_doc_before_save()
+		removed = bool(before and {row.barcode for row in before.get("barcodes") or []} - current)
+
+	if removed:
+		bump_catalog_epoch()
@@ -0,0 +1,271 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Cycle-count sessions for Stock Reconciliation.
+
+In a count session scans do not touch the form. Each scan is resolved on the
+server and added to a Redis hash keyed by (item, batch, warehouse, condition)
+with an atomic increment, so the browser only shows a running tally and the
+count survives reloads and several counters can share one document. At the end
+the session is materialized into Stock Reconciliation rows with a single save.
+"""
+
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import flt, now_datetime
+
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_idempotency import idempotent_scan_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_rate_limit import rate_limited_scan_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_resolver import resolve_scan
+
+COUNT_QTY_KEY = "surgishop_scanner:count:{0}:qty"
+COUNT_META_KEY = "surgishop_scanner:count:{0}:meta"
+COUNT_MATERIALIZE_KEY = "surgishop_scanner:count:{0}:materializing"
+
+# Sessions expire this long after their last scan
+COUNT_SESSION_TTL = 7 * 24 * 60 * 60
+
+
+def _keys(docname):
+	return (
+		frappe.cache.make_key(COUNT_QTY_KEY.format(docname)),
+		frappe.cache.make_key(COUNT_META_KEY.format(docname)),
+	)
+
+
+def validate_count_target(docname):
+	"""Check the document is a draft Stock Reconciliation the user may write to."""
+	docstatus = frappe.db.get_value("Stock Reconciliation", docname, "docstatus")
+	if docstatus is None:
+		frappe.throw(_("Stock Reconciliation {0} not found").format(docname), frappe.DoesNotExistError)
+	if docstatus != 0:
+		frappe.throw(_("Stock Reconciliation {0} is not a draft").format(docname))
+
+	frappe.has_permission("Stock Reconciliation", "write", docname, throw=True)
+
+
+def get_tally(docname):
+	"""Return the running tally of a session, or None if there is no session."""
+	qty_key, meta_key = _keys(docname)
+	pipe = frappe.cache.pipeline()
+	pipe.hgetall(meta_key)
+	pipe.hlen(qty_key)
+	meta, rows = pipe.execute()
+	if not meta:
+		return None
+
+	meta = {frappe.safe_decode(k): frappe.safe_decode(v) for k, v in meta.items()}
+	return {
+		"started_by": meta.get("started_by"),
+		"started_at": meta.get("started_at"),
+		"scans": flt(meta.get("scans")),
+		"rows": rows,
+		"warehouse": meta.get("warehouse"),
+	}
+
+
+@frappe.whitelist()
+def get_count_session(docname: str) -> dict | None:
+	"""
+	Get the active count session of a Stock Reconciliation.
+
+	Returns:
+		dict | None: Running tally (scans, rows, warehouse, started_by, started_at)
+	"""
+	frappe.has_permission("Stock Reconciliation", "read", docname, throw=True)
+	return get_tally(docname)
+
+
+@frappe.whitelist(methods=["POST"])
+def start_count_session(docname: str) -> dict:
+	"""
+	Start a count session, or join the one already running.
+
+	Returns:
+		dict: Running tally
+	"""
+	validate_count_target(docname)
+
+	qty_key, meta_key = _keys(docname)
+	pipe = frappe.cache.pipeline()
+	pipe.hsetnx(meta_key, "started_by", frappe.session.user)
+	pipe.hsetnx(meta_key, "started_at", str(now_datetime()))
+	pipe.hsetnx(meta_key, "scans", 0)
+	pipe.expire(meta_key, COUNT_SESSION_TTL)
+	pipe.expire(qty_key, COUNT_SESSION_TTL)
+	pipe.execute()
+
+	return get_tally(docname)
+
+
+@frappe.whitelist(methods=["POST"])
+@rate_limited_scan_call
+@idempotent_scan_call("add_count_scan")
+def add_count_scan(
+	docname: str,
+	raw_value: str,
+	qty: float | None = None,
+	warehouse: str | None = None,
+	condition: str | None = None,
+) -> dict:
+	"""
+	Resolve a scan and add it to the session aggregate.
+
+	Args:
+		docname (str): Stock Reconciliation with an active session
+		raw_value (str): Scanned string (GS1, barcode, batch or warehouse)
+		qty (float): Counted quantity, 1 when omitted; 0 records the item as
+		             counted with nothing on hand
+		warehouse (str): Warehouse counted in (defaults to the last scanned
+		                 warehouse of the session, then the document's)
+		condition (str): Optional condition of the counted stock
+
+	Returns:
+		dict: The resolved item and its counted qty plus the running tally,
+		      the warehouse for warehouse scans, or an error
+	"""
+	qty_key, meta_key = _keys(docname)
+	if not frappe.cache.execute_command("EXISTS", meta_key):
+		frappe.throw(_("No count session is running for {0}").format(docname))
+	frappe.has_permission("Stock Reconciliation", "write", docname, throw=True)
+
+	qty = 1 if qty in (None, "") else flt(qty)
+	if qty < 0:
+		return {"error": _("Counted quantity cannot be negative")}
+
+	ctx = frappe.db.get_value("Stock Reconciliation", docname, ["company", "set_warehouse"], as_dict=True)
+	result = resolve_scan(raw_value, ctx)
+
+	if result.get("error") or result.get("gtin_not_found"):
+		return {"error": result.get("error") or _("Cannot find Item with this Barcode")}
+	if result.get("warehouse") and not result.get("item_code"):
+		# Warehouse labels switch the session's warehouse, not the document's
+		frappe.cache.execute_command("HSET", meta_key, "warehouse", result["warehouse"])
+		return {"warehouse": result["warehouse"]}
+	if result.get("serial_no"):
+		return {"error": _("Serial numbers cannot be counted in a count session")}
+	if not result.get("item_code"):
+		return {"error": _("Cannot find Item with this Barcode")}
+
+	warehouse = (
+		warehouse
+		or frappe.safe_decode(frappe.cache.execute_command("HGET", meta_key, "warehouse"))
+		or ctx.set_warehouse
+	)
+	if not warehouse:
+		return {"error": _("Scan or set a warehouse before counting")}
+
+	field = json.dumps([result["item_code"], result.get("batch_no"), warehouse, condition or None])
+	pipe = frappe.cache.pipeline()
+	# A zero still creates the field, so the item is counted at 0
+	pipe.hincrbyfloat(qty_key, field, qty)
+	pipe.hincrbyfloat(meta_key, "scans", 1)
+	pipe.hlen(qty_key)
+	pipe.expire(qty_key, COUNT_SESSION_TTL)
+	pipe.expire(meta_key, COUNT_SESSION_TTL)
+	counted, scans, rows, *_expired = pipe.execute()
+
+	return {
+		"item_code": result["item_code"],
+		"batch_no": result.get("batch_no"),
+		"warehouse": warehouse,
+		"condition": condition,
+		"counted": flt(counted),
+		"scans": flt(scans),
+		"rows": rows,
+		"expiry_warning": result.get("expiry_warning"),
+	}
+
+
+@frappe.whitelist(methods=["POST"])
+def materialize_count_session(docname: str) -> dict:
+	"""
+	Write the session aggregate into the Stock Reconciliation and end the session.
+
+	Counted quantities are added to existing rows with the same item, batch,
+	warehouse and condition; other keys become new rows. The document is saved
+	once. Scans that arrive while this runs are kept for the next session.
+
+	Returns:
+		dict: Number of rows updated and added
+	"""
+	validate_count_target(docname)
+
+	qty_key, meta_key = _keys(docname)
+	work_key = frappe.cache.make_key(COUNT_MATERIALIZE_KEY.format(docname))
+	try:
+		# Take the aggregate out of reach of concurrent scans in one step
+		frappe.cache.execute_command("RENAME", qty_key, work_key)
+	except Exception:
+		frappe.throw(_("There are no counted items to add"))
+
+	aggregate = frappe.cache.execute_command("HGETALL", work_key) or {}
+	try:
+		updated, added = apply_counts(docname, aggregate)
+	except Exception:
+		# Put the counts back so nothing is lost
+		pipe = frappe.cache.pipeline()
+		for field, counted in aggregate.items():
+			pipe.hincrbyfloat(qty_key, field, flt(frappe.safe_decode(counted)))
+		pipe.delete(work_key)
+		pipe.execute()
+		raise
+
+	pipe = frappe.cache.pipeline()
+	pipe.delete(work_key)
+	# Keep the session if someone scanned while it was materialized
+	if not frappe.cache.execute_command("EXISTS", qty_key):
+		pipe.delete(meta_key)
+	pipe.execute()
+
+	return {"updated": updated, "added": added}
+
+
+def apply_counts(docname, aggregate):
+	"""Add aggregated counts to the document rows and save it once."""
+	doc = frappe.get_doc("Stock Reconciliation", docname)
+	has_condition = frappe.get_meta("Stock Reconciliation Item").has_field("custom_condition")
+
+	existing = {}
+	for row in doc.items:
+		key = (row.item_code, row.batch_no or None, row.warehouse, (row.get("custom_condition") or None))
+		existing.setdefault(key, row)
+
+	updated = added = 0
+	for field, counted in sorted(aggregate.items()):
+		item_code, batch_no, warehouse, condition = json.loads(frappe.safe_decode(field))
+		counted = flt(frappe.safe_decode(counted))
+		if not has_condition:
+			condition = None
+
+		row = existing.get((item_code, batch_no, warehouse, condition))
+		if row:
+			row.qty = flt(row.qty) + counted
+			updated += 1
+			continue
+
+		row_data = {
+			"item_code": item_code,
+			"warehouse": warehouse,
+			"qty": counted,
+			"batch_no": batch_no,
+			"use_serial_batch_fields": 1 if batch_no else 0,
+		}
+		if condition:
+			row_data["custom_condition"] = condition
+		existing[(item_code, batch_no, warehouse, condition)] = doc.append("items", row_data)
+		added += 1
+
+	doc.save()
+	return updated, added
+
+
+@frappe.whitelist(methods=["POST"])
+def discard_count_session(docname: str) -> None:
+	"""Drop a count session without touching the document."""
+	frappe.has_permission("Stock Reconciliation", "write", docname, throw=True)
+	qty_key, meta_key = _keys(docname)
+	frappe.cache.execute_command("DEL", qty_key, meta_key)
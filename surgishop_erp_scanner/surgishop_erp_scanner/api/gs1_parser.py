@@ -4,6 +4,117 @@
 import frappe
 from frappe import _
 from datetime import datetime
+import json
+import re
+
+from surgishop_erp_scanner.surgishop_erp_scanner.item_flags import get_item_flags
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_idempotency import idempotent_scan_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_journal import describe_gs1_scan, journal_scan_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_metrics import (
+	log_scan,
+	log_scan_error,
+	log_scan_warning,
+	scan_stage,
+	scan_timer,
+)
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_profiler import profile_scanner_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_rate_limit import rate_limited_scan_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_replica import (
+	read_from_replica,
+	replica_exists,
+	replica_get_value,
+)
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_side_effects import (
+	queue_error_log,
+	queue_expiry_backfill,
+	queue_expiry_mismatch,
+)
+from surgishop_erp_scanner.surgishop_erp_scanner.scanner_cache import get_barcode_item, record_scan
+
+
+# GS1 Application Identifiers understood by the parser, mirroring
+# surgishop.GS1_AI_DEFINITIONS in public/js/gs1-utils.js: (name, fixed length or None)
+GS1_AI_DEFINITIONS = {
+	"01": ("gtin", 14),
+	"10": ("lot", None),
+	"11": ("prod_date", 6),
+	"15": ("best_before", 6),
+	"17": ("expiry", 6),
+	"21": ("serial", None),
+	"30": ("count", None),
+	"310": ("net_weight_kg", 6),
+	"37": ("quantity", None),
+}
+
+# FNC1 group separator some scanners emit after variable length fields
+GS1_GROUP_SEPARATOR = "\x1d"
+
+# AIM symbology identifiers prefixed by scanners configured to transmit them
+GS1_SYMBOLOGY_PREFIX = re.compile(r"^\](C1|e0|d2|Q3)")
+
+# Lets a batch insert that lost a race be undone without the rest of the request
+BATCH_INSERT_SAVEPOINT = "surgishop_gs1_batch_insert"
+
+
+def parse_gs1_string(gs1_string):
+	"""
+	Parse a raw GS1 string into its Application Identifiers.
+
+	Server-side twin of `surgishop.GS1Parser.parse`: variable length fields run
+	until the next recognised AI or the end of the string. A group separator,
+	when the scanner sends one, also ends a variable length field.
+
+	Args:
+		gs1_string (str): Raw scanned string
+
+	Returns:
+		dict | None: Values keyed by AI name (gtin, lot, expiry, ...) or None
+		             if the string is not a GS1 barcode
+	"""
+	if not gs1_string or not isinstance(gs1_string, str):
+		return None
+
+	data = GS1_SYMBOLOGY_PREFIX.sub("", gs1_string.strip())
+	result = {}
+	pos = 0
+
+	while pos < len(data):
+		if data[pos] == GS1_GROUP_SEPARATOR:
+			pos += 1
+			continue
+
+		if data[pos:pos + 3] in GS1_AI_DEFINITIONS:
+			ai = data[pos:pos + 3]
+		elif data[pos:pos + 2] in GS1_AI_DEFINITIONS:
+			ai = data[pos:pos + 2]
+		else:
+			return None
+
+		name, length = GS1_AI_DEFINITIONS[ai]
+		pos += len(ai)
+
+		if length:
+			if pos + length > len(data):
+				return None
+			result[name] = data[pos:pos + length]
+			pos += length
+			continue
+
+		# Variable length: read until the next AI, a separator or the end
+		end = len(data)
+		for i in range(pos + 1, len(data)):
+			if (
+				data[i] == GS1_GROUP_SEPARATOR
+				or data[i:i + 3] in GS1_AI_DEFINITIONS
+				or (data[i:i + 2] in GS1_AI_DEFINITIONS and data[i:i + 2] != "01")
+			):
+				end = i
+				break
+
+		result[name] = data[pos:end]
+		pos = end
+
+	return result or None
 
 
 def get_scanner_settings():
@@ -35,6 +146,10 @@ def format_batch_id(item_code, lot, naming_format=None):
 
 
 @frappe.whitelist()
+@rate_limited_scan_call
+@idempotent_scan_call("parse_gs1_and_get_batch")
+@journal_scan_call("parse_gs1_and_get_batch", describe_gs1_scan)
+@profile_scanner_call("parse_gs1_and_get_batch")
 def parse_gs1_and_get_batch(gtin, expiry, lot, item_code=None):
 	"""
 	API endpoint to find an item by GTIN, and then find or create a batch for it
@@ -48,8 +163,110 @@ def parse_gs1_and_get_batch(gtin, expiry, lot, item_code=None):
 
 	Returns:
 		dict: Contains found_item, batch, gtin, expiry, lot, batch_expiry_date
+		      (plus expiry_warning when the scanned expiry differs from the batch)
 		      or error information if the operation fails
 	"""
+	with scan_timer("parse_gs1_and_get_batch"):
+		return _parse_gs1_and_get_batch(gtin, expiry, lot, item_code)
+
+
+@frappe.whitelist(methods=["POST"])
+@rate_limited_scan_call
+@idempotent_scan_call("parse_gs1_batches")
+@profile_scanner_call("parse_gs1_batches")
+def parse_gs1_batches(entries, item_code=None):
+	"""
+	API endpoint resolving many parsed GS1 strings in one request, e.g. a pasted
+	list of lot labels in the serial/batch selector.
+
+	Args:
+		entries (list[dict] | str): Parsed GS1 data (gtin, lot, expiry), as JSON or list
+		item_code (str): Optional item code every GTIN must belong to
+
+	Returns:
+		list[dict]: One `parse_gs1_and_get_batch` style result per entry; entries
+		            that could not be resolved carry an error
+	"""
+	if isinstance(entries, str):
+		entries = json.loads(entries)
+
+	with scan_timer("parse_gs1_batches"):
+		return get_batches_for_gs1(entries or [], item_code)
+
+
+@frappe.whitelist(methods=["POST"])
+@idempotent_scan_call("create_item_from_gs1")
+def create_item_from_gs1(item_name, gtin, lot=None, expiry=None):
+	"""
+	API endpoint for the unknown-GTIN dialog: create a batch tracked Item with
+	the GS1 barcode and, when a lot was scanned, its batch - all in the request
+	transaction, so a failure leaves nothing behind.
+
+	Governed by the `prompt_create_item_on_unknown_gtin` and `create_item_inline`
+	settings. The item group and UOM come from Stock Settings.
+
+	Args:
+		item_name (str): Name (and code) of the new item
+		gtin (str): The scanned GTIN
+		lot (str): Optional lot number from the scan
+		expiry (str): Optional expiry date in YYMMDD format
+
+	Returns:
+		dict: Scan-ready result (item_code, batch_no, batch_expiry_date plus the
+		      `parse_gs1_and_get_batch` keys) to add the scan to the document
+	"""
+	settings = get_scanner_settings()
+	if settings.get("prompt_create_item_on_unknown_gtin") == 0 or settings.get("create_item_inline") == 0:
+		frappe.throw(_("Creating items from scans is disabled in SurgiShop Settings"))
+
+	item_name = str(item_name or "").strip()
+	gtin = str(gtin or "").strip()
+	if not item_name or not gtin:
+		frappe.throw(_("Item Name and GTIN are required."))
+
+	existing_item = frappe.db.get_value("Item Barcode", {"barcode": gtin}, "parent")
+	if existing_item:
+		frappe.throw(_("GTIN {0} is already assigned to Item {1}").format(gtin, existing_item))
+
+	item = frappe.get_doc({
+		"doctype": "Item",
+		"item_code": item_name,
+		"item_name": item_name,
+		"item_group": frappe.db.get_single_value("Stock Settings", "item_group") or "Products",
+		"stock_uom": frappe.db.get_single_value("Stock Settings", "stock_uom") or "Nos",
+		"is_stock_item": 1,
+		"has_batch_no": 1,
+		"create_new_batch": 1,
+		"has_expiry_date": 1,
+		"barcodes": [{"barcode": gtin, "barcode_type": "GS1"}],
+	})
+	item.insert()
+
+	result = {
+		"found_item": item.name,
+		"item_code": item.name,
+		"item_name": item.item_name,
+		"uom": item.stock_uom,
+		"has_batch_no": 1,
+		"has_serial_no": 0,
+		"gtin": gtin,
+		"lot": lot,
+		"expiry": expiry,
+	}
+	if not lot:
+		return result
+
+	batch_result = _parse_gs1_and_get_batch(gtin, expiry, lot, item.name)
+	if batch_result.get("error"):
+		# Roll the item back with the batch
+		frappe.throw(batch_result["error"])
+
+	result.update(batch_result)
+	result["batch_no"] = batch_result["batch"]
+	return result
+
+
+def _parse_gs1_and_get_batch(gtin, expiry, lot, item_code=None):
 	try:
 		# Validate required parameters
 		if not gtin or not lot:
@@ -63,187 +280,79 @@ def parse_gs1_and_get_batch(gtin, expiry, lot, item_code=None):
 		# Get settings early - needed for various checks throughout
 		settings = get_scanner_settings()
 
-		frappe.logger().info(
-			f"🏥 SurgiShop ERP Scanner: Processing GS1 - GTIN: {gtin}, Lot: {lot}, Expiry: {expiry}"
-		)
-
-		# 1) Validate GTIN and get item_code from barcode
-		if item_code:
-			# Check if barcode exists for this specific item
-			barcode_exists = frappe.db.exists("Item Barcode", {
-				"barcode": gtin,
-				"parent": item_code
-			})
-			if not barcode_exists:
-				frappe.logger().info(
-					f"🏥 SurgiShop ERP Scanner: GTIN {gtin} not found for item {item_code}"
-				)
-				frappe.throw(_("Scanned GTIN not found for the provided item code"))
-			item_info = {"name": item_code}
-			frappe.logger().info(
-				f"🏥 SurgiShop ERP Scanner: GTIN {gtin} validated for item {item_code}"
-			)
-		else:
-			item_info = frappe.db.get_value(
-				"Item Barcode",
-				{"barcode": gtin},
-				["parent as name"],
-				as_dict=True
-			) or {}
-			if not item_info:
-				# Check if we should prompt to create item
-				# Only skip the prompt if explicitly set to 0/False
-				# Default behavior (None, 1, True, or any truthy value) = show prompt
-				prompt_create = settings.get("prompt_create_item_on_unknown_gtin")
-				if prompt_create == 0:
-					# Explicitly disabled - throw error
-					frappe.throw(_("No item found for GTIN: {0}. Please add this barcode to the correct Item.").format(gtin))
-				else:
-					# Default behavior or enabled - return gtin_not_found for dialog
-					frappe.logger().info(
-						f"🏥 SurgiShop ERP Scanner: GTIN {gtin} not found, returning gtin_not_found response"
-					)
-					return {
-						"gtin_not_found": True,
-						"gtin": gtin,
-						"lot": lot,
-						"expiry": expiry
-					}
-
-		# Proceed without the mismatch check, as we've validated above
-		item_code = item_info.get("name")
-
-		# 2) Verify item exists and is active
-		item_info = frappe.db.get_value(
-			"Item",
-			item_code,
-			["name", "has_batch_no", "disabled"],
-			as_dict=True
-		)
-
-		if not item_info:
-			error_msg = f"Item {item_code} not found in system"
-			frappe.logger().error(f"🏥 SurgiShop ERP Scanner: {error_msg}")
-			frappe.throw(_(error_msg))
-
-		if item_info.get("disabled"):
-			frappe.logger().warning(
-				f"🏥 SurgiShop ERP Scanner: Item {item_code} is disabled"
+		log_scan("Processing GS1 - GTIN: %s, Lot: %s, Expiry: %s", gtin, lot, expiry)
+
+		# Lookups run on the read replica when configured; anything not found
+		# there is checked again on the primary before it is treated as missing
+		with scan_stage("lookup"):
+			# 1) Validate GTIN and get item_code from barcode
+			if item_code:
+				# Check if barcode exists for this specific item
+				barcode_exists = replica_exists("Item Barcode", {
+					"barcode": gtin,
+					"parent": item_code
+				})
+				if not barcode_exists:
+					log_scan("GTIN %s not found for item %s", gtin, item_code)
+					frappe.throw(_("Scanned GTIN not found for the provided item code"))
+				item_info = {"name": item_code}
+				log_scan("GTIN %s validated for item %s", gtin, item_code)
+			else:
+				barcode_data = read_from_replica(get_barcode_item, gtin)
+				item_info = {"name": barcode_data.item_code} if barcode_data else {}
+				if not item_info:
+					# Check if we should prompt to create item
+					# Only skip the prompt if explicitly set to 0/False
+					# Default behavior (None, 1, True, or any truthy value) = show prompt
+					prompt_create = settings.get("prompt_create_item_on_unknown_gtin")
+					if prompt_create == 0:
+						# Explicitly disabled - throw error
+						frappe.throw(_("No item found for GTIN: {0}. Please add this barcode to the correct Item.").format(gtin))
+					else:
+						# Default behavior or enabled - return gtin_not_found for dialog
+						log_scan("GTIN %s not found, returning gtin_not_found response", gtin)
+						return {
+							"gtin_not_found": True,
+							"gtin": gtin,
+							"lot": lot,
+							"expiry": expiry
+						}
+
+			# Proceed without the mismatch check, as we've validated above
+			item_code = item_info.get("name")
+			record_scan(gtin)
+
+			# 2) Verify item exists and is active
+			validate_batch_item(item_code, get_item_flags(item_code, ["name", "has_batch_no", "disabled"]))
+
+			# 3) Form the batch_id based on naming format
+			batch_id = format_batch_id(item_code, lot)
+			log_scan(
+				"Looking for batch_id: %s (format: %s)",
+				batch_id,
+				settings.get("batch_naming_format", "{item}-{lot}"),
 			)
-			frappe.throw(_("Item {0} is disabled").format(item_code))
 
-		if not item_info.get("has_batch_no"):
-			frappe.logger().warning(
-				f"🏥 SurgiShop ERP Scanner: Item {item_code} does not use batches"
-			)
-			frappe.throw(_("Item {0} does not use batch numbers").format(item_code))
-
-		# 3) Form the batch_id based on naming format
-		batch_id = format_batch_id(item_code, lot)
-		frappe.logger().info(
-			f"🏥 SurgiShop ERP Scanner: Looking for batch_id: {batch_id} (format: {settings.get('batch_naming_format', '{item}-{lot}')})"
-		)
-
-		# 4) Check if the batch already exists by "batch_id"
-		batch_name = frappe.db.exists("Batch", {"batch_id": batch_id})
-		batch_doc = None
+			# 4) Check if the batch already exists by "batch_id"
+			batch_name = replica_exists("Batch", {"batch_id": batch_id})
+			expiry_warning = None
 
 		if not batch_name:
-			# Check if auto-create is enabled
-			if not settings.get("auto_create_batches", 1):
-				frappe.throw(
-					_("Batch {0} does not exist and auto-create is disabled").format(batch_id)
-				)
-
-			frappe.logger().info(
-				f"🏥 SurgiShop ERP Scanner: Creating new batch: {batch_id}"
-			)
-
-			# Create new batch
-			new_batch = frappe.get_doc({
-				"doctype": "Batch",
-				"item": item_code,
-				"batch_id": batch_id
-			})
-
-			# Parse and set expiry date if provided
-			if expiry and len(expiry) == 6:
-				try:
-					# Attempt to parse YYMMDD format
-					expiry_date_obj = datetime.strptime(expiry, '%y%m%d')
-					new_batch.expiry_date = expiry_date_obj.strftime('%Y-%m-%d')
-					frappe.logger().info(
-						f"🏥 SurgiShop ERP Scanner: Parsed expiry date: {new_batch.expiry_date}"
-					)
-				except ValueError as ve:
-					# Log warning but continue without expiry date
-					frappe.logger().warning(
-						f"🏥 SurgiShop ERP Scanner: Could not parse expiry date '{expiry}': {str(ve)}"
-					)
-					frappe.log_error(
-						title="GS1 Expiry Date Parse Error",
-						message=f"Could not parse expiry date: {expiry}\nError: {str(ve)}\nBatch will be created without expiry date."
-					)
-			elif expiry:
-				frappe.logger().warning(
-					f"🏥 SurgiShop ERP Scanner: Invalid expiry format (expected 6 digits): {expiry}"
-				)
-
-			# Insert batch with permission bypass
-			new_batch.insert(ignore_permissions=True)
-			batch_doc = new_batch
-			frappe.logger().info(
-				f"🏥 SurgiShop ERP Scanner: Successfully created batch: {batch_doc.name}"
-			)
+			log_scan("Creating new batch: %s", batch_id)
+			with scan_stage("batch_create"):
+				batch_doc, created = create_gs1_batch(item_code, batch_id, expiry, settings)
+			if not created:
+				# Another scan created it first: treat it as an existing batch
+				with scan_stage("batch_update"):
+					expiry_warning = apply_scanned_expiry(batch_doc, expiry, settings)
 		else:
-			# Batch already exists, retrieve it
-			batch_doc = frappe.get_doc("Batch", batch_name)
-			frappe.logger().info(
-				f"🏥 SurgiShop ERP Scanner: Found existing batch: {batch_doc.name}"
-			)
-
-			# Check if we need to update the expiry date
-			# Only update if setting is enabled, batch doesn't have expiry, and we have one from scan
-			update_missing_expiry = settings.get("update_missing_expiry", 1)
-			if update_missing_expiry and not batch_doc.expiry_date and expiry and len(expiry) == 6:
-				try:
-					# Parse the new expiry date from GS1 scan
-					expiry_date_obj = datetime.strptime(expiry, '%y%m%d')
-					new_expiry_date = expiry_date_obj.strftime('%Y-%m-%d')
-
-					# Update the batch with the new expiry date
-					batch_doc.expiry_date = new_expiry_date
-					batch_doc.save(ignore_permissions=True)
-					frappe.logger().info(
-						f"🏥 SurgiShop ERP Scanner: Updated existing batch {batch_doc.name} with expiry date: {new_expiry_date}"
-					)
-				except ValueError as ve:
-					frappe.logger().warning(
-						f"🏥 SurgiShop ERP Scanner: Could not parse expiry date '{expiry}' for existing batch: {str(ve)}"
-					)
-			elif batch_doc.expiry_date and expiry:
-				# Check for expiry mismatch warning
-				warn_on_mismatch = settings.get("warn_on_expiry_mismatch", 1)
-				if warn_on_mismatch and len(expiry) == 6:
-					try:
-						scanned_expiry = datetime.strptime(expiry, '%y%m%d').strftime('%Y-%m-%d')
-						if str(batch_doc.expiry_date) != scanned_expiry:
-							frappe.logger().warning(
-								f"🏥 SurgiShop ERP Scanner: Expiry mismatch! Batch has {batch_doc.expiry_date}, scanned {scanned_expiry}"
-							)
-							# Add warning to response (will be shown to user)
-							frappe.msgprint(
-								_("Warning: Scanned expiry ({0}) differs from batch expiry ({1})").format(
-									scanned_expiry, batch_doc.expiry_date
-								),
-								indicator="orange",
-								alert=True
-							)
-					except ValueError:
-						pass
-				frappe.logger().info(
-					f"🏥 SurgiShop ERP Scanner: Batch {batch_doc.name} already has expiry date: {batch_doc.expiry_date}"
+			with scan_stage("batch_update"):
+				# Batch already exists - only read what the response needs
+				batch_doc = replica_get_value(
+					"Batch", batch_name, ["name", "expiry_date"], as_dict=True
 				)
+				log_scan("Found existing batch: %s", batch_doc.name)
+				expiry_warning = apply_scanned_expiry(batch_doc, expiry, settings)
 
 		# 5) Return found_item, final batch name, and batch_expiry_date
 		result = {
@@ -254,11 +363,11 @@ def parse_gs1_and_get_batch(gtin, expiry, lot, item_code=None):
 			"lot": lot,
 			"batch_expiry_date": batch_doc.expiry_date if batch_doc.expiry_date else None
 		}
+		if expiry_warning:
+			result["expiry_warning"] = expiry_warning
 
-		frappe.logger().info(
-			f"🏥 SurgiShop ERP Scanner: GS1 parsing successful: {result}"
-		)
-		frappe.response["message"] = result
+		log_scan("GS1 parsing successful: %s", result)
+		return result
 
 	except frappe.ValidationError:
 		# Re-raise validation errors to show to user
@@ -266,15 +375,258 @@ def parse_gs1_and_get_batch(gtin, expiry, lot, item_code=None):
 	except Exception as e:
 		# Log unexpected errors with full traceback
 		error_msg = f"Unexpected error processing GS1 barcode: {str(e)}"
-		frappe.logger().error(f"🏥 SurgiShop ERP Scanner: {error_msg}")
-		frappe.log_error(
+		log_scan_error("%s", error_msg)
+		queue_error_log(
 			title="GS1 Parser Unexpected Error",
 			message=frappe.get_traceback()
 		)
-		frappe.response["message"] = {
+		# Don't throw here - return error in response instead
+		return {
 			"found_item": None,
 			"error": error_msg,
 			"gtin": gtin
 		}
-		# Don't throw here - return error in response instead
 
+
+def parse_gs1_expiry(expiry):
+	"""Convert a YYMMDD GS1 expiry to YYYY-MM-DD, or None when missing or invalid."""
+	if not expiry or len(expiry) != 6:
+		return None
+	try:
+		return datetime.strptime(expiry, "%y%m%d").strftime("%Y-%m-%d")
+	except ValueError:
+		return None
+
+
+def validate_batch_item(item_code, item_info):
+	"""
+	Throw unless a scanned lot's item exists, is enabled and uses batches.
+
+	Args:
+		item_code (str): Item the GTIN resolved to
+		item_info (dict): The item's name, has_batch_no and disabled, or None
+	"""
+	if not item_info:
+		log_scan_error("Item %s not found in system", item_code)
+		frappe.throw(_("Item {0} not found in system").format(item_code))
+
+	if item_info.get("disabled"):
+		log_scan_warning("Item %s is disabled", item_code)
+		frappe.throw(_("Item {0} is disabled").format(item_code))
+
+	if not item_info.get("has_batch_no"):
+		log_scan_warning("Item %s does not use batches", item_code)
+		frappe.throw(_("Item {0} does not use batch numbers").format(item_code))
+
+
+def create_gs1_batch(item_code, batch_id, expiry, settings):
+	"""
+	Create the batch of a scanned lot with the scanned expiry.
+
+	Args:
+		item_code (str): Batch item
+		batch_id (str): Batch ID formed with `format_batch_id`
+		expiry (str): Scanned expiry in YYMMDD format
+		settings (dict): Scanner settings
+
+	Returns:
+		tuple[frappe._dict, bool]: The batch's name and expiry_date, and whether
+		                           it was created here; False when a concurrent
+		                           scan inserted it first
+	"""
+	if not settings.get("auto_create_batches", 1):
+		frappe.throw(_("Batch {0} does not exist and auto-create is disabled").format(batch_id))
+
+	expiry_date = parse_gs1_expiry(expiry)
+	if expiry and not expiry_date:
+		# Create the batch anyway, without an expiry
+		log_scan_warning("Could not parse expiry date '%s'", expiry)
+		queue_error_log(
+			title="GS1 Expiry Date Parse Error",
+			message=f"Could not parse expiry date: {expiry}\nBatch {batch_id} will be created without expiry date.",
+		)
+
+	new_batch = frappe.get_doc({
+		"doctype": "Batch",
+		"item": item_code,
+		"batch_id": batch_id,
+		"expiry_date": expiry_date,
+	})
+
+	frappe.db.savepoint(BATCH_INSERT_SAVEPOINT)
+	try:
+		new_batch.insert(ignore_permissions=True)
+	except frappe.DuplicateEntryError:
+		frappe.db.rollback(save_point=BATCH_INSERT_SAVEPOINT)
+		existing = frappe.db.get_value("Batch", {"batch_id": batch_id}, ["name", "expiry_date"], as_dict=True)
+		if not existing:
+			raise
+		log_scan("Batch %s was created by a concurrent scan", existing.name)
+		return existing, False
+
+	log_scan("Successfully created batch: %s", new_batch.name)
+	return frappe._dict(name=new_batch.name, expiry_date=new_batch.expiry_date), True
+
+
+def apply_scanned_expiry(batch, expiry, settings):
+	"""
+	Compare a scanned expiry with an existing batch: backfill a missing batch
+	expiry, or warn when they differ.
+
+	Args:
+		batch (frappe._dict): The batch's name and expiry_date; expiry_date is
+		                      set to the backfilled date
+		expiry (str): Scanned expiry in YYMMDD format
+		settings (dict): Scanner settings
+
+	Returns:
+		str | None: Warning for the user when the expiries differ
+	"""
+	scanned_expiry = parse_gs1_expiry(expiry)
+	if not scanned_expiry:
+		if expiry:
+			log_scan_warning("Could not parse expiry date '%s' for existing batch %s", expiry, batch.name)
+		return None
+
+	if not batch.expiry_date:
+		if settings.get("update_missing_expiry", 1):
+			# Backfill the batch in the background; respond with the new date
+			batch.expiry_date = scanned_expiry
+			queue_expiry_backfill(batch.name, scanned_expiry)
+			log_scan("Queued expiry backfill for existing batch %s: %s", batch.name, scanned_expiry)
+		return None
+
+	if str(batch.expiry_date) == scanned_expiry or not settings.get("warn_on_expiry_mismatch", 1):
+		log_scan("Batch %s already has expiry date: %s", batch.name, batch.expiry_date)
+		return None
+
+	log_scan_warning("Expiry mismatch! Batch has %s, scanned %s", batch.expiry_date, scanned_expiry)
+	queue_expiry_mismatch(batch.name, batch.expiry_date, scanned_expiry)
+	return _("Warning: Scanned expiry ({0}) differs from batch expiry ({1})").format(
+		scanned_expiry, batch.expiry_date
+	)
+
+
+def get_batches_for_gs1(entries, item_code=None):
+	"""
+	Bulk version of `parse_gs1_and_get_batch` for many GS1 strings at once.
+
+	Applies the same rules (naming format, auto-create, expiry backfill and
+	mismatch warnings) with one query per lookup instead of one per string.
+	Entries are handled in order, so each batch is created or backfilled once
+	and later entries see its expiry.
+
+	Args:
+		entries (list[dict]): Parsed GS1 data with gtin, lot and optional expiry
+		item_code (str): Optional item code every GTIN must belong to
+
+	Returns:
+		list[dict]: One result per entry, shaped like `parse_gs1_and_get_batch`
+		            results; unresolved entries have found_item None and an error
+	"""
+	settings = get_scanner_settings()
+	naming_format = settings.get("batch_naming_format") or "{item}-{lot}"
+
+	entries = [
+		{
+			"gtin": str(entry.get("gtin") or "").strip(),
+			"lot": str(entry.get("lot") or "").strip(),
+			"expiry": str(entry.get("expiry") or "").strip(),
+		}
+		for entry in entries
+	]
+
+	# 1) GTIN -> item, one query for all GTINs
+	gtin_items = {}
+	gtins = list({entry["gtin"] for entry in entries if entry["gtin"]})
+	if gtins:
+		barcode_filters = {"barcode": ["in", gtins]}
+		if item_code:
+			barcode_filters["parent"] = item_code
+		for row in frappe.get_all("Item Barcode", filters=barcode_filters, fields=["barcode", "parent"]):
+			gtin_items.setdefault(row.barcode, row.parent)
+
+	items = {}
+	if gtin_items:
+		items = {
+			row.name: row
+			for row in frappe.get_all(
+				"Item",
+				filters={"name": ["in", list(set(gtin_items.values()))]},
+				fields=["name", "has_batch_no", "disabled"],
+			)
+		}
+
+	# 2) Validate each entry and form its batch_id
+	results = []
+	for entry in entries:
+		result = {
+			"found_item": None,
+			"gtin": entry["gtin"],
+			"expiry": entry["expiry"],
+			"lot": entry["lot"],
+		}
+		results.append(result)
+
+		if not entry["gtin"] or not entry["lot"]:
+			result["error"] = _("GTIN and Lot Number are required.")
+			continue
+
+		entry_item = gtin_items.get(entry["gtin"])
+		if not entry_item:
+			if item_code:
+				result["error"] = _("Scanned GTIN not found for the provided item code")
+			else:
+				result["gtin_not_found"] = True
+				result["error"] = _("No item found for GTIN: {0}").format(entry["gtin"])
+			continue
+
+		try:
+			validate_batch_item(entry_item, items.get(entry_item))
+		except frappe.ValidationError as e:
+			result["error"] = str(e)
+			continue
+
+		result["found_item"] = entry_item
+		result["batch_id"] = format_batch_id(entry_item, entry["lot"], naming_format)
+
+	# 3) Existing batches, one query for all batch_ids
+	batch_ids = list({result["batch_id"] for result in results if result.get("batch_id")})
+	batches = {}
+	if batch_ids:
+		batches = {
+			row.batch_id: row
+			for row in frappe.get_all(
+				"Batch",
+				filters={"batch_id": ["in", batch_ids]},
+				fields=["name", "batch_id", "expiry_date"],
+			)
+		}
+
+	# 4) Create, backfill or compare each batch
+	for result in results:
+		batch_id = result.pop("batch_id", None)
+		if not batch_id:
+			continue
+
+		batch = batches.get(batch_id)
+		expiry_warning = None
+		try:
+			if batch:
+				expiry_warning = apply_scanned_expiry(batch, result["expiry"], settings)
+			else:
+				batch, created = create_gs1_batch(result["found_item"], batch_id, result["expiry"], settings)
+				batches[batch_id] = batch
+				if not created:
+					expiry_warning = apply_scanned_expiry(batch, result["expiry"], settings)
+		except frappe.ValidationError as e:
+			result["found_item"] = None
+			result["error"] = str(e)
+			continue
+
+		if expiry_warning:
+			result["expiry_warning"] = expiry_warning
+		result["batch"] = batch.name
+		result["batch_expiry_date"] = batch.expiry_date or None
+
+	return results
@@ -0,0 +1,151 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Headless scan ingestion for fixed-mount and conveyor scanners.
+
+Devices post raw scans for a draft document. Scans are buffered in Redis and
+resolved in chunks by a background job, which pushes the resolved rows to the
+open form over realtime; `CustomBarcodeScanner` applies them like desk scans.
+"""
+
+import json
+
+import frappe
+from frappe import _
+
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_idempotency import idempotent_scan_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_rate_limit import rate_limited_scan_call
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_resolver import (
+	SCANNER_DOCTYPES,
+	get_document_scan_context,
+	resolve_scans,
+)
+
+INGEST_BUFFER_KEY = "surgishop_scanner:ingest:{0}:{1}"
+INGEST_PENDING_KEY = "surgishop_scanner:ingest_pending"
+
+# Realtime event the desk scanner listens to
+INGEST_REALTIME_EVENT = "surgishop_scanner_rows"
+
+# Scans resolved (and pushed) per chunk
+INGEST_CHUNK_SIZE = 50
+
+# Maximum buffered scans per document before devices are told to back off
+INGEST_MAX_BUFFERED = 5000
+
+
+@frappe.whitelist(methods=["POST"])
+@rate_limited_scan_call
+@idempotent_scan_call("ingest_scans")
+def ingest_scans(doctype: str, docname: str, scans: list | str, device_id: str | None = None) -> dict:
+	"""
+	Buffer raw scans for an open draft document.
+
+	Args:
+		doctype (str): One of the scanner doctypes
+		docname (str): Saved draft document the scans belong to
+		scans (list[str]): Raw scanned strings, in scan order
+		device_id (str): Optional device tag, passed through to the form
+
+	Returns:
+		dict: Number of scans queued and buffered
+	"""
+	if isinstance(scans, str):
+		scans = json.loads(scans)
+
+	validate_ingest_target(doctype, docname)
+
+	values = [str(value).strip() for value in scans or [] if str(value or "").strip()]
+	if not values:
+		return {"queued": 0}
+
+	key = frappe.cache.make_key(INGEST_BUFFER_KEY.format(doctype, docname))
+	if (frappe.cache.execute_command("LLEN", key) or 0) + len(values) > INGEST_MAX_BUFFERED:
+		frappe.throw(
+			_("Too many unprocessed scans for {0} {1}. Please slow down.").format(doctype, docname),
+			title=_("Scan Buffer Full"),
+		)
+
+	pipe = frappe.cache.pipeline()
+	pipe.rpush(key, *(json.dumps({"value": value, "device": device_id}) for value in values))
+	pipe.sadd(frappe.cache.make_key(INGEST_PENDING_KEY), json.dumps([doctype, docname]))
+	buffered = pipe.execute()[0]
+
+	enqueue_ingest_processing(doctype, docname)
+	return {"queued": len(values), "buffered": buffered}
+
+
+def validate_ingest_target(doctype, docname):
+	"""Check the target is a draft scanner document the user may write to."""
+	if doctype not in SCANNER_DOCTYPES:
+		frappe.throw(_("Scanning into {0} is not supported").format(doctype))
+
+	docstatus = frappe.db.get_value(doctype, docname, "docstatus")
+	if docstatus is None:
+		frappe.throw(_("{0} {1} not found").format(doctype, docname), frappe.DoesNotExistError)
+	if docstatus != 0:
+		frappe.throw(_("{0} {1} is not a draft").format(doctype, docname))
+
+	frappe.has_permission(doctype, "write", docname, throw=True)
+
+
+def enqueue_ingest_processing(doctype, docname):
+	frappe.enqueue(
+		"surgishop_erp_scanner.surgishop_erp_scanner.api.ingest.process_ingest_buffer",
+		queue="short",
+		job_id=f"surgishop_ingest:{doctype}:{docname}",
+		deduplicate=True,
+		doctype=doctype,
+		docname=docname,
+	)
+
+
+def process_ingest_buffer(doctype, docname):
+	"""Background job: resolve buffered scans chunk by chunk and push them to the form."""
+	key = frappe.cache.make_key(INGEST_BUFFER_KEY.format(doctype, docname))
+	pending_key = frappe.cache.make_key(INGEST_PENDING_KEY)
+	pending_member = json.dumps([doctype, docname])
+	ctx = get_document_scan_context(doctype, docname)
+
+	while True:
+		pipe = frappe.cache.pipeline()
+		pipe.lrange(key, 0, INGEST_CHUNK_SIZE - 1)
+		pipe.ltrim(key, INGEST_CHUNK_SIZE, -1)
+		entries = pipe.execute()[0]
+		if not entries:
+			frappe.cache.execute_command("SREM", pending_key, pending_member)
+			# Scans pushed while this job was running were not enqueued again
+			if not frappe.cache.execute_command("LLEN", key):
+				break
+			frappe.cache.execute_command("SADD", pending_key, pending_member)
+			continue
+
+		try:
+			scans = [json.loads(entry) for entry in entries]
+			rows = resolve_scans([scan["value"] for scan in scans], ctx)
+			# Commit batches created while resolving before the form applies them
+			frappe.db.commit()
+		except Exception:
+			# Put the chunk back in front of the buffer so the scans are not lost;
+			# the scheduler requeues the document
+			frappe.db.rollback()
+			frappe.cache.execute_command("LPUSH", key, *reversed(entries))
+			raise
+
+		for scan, row in zip(scans, rows):
+			row["device"] = scan.get("device")
+
+		frappe.publish_realtime(
+			INGEST_REALTIME_EVENT,
+			{"doctype": doctype, "docname": docname, "rows": rows},
+			doctype=doctype,
+			docname=docname,
+		)
+
+
+def process_pending_ingest():
+	"""Scheduler safety net: requeue documents whose buffer still holds scans."""
+	for member in frappe.cache.execute_command("SMEMBERS", frappe.cache.make_key(INGEST_PENDING_KEY)) or []:
+		doctype, docname = json.loads(member)
+		enqueue_ingest_processing(doctype, docname)
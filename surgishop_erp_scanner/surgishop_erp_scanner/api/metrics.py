@@ -0,0 +1,80 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt
+from werkzeug.wrappers import Response
+
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_metrics import (
+	CLIENT_PHASES,
+	ROW_COUNT_BUCKETS,
+	get_bucket_labels,
+	record_client_histograms,
+	render_prometheus,
+)
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_resolver import SCANNER_DOCTYPES
+
+# Histograms accepted per call, and scans per histogram
+MAX_CLIENT_HISTOGRAMS = 200
+MAX_CLIENT_COUNT = 100000
+
+
+@frappe.whitelist()
+def get_scan_metrics():
+	"""
+	Scanner latency histograms in Prometheus text format.
+
+	Scrape with an API key of a System Manager:
+		/api/method/surgishop_erp_scanner.surgishop_erp_scanner.api.metrics.get_scan_metrics
+	"""
+	frappe.only_for("System Manager")
+	return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+@frappe.whitelist(methods=["POST"])
+def record_client_scan_timings(histograms: str | list) -> dict:
+	"""
+	Add the desk scanner's aggregated phase timings to the client histograms.
+
+	Args:
+		histograms (str | list): JSON list of doctype, rows, phase, buckets
+			({le: count}), count and sum (seconds)
+
+	Returns:
+		dict: Number of histograms recorded
+	"""
+	histograms = frappe.parse_json(histograms) or []
+	if not isinstance(histograms, list) or len(histograms) > MAX_CLIENT_HISTOGRAMS:
+		frappe.throw(_("Invalid scan timings"))
+
+	bucket_labels = set(get_bucket_labels())
+	valid = []
+	for histogram in histograms:
+		if (
+			not isinstance(histogram, dict)
+			or histogram.get("doctype") not in SCANNER_DOCTYPES
+			or histogram.get("rows") not in ROW_COUNT_BUCKETS
+			or histogram.get("phase") not in CLIENT_PHASES
+			or not isinstance(histogram.get("buckets"), dict)
+			or not set(histogram["buckets"]) <= bucket_labels
+		):
+			continue
+
+		buckets = {bound: cint(count) for bound, count in histogram["buckets"].items() if cint(count) > 0}
+		count = sum(buckets.values())
+		if not count or count > MAX_CLIENT_COUNT:
+			continue
+
+		valid.append({
+			"doctype": histogram["doctype"],
+			"rows": histogram["rows"],
+			"phase": histogram["phase"],
+			"buckets": buckets,
+			"count": count,
+			"sum": max(flt(histogram.get("sum")), 0.0),
+		})
+
+	if valid:
+		record_client_histograms(valid)
+	return {"recorded": len(valid)}
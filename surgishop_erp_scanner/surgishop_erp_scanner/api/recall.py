@@ -0,0 +1,35 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Recall sweep API, see `recall_sweep`.
+"""
+
+import json
+
+import frappe
+
+from surgishop_erp_scanner.surgishop_erp_scanner.recall_sweep import recall_sweep
+
+
+@frappe.whitelist()
+def get_recall_sweep(entries: str | list, item_code: str | None = None, from_date: str | None = None) -> dict:
+	"""
+	Resolve the lots of a recall notice to batches and return their on-hand
+	balances and the outbound vouchers they left on.
+
+	Args:
+		entries (str | list): JSON list or newline separated lot numbers and/or raw GS1 strings
+		item_code (str): Item the bare lots belong to, if the notice is for one product
+		from_date (str): Only list outbound vouchers posted on or after this date
+
+	Returns:
+		dict: batches, unresolved entries, balances and vouchers
+	"""
+	frappe.has_permission("Batch", "read", throw=True)
+	frappe.has_permission("Stock Ledger Entry", "read", throw=True)
+
+	if isinstance(entries, str) and entries.lstrip().startswith("["):
+		entries = json.loads(entries)
+
+	return recall_sweep(entries, item_code=item_code, from_date=from_date)
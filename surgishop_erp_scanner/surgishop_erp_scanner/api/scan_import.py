@@ -0,0 +1,94 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Background import of uploaded scan files, see `scan_file_import`.
+"""
+
+import frappe
+from frappe import _
+
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_file_import import (
+	IMPORT_DOCTYPES,
+	import_scan_file,
+)
+
+
+@frappe.whitelist(methods=["POST"])
+def enqueue_scan_file_import(file_url: str, target_doctype: str, company: str, warehouse: str, supplier: str | None = None) -> dict:
+	"""
+	Import an uploaded scan file in the background.
+
+	The user is notified with a link to the draft when the job finishes.
+
+	Args:
+		file_url (str): URL of the uploaded File
+		target_doctype (str): Purchase Receipt or Stock Entry
+		company (str): Company of the new document
+		warehouse (str): Receiving warehouse
+		supplier (str): Supplier, required for Purchase Receipt
+
+	Returns:
+		dict: The queued file
+	"""
+	if target_doctype not in IMPORT_DOCTYPES:
+		frappe.throw(_("Scan files can only be imported into {0}").format(", ".join(IMPORT_DOCTYPES)))
+	frappe.has_permission(target_doctype, "create", throw=True)
+
+	file_name = frappe.db.get_value("File", {"file_url": file_url}, "name")
+	if not file_name:
+		frappe.throw(_("File {0} not found").format(file_url), frappe.DoesNotExistError)
+	frappe.get_doc("File", file_name).check_permission("read")
+
+	frappe.enqueue(
+		"surgishop_erp_scanner.surgishop_erp_scanner.api.scan_import.run_scan_file_import",
+		queue="long",
+		timeout=1800,
+		file_name=file_name,
+		target_doctype=target_doctype,
+		company=company,
+		warehouse=warehouse,
+		supplier=supplier,
+	)
+	return {"file": file_name}
+
+
+def run_scan_file_import(file_name, target_doctype, company, warehouse, supplier=None):
+	"""Background job: import a File and tell the user how it went."""
+	try:
+		summary = import_scan_file(
+			frappe.get_doc("File", file_name).get_full_path(),
+			target_doctype,
+			company,
+			warehouse,
+			supplier=supplier,
+		)
+	except Exception:
+		frappe.db.rollback()
+		frappe.log_error(title="SurgiShop Scan File Import Error", message=frappe.get_traceback())
+		frappe.publish_realtime(
+			"msgprint",
+			_("Scan file import of {0} failed. See the Error Log for details.").format(file_name),
+			user=frappe.session.user,
+		)
+		return
+
+	frappe.db.commit()
+	message = _("Imported {0} scans ({1} distinct) into {2} with {3} rows.").format(
+		summary["lines"],
+		summary["distinct"],
+		frappe.utils.get_link_to_form(summary["doctype"], summary["name"]),
+		summary["rows"],
+	)
+	if summary["unresolved_count"]:
+		message += "<br>" + _("{0} distinct scans could not be resolved:").format(summary["unresolved_count"])
+		message += "<br>" + "<br>".join(
+			frappe.utils.escape_html(f"{row['value']}: {row['error']}") for row in summary["unresolved"]
+		)
+	if summary["invalid_qty_count"]:
+		message += "<br>" + _("{0} lines were skipped for an invalid quantity:").format(summary["invalid_qty_count"])
+		message += "<br>" + "<br>".join(
+			frappe.utils.escape_html(_("Line {0}: {1}").format(row["line"], row["error"]))
+			for row in summary["invalid_qty"]
+		)
+	frappe.publish_realtime("msgprint", message, user=frappe.session.user)
@@ -0,0 +1,331 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Bulk import of supplier GTIN catalogs into Item Barcode.
+
+A scan resolves a barcode with a single `Item Barcode` lookup, so a GTIN that
+sits on two items resolves to whichever row the database returns first. The
+import keeps the table unambiguous:
+
+- The CSV (item code, barcode, optional UOM) is streamed and every barcode must
+  be a GTIN-8/12/13/14 with a valid check digit.
+- GTINs are compared in their 14 digit form, so `012345678905` and
+  `00012345678905` count as the same code.
+- GTINs listed for two items in the file, or already assigned to another item,
+  are conflicts and are not imported. Existing ambiguous barcodes are listed
+  as well.
+- The remaining rows are written with multi-row inserts, bypassing the Item
+  save per row that makes Data Import slow.
+
+Every skipped row is written to a CSV conflict report.
+"""
+
+import csv
+import io
+from collections import Counter
+
+import frappe
+from frappe import _
+from frappe.utils import now
+
+GTIN_LENGTHS = (8, 12, 13, 14)
+
+# GTINs checked against the database per query
+CHUNK_SIZE = 1000
+
+# Item Barcode rows per INSERT statement
+INSERT_CHUNK_SIZE = 5000
+
+# Existing ambiguous barcodes listed in the report
+MAX_AMBIGUOUS_REPORTED = 1000
+
+REPORT_COLUMNS = ["line", "item_code", "barcode", "status", "detail"]
+
+
+def gtin_check_digit(digits):
+	"""
+	Compute the GS1 check digit.
+
+	Args:
+		digits (str): GTIN digits without the check digit
+
+	Returns:
+		str: The check digit
+	"""
+	total = sum(int(digit) * (3 if i % 2 == 0 else 1) for i, digit in enumerate(reversed(digits)))
+	return str((10 - total % 10) % 10)
+
+
+def normalize_gtin(barcode):
+	"""Return the GTIN-14 form of a valid GTIN-8/12/13/14, or None."""
+	if not barcode.isdigit() or len(barcode) not in GTIN_LENGTHS:
+		return None
+	if gtin_check_digit(barcode[:-1]) != barcode[-1]:
+		return None
+	return barcode.zfill(14)
+
+
+def get_gtin_variants(gtin):
+	"""Forms a GTIN-14 may be stored in: itself and its shorter zero-stripped forms."""
+	return [gtin[14 - length:] for length in GTIN_LENGTHS if not gtin[:14 - length].strip("0")]
+
+
+def get_barcode_key(barcode):
+	"""Comparison key of a stored barcode: 14 digit form for numeric codes."""
+	return barcode.zfill(14) if barcode.isdigit() and len(barcode) <= 14 else barcode
+
+
+def read_barcode_rows(file_path, item_column=0, barcode_column=1, uom_column=None):
+	"""
+	Stream (line, item_code, barcode, uom) rows from a CSV file.
+
+	A first row whose barcode cell is not numeric is taken as the header.
+	"""
+	with open(file_path, newline="", encoding="utf-8-sig") as f:
+		for line, row in enumerate(csv.reader(f), start=1):
+			if not row or not any(cell.strip() for cell in row):
+				continue
+
+			barcode = row[barcode_column].strip() if len(row) > barcode_column else ""
+			if line == 1 and barcode and not barcode.isdigit():
+				continue
+
+			item_code = row[item_column].strip() if len(row) > item_column else ""
+			uom = None
+			if uom_column is not None and len(row) > uom_column:
+				uom = row[uom_column].strip() or None
+
+			yield line, item_code, barcode, uom
+
+
+def import_item_barcodes(file_path, item_column=0, barcode_column=1, uom_column=None, dry_run=False):
+	"""
+	Import a GTIN catalog into Item Barcode.
+
+	Args:
+		file_path (str): Path to the CSV file
+		item_column (int): Column holding the item code
+		barcode_column (int): Column holding the GTIN
+		uom_column (int): Optional column holding the barcode UOM
+		dry_run (bool): Only analyse the file, insert nothing
+
+	Returns:
+		dict: Counts per outcome, the existing ambiguous barcodes and the report file URL
+	"""
+	counts = Counter()
+	report = []
+	entries = {}
+	file_conflicts = {}
+
+	# 1) Stream the file: check digits and duplicates within the file
+	for line, item_code, barcode, uom in read_barcode_rows(file_path, item_column, barcode_column, uom_column):
+		counts["rows"] += 1
+
+		if not item_code or not barcode:
+			counts["invalid"] += 1
+			report.append([line, item_code, barcode, "invalid", _("Item code and barcode are required")])
+			continue
+
+		gtin = normalize_gtin(barcode)
+		if not gtin:
+			counts["invalid"] += 1
+			detail = (
+				_("Invalid check digit")
+				if barcode.isdigit() and len(barcode) in GTIN_LENGTHS
+				else _("Not a GTIN-8, 12, 13 or 14")
+			)
+			report.append([line, item_code, barcode, "invalid", detail])
+			continue
+
+		entry = entries.get(gtin)
+		if gtin in file_conflicts:
+			file_conflicts[gtin].append((line, item_code, barcode))
+		elif entry is None:
+			entries[gtin] = (line, item_code, barcode, uom)
+		elif entry[1] == item_code:
+			counts["duplicate"] += 1
+			report.append([line, item_code, barcode, "duplicate", _("Repeats line {0}").format(entry[0])])
+		else:
+			file_conflicts[gtin] = [entry[:3], (line, item_code, barcode)]
+
+	for gtin, rows in file_conflicts.items():
+		entries.pop(gtin, None)
+		items = ", ".join(sorted({row[1] for row in rows}))
+		for line, item_code, barcode in rows:
+			counts["conflict"] += 1
+			report.append([line, item_code, barcode, "conflict", _("Listed in the file for items {0}").format(items)])
+
+	# 2) Check items and existing barcodes, a chunk of GTINs per query
+	gtins = list(entries)
+	for start in range(0, len(gtins), CHUNK_SIZE):
+		check_against_database(gtins[start:start + CHUNK_SIZE], entries, counts, report)
+
+	# 3) Insert what is left
+	if not dry_run and entries:
+		counts["inserted"] = insert_item_barcodes(list(entries.values()))
+	else:
+		counts["to_insert"] = len(entries)
+
+	ambiguous = find_ambiguous_barcodes()
+	for row in ambiguous[:MAX_AMBIGUOUS_REPORTED]:
+		report.append(["", row.items, row.gtin, "ambiguous_existing", _("Barcode is on {0} items").format(row.item_count)])
+
+	report.sort(key=lambda row: (row[0] == "", row[0] or 0))
+
+	return {
+		"dry_run": bool(dry_run),
+		"counts": dict(counts),
+		"ambiguous_existing": len(ambiguous),
+		"report_url": save_report(report) if report else None,
+	}
+
+
+def check_against_database(gtins, entries, counts, report):
+	"""Drop entries whose item is unknown or whose GTIN is already assigned."""
+	items = {entries[gtin][1] for gtin in gtins}
+	known_items = set(frappe.get_all("Item", filters={"name": ["in", list(items)]}, pluck="name"))
+
+	variants = [variant for gtin in gtins for variant in get_gtin_variants(gtin)]
+	assigned = {}
+	for row in frappe.get_all(
+		"Item Barcode",
+		filters={"barcode": ["in", variants], "parenttype": "Item"},
+		fields=["barcode", "parent"],
+	):
+		assigned.setdefault(get_barcode_key(row.barcode), set()).add(row.parent)
+
+	for gtin in gtins:
+		line, item_code, barcode, _uom = entries[gtin]
+
+		if item_code not in known_items:
+			del entries[gtin]
+			counts["unknown_item"] += 1
+			report.append([line, item_code, barcode, "unknown_item", _("Item {0} does not exist").format(item_code)])
+			continue
+
+		owners = assigned.get(gtin)
+		if not owners:
+			continue
+
+		del entries[gtin]
+		if owners == {item_code}:
+			counts["existing"] += 1
+			continue
+
+		counts["conflict"] += 1
+		others = ", ".join(sorted(owners - {item_code}))
+		report.append([line, item_code, barcode, "conflict", _("Already assigned to {0}").format(others)])
+
+
+def insert_item_barcodes(entries):
+	"""
+	Append barcode rows to their items with multi-row inserts.
+
+	Args:
+		entries (list[tuple]): (line, item_code, barcode, uom) rows
+
+	Returns:
+		int: Rows inserted, not counting rows skipped as duplicates
+	"""
+	fields = [
+		"name", "creation", "modified", "owner", "modified_by", "docstatus",
+		"parent", "parenttype", "parentfield", "idx", "barcode", "barcode_type", "uom",
+	]
+	timestamp = now()
+	user = frappe.session.user
+	inserted = 0
+
+	for start in range(0, len(entries), INSERT_CHUNK_SIZE):
+		chunk = entries[start:start + INSERT_CHUNK_SIZE]
+		items = list({entry[1] for entry in chunk})
+		next_idx = dict(frappe.db.sql(
+			"""
+			select parent, max(idx)
+			from `tabItem Barcode`
+			where parenttype = 'Item' and parent in %(items)s
+			group by parent
+			""",
+			{"items": items},
+		))
+
+		values = []
+		for _line, item_code, barcode, uom in chunk:
+			next_idx[item_code] = (next_idx.get(item_code) or 0) + 1
+			values.append((
+				frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0,
+				item_code, "Item", "barcodes", next_idx[item_code], barcode, "", uom,
+			))
+
+		# One statement per chunk, so the affected row count covers all of it
+		frappe.db.bulk_insert("Item Barcode", fields, values, ignore_duplicates=True, chunk_size=len(values))
+		# Rows skipped as duplicates are not affected
+		inserted += max(frappe.db._cursor.rowcount, 0)
+		for item_code in items:
+			frappe.clear_document_cache("Item", item_code)
+
+		# Keep finished chunks if a later one fails
+		frappe.db.commit()
+
+	return inserted
+
+
+def find_ambiguous_barcodes():
+	"""
+	Existing barcodes assigned to more than one item, numeric codes compared
+	in their 14 digit form.
+
+	Returns:
+		list[frappe._dict]: gtin, items (comma separated) and item_count
+	"""
+	return frappe.db.sql(
+		"""
+		select
+			if(barcode regexp '^[0-9]{1,14}$', lpad(barcode, 14, '0'), barcode) as gtin,
+			group_concat(distinct parent order by parent separator ', ') as items,
+			count(distinct parent) as item_count
+		from `tabItem Barcode`
+		where parenttype = 'Item'
+		group by gtin
+		having count(distinct parent) > 1
+		order by item_count desc, gtin
+		""",
+		as_dict=True,
+	)
+
+
+def save_report(rows):
+	"""Save the conflict report as a private CSV File and return its URL."""
+	content = io.StringIO()
+	writer = csv.writer(content)
+	writer.writerow(REPORT_COLUMNS)
+	writer.writerows(rows)
+
+	report = frappe.get_doc({
+		"doctype": "File",
+		"file_name": f"item_barcode_import_{frappe.generate_hash(length=8)}.csv",
+		"content": content.getvalue(),
+		"is_private": 1,
+	})
+	report.insert(ignore_permissions=True)
+	return report.file_url
+
+
+def format_barcode_import_summary(summary):
+	"""Plain text summary for the bench command."""
+	counts = summary["counts"]
+	lines = [
+		"Dry run, nothing imported" if summary["dry_run"] else "Item Barcode import finished",
+		f"Rows read:           {counts.get('rows', 0)}",
+		f"Inserted:            {counts.get('inserted', 0)}",
+		f"Would insert:        {counts.get('to_insert', 0)}",
+		f"Already present:     {counts.get('existing', 0)}",
+		f"Duplicates in file:  {counts.get('duplicate', 0)}",
+		f"Conflicts:           {counts.get('conflict', 0)}",
+		f"Unknown items:       {counts.get('unknown_item', 0)}",
+		f"Invalid GTINs:       {counts.get('invalid', 0)}",
+		f"Ambiguous existing:  {summary['ambiguous_existing']}",
+	]
+	if summary["report_url"]:
+		lines.append(f"Report: {summary['report_url']}")
+	return "\n".join(lines)
@@ -0,0 +1,158 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+First-expiry-first-out batch suggestion for outbound scans.
+
+A plain item barcode scanned on a delivery or material issue carries no batch,
+so ERPNext would open the Serial/Batch selector. With **Suggest FEFO Batches
+on Outbound Scans** set, the desk scanner sends `fefo` in the `scan_barcode`
+context and the response gets a `batch_allocation`: the earliest-expiring
+batches available in the source warehouse that cover the requested quantity.
+
+Candidates come from the item's enabled batches with a positive `batch_qty`,
+in expiry order, a page at a time; each page is balanced in the source
+warehouse over the `batch_no` indexes of Serial and Batch Entry and Stock
+Ledger Entry, until the quantity is covered or the batches run out. Expired batches are
+left out unless the expiry policy of `overrides.stock_controller` accepts them
+on the document. Quantities the draft already holds per batch are subtracted.
+"""
+
+import frappe
+from frappe.utils import flt, getdate, nowdate
+
+from surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller import is_expiry_check_skipped
+
+# Batches balanced per query, earliest expiry first
+CANDIDATE_PAGE_SIZE = 50
+
+
+def get_fefo_allocation(item_code, warehouse, qty, posting_date=None, include_expired=False, allocated=None):
+	"""
+	Allocate a quantity to the item's batches, earliest expiry first.
+
+	Args:
+		item_code (str): Batch item
+		warehouse (str): Source warehouse
+		qty (float): Quantity to allocate
+		posting_date (str): Date batches must not have expired by
+		include_expired (bool): Also allocate expired batches
+		allocated (dict): Quantity per batch already taken by the document
+
+	Returns:
+		list[dict]: batch_no, qty and expiry_date per batch; may cover less
+		            than `qty` when stock is short
+	"""
+	conditions = ["item = %(item_code)s", "disabled = 0", "batch_qty > 0"]
+	if not include_expired:
+		conditions.append("(expiry_date is null or expiry_date >= %(posting_date)s)")
+
+	allocated = allocated or {}
+	remaining = flt(qty)
+	allocation = []
+	offset = 0
+
+	# batch_qty spans all warehouses: page on until this warehouse covers the qty
+	while remaining > 0:
+		candidates = frappe.db.sql(
+			f"""
+			select name, expiry_date
+			from `tabBatch`
+			where {' and '.join(conditions)}
+			order by expiry_date is null, expiry_date, creation, name
+			limit %(limit)s offset %(offset)s
+			""",
+			{
+				"item_code": item_code,
+				"posting_date": getdate(posting_date or nowdate()),
+				"limit": CANDIDATE_PAGE_SIZE,
+				"offset": offset,
+			},
+			as_dict=True,
+		)
+		if not candidates:
+			break
+
+		available = get_warehouse_batch_qty([row.name for row in candidates], warehouse)
+		for row in candidates:
+			free = flt(available.get(row.name)) - flt(allocated.get(row.name))
+			if free <= 0:
+				continue
+			take = min(free, remaining)
+			allocation.append({"batch_no": row.name, "qty": take, "expiry_date": row.expiry_date})
+			remaining -= take
+			if remaining <= 0:
+				break
+
+		if len(candidates) < CANDIDATE_PAGE_SIZE:
+			break
+		offset += CANDIDATE_PAGE_SIZE
+
+	return allocation
+
+
+def get_warehouse_batch_qty(batch_nos, warehouse):
+	"""Balance of each batch in one warehouse."""
+	available = {}
+	for batch_no, qty in frappe.db.sql(
+		"""
+		select sbe.batch_no, sum(sbe.qty)
+		from `tabSerial and Batch Entry` sbe
+		inner join `tabSerial and Batch Bundle` sbb on sbb.name = sbe.parent
+		where sbe.batch_no in %(batch_nos)s
+			and sbb.warehouse = %(warehouse)s
+			and sbb.docstatus = 1
+			and sbb.is_cancelled = 0
+		group by sbe.batch_no
+		union all
+		select batch_no, sum(actual_qty)
+		from `tabStock Ledger Entry`
+		where batch_no in %(batch_nos)s
+			and warehouse = %(warehouse)s
+			and is_cancelled = 0
+			and ifnull(serial_and_batch_bundle, '') = ''
+		group by batch_no
+		""",
+		{"batch_nos": batch_nos, "warehouse": warehouse},
+	):
+		available[batch_no] = available.get(batch_no, 0) + flt(qty)
+	return available
+
+
+def add_fefo_allocation(scan_result, ctx):
+	"""
+	Add `batch_allocation` to an item scan result when the context asks for it.
+
+	Args:
+		scan_result (dict): Result of an item barcode scan, with item flags
+		ctx (dict): Scan context; fefo, doctype, purpose, is_return,
+		            posting_date, warehouse, qty and allocated (per batch)
+	"""
+	if (
+		not ctx.get("fefo")
+		or scan_result.get("batch_no")
+		or not scan_result.get("has_batch_no")
+		or scan_result.get("has_serial_no")
+	):
+		return
+
+	warehouse = ctx.get("warehouse") or scan_result.get("default_warehouse")
+	if not warehouse:
+		return
+
+	doc = frappe._dict(
+		doctype=ctx.get("doctype"),
+		purpose=ctx.get("purpose"),
+		is_return=ctx.get("is_return"),
+	)
+	qty = flt(ctx.get("qty")) or 1
+	item_row = frappe._dict(qty=qty, s_warehouse=warehouse)
+
+	scan_result["batch_allocation"] = get_fefo_allocation(
+		scan_result["item_code"],
+		warehouse,
+		qty,
+		posting_date=ctx.get("posting_date"),
+		include_expired=is_expiry_check_skipped(doc, item_row),
+		allocated=ctx.get("allocated"),
+	)
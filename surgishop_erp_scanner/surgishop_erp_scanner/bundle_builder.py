@@ -0,0 +1,424 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Bulk Serial and Batch Bundle construction for scanned drafts.
+
+Scanned rows carry their batch and serial numbers in the row's `batch_no` and
+`serial_no` fields. Instead of resolving each row through the Serial/Batch
+selector (a dialog and several calls per row), `build_serial_batch_bundles`
+turns every such row of a draft into a draft Serial and Batch Bundle at once:
+
+- rows, items, batches and serial numbers are validated together, and nothing
+  is written if any row is wrong
+- bundle names are reserved from the naming series in one update
+- bundles, their entries and the serial numbers a receipt introduces are
+  written with multi-row inserts; draft bundles already on the rows are
+  replaced under the same name, and the inactive serial numbers created for
+  them that nothing refers to any more are deleted
+- the rows are linked to their bundles with one UPDATE per chunk
+
+Rates and amounts are left at zero; ERPNext computes them when the document
+is submitted, which also validates and submits the bundles.
+"""
+
+import re
+
+import frappe
+from frappe import _
+from frappe.model.naming import make_autoname
+from frappe.utils import cint, flt, now
+
+from surgishop_erp_scanner.surgishop_erp_scanner.overrides.stock_controller import get_serial_nos_helper
+
+SUPPORTED_DOCTYPES = ("Purchase Receipt", "Purchase Invoice", "Delivery Note", "Sales Invoice", "Stock Entry")
+
+# Bundles are only built for invoices that update stock
+INVOICE_DOCTYPES = ("Purchase Invoice", "Sales Invoice")
+
+BUNDLE_DOCTYPE = "Serial and Batch Bundle"
+
+# Rows per INSERT / UPDATE statement
+CHUNK_SIZE = 1000
+
+# "PREFIX.#####" naming series, reserved as a range
+SIMPLE_SERIES = re.compile(r"^([^.#{}]+)\.(#+)$")
+
+
+def build_serial_batch_bundles(doc):
+	"""
+	Build draft Serial and Batch Bundles for every scanned batch/serial row.
+
+	Args:
+		doc (Document): Draft document, one of SUPPORTED_DOCTYPES
+
+	Returns:
+		dict: Number of bundles built and of serial numbers created
+	"""
+	if doc.doctype in INVOICE_DOCTYPES and not doc.get("update_stock"):
+		return {"bundles": 0, "serial_nos": 0}
+
+	rows = [row for row in doc.get("items") if row.get("batch_no") or row.get("serial_no")]
+	if not rows:
+		return {"bundles": 0, "serial_nos": 0}
+
+	items = {
+		item.name: item
+		for item in frappe.get_all(
+			"Item",
+			filters={"name": ["in", list({row.item_code for row in rows})]},
+			fields=["name", "item_name", "description", "has_batch_no", "has_serial_no"],
+		)
+	}
+	rows = [row for row in rows if items.get(row.item_code) and (
+		items[row.item_code].has_batch_no or items[row.item_code].has_serial_no
+	)]
+	if not rows:
+		return {"bundles": 0, "serial_nos": 0}
+
+	plans = [plan_bundle(doc, row, items[row.item_code]) for row in rows]
+	validate_bundle_plans(plans)
+
+	names = replace_draft_bundles(plans)
+	new_serials = get_new_serial_nos(plans)
+
+	timestamp = now()
+	user = frappe.session.user
+	headers = []
+	entries = []
+	for plan in plans:
+		name = names[plan.row.name]
+		headers.append({
+			"name": name,
+			"creation": timestamp,
+			"modified": timestamp,
+			"owner": user,
+			"modified_by": user,
+			"docstatus": 0,
+			"naming_series": plan.naming_series,
+			"company": doc.company,
+			"item_code": plan.item.name,
+			"item_name": plan.item.item_name,
+			"has_serial_no": plan.item.has_serial_no,
+			"has_batch_no": plan.item.has_batch_no,
+			"warehouse": plan.warehouse,
+			"type_of_transaction": "Outward" if plan.outward else "Inward",
+			"voucher_type": doc.doctype,
+			"voucher_no": doc.name,
+			"voucher_detail_no": plan.row.name,
+			"posting_date": doc.get("posting_date"),
+			"posting_time": doc.get("posting_time"),
+			"total_qty": sum(qty for _serial, _batch, qty in plan.entries),
+			"avg_rate": 0,
+			"total_amount": 0,
+			"is_cancelled": 0,
+			"is_rejected": 0,
+		})
+		for idx, (serial_no, batch_no, qty) in enumerate(plan.entries, start=1):
+			entries.append({
+				"name": frappe.generate_hash(length=10),
+				"creation": timestamp,
+				"modified": timestamp,
+				"owner": user,
+				"modified_by": user,
+				"docstatus": 0,
+				"parent": name,
+				"parenttype": BUNDLE_DOCTYPE,
+				"parentfield": "entries",
+				"idx": idx,
+				"serial_no": serial_no,
+				"batch_no": batch_no,
+				"qty": qty,
+				"warehouse": plan.warehouse,
+				"is_outward": cint(plan.outward),
+				"incoming_rate": 0,
+				"stock_value_difference": 0,
+			})
+
+	insert_serial_nos(doc, new_serials)
+	bulk_insert_dicts(BUNDLE_DOCTYPE, headers)
+	bulk_insert_dicts("Serial and Batch Entry", entries)
+	link_rows_to_bundles(doc, names)
+
+	frappe.db.set_value(doc.doctype, doc.name, "modified", timestamp, update_modified=False)
+	frappe.clear_document_cache(doc.doctype, doc.name)
+
+	return {"bundles": len(headers), "serial_nos": len(new_serials)}
+
+
+def plan_bundle(doc, row, item):
+	"""Work out direction, warehouse and (serial_no, batch_no, qty) entries of a row."""
+	if doc.doctype == "Stock Entry":
+		outward = bool(row.s_warehouse)
+		warehouse = row.s_warehouse or row.t_warehouse
+		qty = flt(row.transfer_qty) or flt(row.qty) * flt(row.conversion_factor or 1)
+	else:
+		outward = doc.doctype in ("Delivery Note", "Sales Invoice")
+		if doc.get("is_return"):
+			outward = not outward
+		warehouse = row.warehouse
+		qty = flt(row.stock_qty) or flt(row.qty) * flt(row.conversion_factor or 1)
+
+	qty = abs(qty)
+	sign = -1 if outward else 1
+	batch_no = row.batch_no if item.has_batch_no else None
+	serial_nos = get_serial_nos_helper(row.serial_no) if item.has_serial_no else []
+
+	if item.has_serial_no:
+		entries = [(serial_no, batch_no, sign) for serial_no in serial_nos]
+	else:
+		entries = [(None, batch_no, sign * qty)]
+
+	return frappe._dict(
+		row=row,
+		item=item,
+		outward=outward,
+		warehouse=warehouse,
+		qty=qty,
+		batch_no=batch_no,
+		serial_nos=serial_nos,
+		entries=entries,
+		naming_series=None,
+	)
+
+
+def validate_bundle_plans(plans):
+	"""Check all rows at once and throw every problem found in one message."""
+	errors = []
+
+	batch_nos = list({plan.batch_no for plan in plans if plan.batch_no})
+	batch_items = dict(frappe.get_all(
+		"Batch", filters={"name": ["in", batch_nos]}, fields=["name", "item"], as_list=True
+	)) if batch_nos else {}
+
+	serial_nos = list({serial_no for plan in plans for serial_no in plan.serial_nos})
+	serial_items = {}
+	for start in range(0, len(serial_nos), CHUNK_SIZE):
+		serial_items.update(frappe.get_all(
+			"Serial No",
+			filters={"name": ["in", serial_nos[start:start + CHUNK_SIZE]]},
+			fields=["name", "item_code"],
+			as_list=True,
+		))
+
+	seen_serials = {}
+	for plan in plans:
+		row = plan.row
+		if not plan.warehouse:
+			errors.append(_("Row #{0}: Warehouse is required").format(row.idx))
+		if not plan.qty:
+			errors.append(_("Row #{0}: Quantity is required").format(row.idx))
+
+		if plan.item.has_batch_no:
+			if not plan.batch_no:
+				errors.append(_("Row #{0}: Batch No is required for item {1}").format(row.idx, plan.item.name))
+			elif batch_items.get(plan.batch_no) != plan.item.name:
+				errors.append(_("Row #{0}: Batch {1} does not exist for item {2}").format(
+					row.idx, plan.batch_no, plan.item.name
+				))
+
+		if plan.item.has_serial_no:
+			if len(plan.serial_nos) != plan.qty:
+				errors.append(_("Row #{0}: {1} serial numbers scanned for a quantity of {2}").format(
+					row.idx, len(plan.serial_nos), plan.qty
+				))
+			for serial_no in plan.serial_nos:
+				owner = serial_items.get(serial_no)
+				if owner and owner != plan.item.name:
+					errors.append(_("Row #{0}: Serial No {1} belongs to item {2}").format(row.idx, serial_no, owner))
+				elif not owner and plan.outward:
+					errors.append(_("Row #{0}: Serial No {1} does not exist").format(row.idx, serial_no))
+				if serial_no in seen_serials:
+					errors.append(_("Row #{0}: Serial No {1} is also on row #{2}").format(
+						row.idx, serial_no, seen_serials[serial_no]
+					))
+				seen_serials[serial_no] = row.idx
+
+	if errors:
+		frappe.throw("<br>".join(errors), title=_("Cannot build Serial and Batch Bundles"))
+
+
+def replace_draft_bundles(plans):
+	"""
+	Delete the draft bundles already on the rows and name a bundle per row.
+
+	Returns:
+		dict: Row name -> bundle name (existing names are kept)
+	"""
+	existing = {plan.row.serial_and_batch_bundle: plan for plan in plans if plan.row.get("serial_and_batch_bundle")}
+	if existing:
+		submitted = frappe.get_all(
+			BUNDLE_DOCTYPE,
+			filters={"name": ["in", list(existing)], "docstatus": ["!=", 0]},
+			pluck="name",
+		)
+		if submitted:
+			frappe.throw(_("Serial and Batch Bundles {0} are not drafts").format(", ".join(submitted)))
+
+		old_serial_nos = frappe.get_all(
+			"Serial and Batch Entry",
+			filters={"parent": ["in", list(existing)], "serial_no": ["is", "set"]},
+			pluck="serial_no",
+		)
+		frappe.db.sql(
+			"delete from `tabSerial and Batch Entry` where parent in %(names)s",
+			{"names": list(existing)},
+		)
+		frappe.db.sql(
+			"delete from `tabSerial and Batch Bundle` where name in %(names)s",
+			{"names": list(existing)},
+		)
+		delete_unlinked_serial_nos(old_serial_nos)
+
+	series = get_bundle_series()
+	new_rows = [plan for plan in plans if not plan.row.get("serial_and_batch_bundle")]
+	new_names = reserve_series_names(series, len(new_rows))
+
+	names = {}
+	for plan in plans:
+		plan.naming_series = series
+		names[plan.row.name] = plan.row.get("serial_and_batch_bundle") or new_names.pop(0)
+	return names
+
+
+def delete_unlinked_serial_nos(serial_nos):
+	"""
+	Delete serial numbers of replaced bundles that were never received.
+
+	Receipts create their new serial numbers as Inactive without a warehouse;
+	once no bundle entry refers to one it would be left behind, so it is
+	removed. Rows that still need it create it again.
+	"""
+	serial_nos = list(set(serial_nos))
+	for start in range(0, len(serial_nos), CHUNK_SIZE):
+		frappe.db.sql(
+			"""
+			delete from `tabSerial No`
+			where name in %(names)s
+				and status = 'Inactive'
+				and ifnull(warehouse, '') = ''
+				and not exists (
+					select 1 from `tabSerial and Batch Entry` entry
+					where entry.serial_no = `tabSerial No`.name
+				)
+			""",
+			{"names": serial_nos[start:start + CHUNK_SIZE]},
+		)
+
+
+def get_bundle_series():
+	"""Default naming series of Serial and Batch Bundle."""
+	field = frappe.get_meta(BUNDLE_DOCTYPE).get_field("naming_series")
+	if field:
+		series = field.default or (field.options or "").split("\n")[0]
+		if series:
+			return series
+	return "SABB-.########"
+
+
+def reserve_series_names(series, count):
+	"""
+	Reserve `count` names of a naming series with one counter update.
+
+	Series with placeholders other than a prefix and hashes are named one by
+	one through Frappe.
+	"""
+	if not count:
+		return []
+
+	match = SIMPLE_SERIES.match(series)
+	if not match:
+		return [make_autoname(series, BUNDLE_DOCTYPE) for _i in range(count)]
+
+	prefix, digits = match.group(1), len(match.group(2))
+	current = frappe.db.sql("select `current` from `tabSeries` where `name` = %s for update", prefix)
+	if current:
+		start = cint(current[0][0])
+		frappe.db.sql("update `tabSeries` set `current` = %s where `name` = %s", (start + count, prefix))
+	else:
+		start = 0
+		frappe.db.sql("insert into `tabSeries` (`name`, `current`) values (%s, %s)", (prefix, count))
+
+	return [f"{prefix}{number:0{digits}d}" for number in range(start + 1, start + count + 1)]
+
+
+def get_new_serial_nos(plans):
+	"""Serial numbers of inward rows that do not exist yet, as (serial_no, item, batch_no)."""
+	candidates = {
+		serial_no: plan
+		for plan in plans
+		if not plan.outward
+		for serial_no in plan.serial_nos
+	}
+	if not candidates:
+		return []
+
+	existing = set()
+	serial_nos = list(candidates)
+	for start in range(0, len(serial_nos), CHUNK_SIZE):
+		existing.update(frappe.get_all(
+			"Serial No", filters={"name": ["in", serial_nos[start:start + CHUNK_SIZE]]}, pluck="name"
+		))
+
+	return [
+		(serial_no, plan.item, plan.batch_no)
+		for serial_no, plan in candidates.items()
+		if serial_no not in existing
+	]
+
+
+def insert_serial_nos(doc, serials):
+	"""Create serial numbers a receipt introduces, inactive until it is submitted."""
+	timestamp = now()
+	user = frappe.session.user
+	bulk_insert_dicts("Serial No", [
+		{
+			"name": serial_no,
+			"serial_no": serial_no,
+			"creation": timestamp,
+			"modified": timestamp,
+			"owner": user,
+			"modified_by": user,
+			"company": doc.company,
+			"item_code": item.name,
+			"item_name": item.item_name,
+			"description": item.description,
+			"status": "Inactive",
+			"batch_no": batch_no,
+		}
+		for serial_no, item, batch_no in serials
+	])
+
+
+def bulk_insert_dicts(doctype, rows):
+	"""Multi-row insert of dicts, keeping only the columns the table has."""
+	if not rows:
+		return
+
+	columns = set(frappe.db.get_table_columns(doctype))
+	fields = [field for field in rows[0] if field in columns]
+	for start in range(0, len(rows), CHUNK_SIZE):
+		frappe.db.bulk_insert(
+			doctype,
+			fields,
+			[tuple(row[field] for field in fields) for row in rows[start:start + CHUNK_SIZE]],
+		)
+
+
+def link_rows_to_bundles(doc, names):
+	"""Point each row at its bundle and switch it from the serial/batch fields to the bundle."""
+	child_doctype = doc.meta.get_field("items").options
+	row_names = list(names)
+	for start in range(0, len(row_names), CHUNK_SIZE):
+		chunk = row_names[start:start + CHUNK_SIZE]
+		cases = " ".join(["when %s then %s"] * len(chunk))
+		values = [value for row_name in chunk for value in (row_name, names[row_name])]
+		frappe.db.sql(
+			f"""
+			update `tab{child_doctype}`
+			set serial_and_batch_bundle = case name {cases} end,
+				use_serial_batch_fields = 0
+			where name in %s
+			""",
+			(*values, tuple(chunk)),
+		)
@@ -85,8 +85,14 @@ def apply_condition_options_to_custom_fields(option_labels):
 	"""
 	Apply the condition option list to both custom_condition Custom Fields.
 
+	Fields that already have these options are left alone, and metadata
+	caches are only cleared for the doctypes that changed.
+
 	Args:
 		option_labels (list[str]): Condition options
+
+	Returns:
+		list[str]: Doctypes whose field was updated
 	"""
 	options = build_select_options_string(option_labels)
 
@@ -96,11 +102,15 @@ def apply_condition_options_to_custom_fields(option_labels):
 			'dt': ['in', ['Purchase Receipt Item', 'Stock Ledger Entry']],
 			'fieldname': 'custom_condition',
 		},
-		fields=['name', 'dt'],
+		fields=["name", "dt", "options"],
 		limit_page_length=1000,
 	)
 
+	updated = []
 	for cf in custom_fields:
+		if (cf.options or "") == options:
+			continue
+
 		frappe.db.set_value(
 			'Custom Field',
 			cf.name,
@@ -111,6 +121,9 @@ def apply_condition_options_to_custom_fields(option_labels):
 
 		# Ensure updated DocField options are picked up in Desk
 		frappe.clear_cache(doctype=cf.dt)
+		updated.append(cf.dt)
+
+	return updated
 
 
 def apply_condition_options_after_migrate():
@@ -118,7 +131,9 @@ def apply_condition_options_after_migrate():
 	Re-apply condition options after migrate.
 
 	This ensures user-managed options win over fixture defaults on each migrate.
+	The stored field options are compared rather than a fingerprint of the
+	settings, because fixture sync may rewrite them on any migrate.
 	"""
-	apply_condition_options_to_custom_fields(get_condition_options_from_settings())
-
-
+	updated = apply_condition_options_to_custom_fields(get_condition_options_from_settings())
+	if updated:
+		print(f"Updated condition options on: {', '.join(updated)}")
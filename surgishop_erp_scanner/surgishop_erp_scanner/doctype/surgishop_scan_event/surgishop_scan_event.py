@@ -0,0 +1,14 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class SurgiShopScanEvent(Document):
+	pass
+
+
+def on_doctype_update():
+	# Reports filter on a time range and group by user
+	frappe.db.add_index("SurgiShop Scan Event", ["scanned_at", "user"])
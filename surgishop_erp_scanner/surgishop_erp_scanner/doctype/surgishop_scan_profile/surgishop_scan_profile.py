@@ -0,0 +1,8 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+from frappe.model.document import Document
+
+
+class SurgiShopScanProfile(Document):
+	pass
@@ -7,6 +7,10 @@ frappe.ui.form.on('SurgiShop Settings', {
 		frm.fields_dict.generate_trigger_barcodes.$input.on('click', function() {
 			generateTriggerBarcodes(frm)
 		})
+
+		frm.add_custom_button(__('Import Item Barcodes'), function() {
+			showItemBarcodeImportDialog()
+		})
 	},
 
 	generate_trigger_barcodes: function(frm) {
@@ -14,6 +18,46 @@ frappe.ui.form.on('SurgiShop Settings', {
 	}
 })
 
+/**
+ * Upload a GTIN catalog (item code, barcode, optional UOM) and import it in the background
+ */
+function showItemBarcodeImportDialog() {
+	const dialog = new frappe.ui.Dialog({
+		title: __('Import Item Barcodes'),
+		fields: [
+			{
+				fieldname: 'file_url',
+				fieldtype: 'Attach',
+				label: __('CSV File'),
+				reqd: 1,
+				description: __('Columns: item code, GTIN, optional UOM. Header row is optional.')
+			},
+			{
+				fieldname: 'dry_run',
+				fieldtype: 'Check',
+				label: __('Only analyse (no changes)'),
+				default: 1
+			}
+		],
+		primary_action_label: __('Import'),
+		primary_action(values) {
+			frappe.call({
+				method: 'surgishop_erp_scanner.surgishop_erp_scanner.api.barcode_import.enqueue_item_barcode_import',
+				args: values,
+				freeze: true,
+				callback: function() {
+					dialog.hide()
+					frappe.show_alert({
+						message: __('Barcode import queued. You will be notified when it finishes.'),
+						indicator: 'blue'
+					})
+				}
+			})
+		}
+	})
+	dialog.show()
+}
+
 /**
  * Generate printable trigger barcodes in a new window
  * @param {object} frm - The form object
@@ -32,3 +32,9 @@ class SurgiShopSettings(Document):
 				indicator="orange",
 				alert=True
 			)
+
+		if self.enable_scan_rate_limit:
+			if (self.scan_rate_limit_per_second or 0) <= 0:
+				frappe.throw(frappe._("Scans per Second must be greater than 0"))
+			if (self.scan_rate_limit_burst or 0) < 1:
+				frappe.throw(frappe._("Burst Size must be at least 1"))
@@ -7,6 +7,11 @@ from surgishop_erp_scanner.surgishop_erp_scanner.condition_options import (
 	apply_condition_options_to_custom_fields,
 	get_default_condition_options,
 )
+from surgishop_erp_scanner.surgishop_erp_scanner.migrate_fingerprint import (
+	fingerprint_changed,
+	make_fingerprint,
+	store_fingerprint,
+)
 
 
 def after_install():
@@ -23,9 +28,16 @@ def cleanup_old_workspaces():
 	"""
 	Remove old/renamed workspaces to prevent duplicates.
 	Called after install and can be called after migrate.
+
+	Skipped once the current list of old workspaces has been cleaned up.
 	"""
 	old_workspaces = ["SS - Scanner"]
 
+	fingerprint = make_fingerprint(old_workspaces)
+	if not fingerprint_changed("cleanup_old_workspaces", fingerprint):
+		return
+
+	failed = False
 	for ws_name in old_workspaces:
 		if frappe.db.exists("Workspace", ws_name):
 			try:
@@ -33,37 +45,50 @@ def cleanup_old_workspaces():
 				frappe.db.commit()
 				print(f"Deleted old workspace: {ws_name}")
 			except Exception as e:
+				failed = True
 				print(f"Could not delete workspace {ws_name}: {e}")
 
+	if not failed:
+		store_fingerprint("cleanup_old_workspaces", fingerprint)
+		frappe.db.commit()
+
 
 def fix_settings_defaults():
 	"""
 	Fix default values for settings fields that were added after initial install.
 	This ensures new Check fields have the correct default (1) instead of 0.
+
+	Runs once per change of the field list, so a field a user later turns off
+	stays off. Only the fixed fields are written (no full document save).
 	"""
+	# Fields that should default to 1 (enabled) if they are 0 or None
+	fields_to_enable = [
+		"prompt_create_item_on_unknown_gtin",
+		"create_item_inline",
+	]
+
+	fingerprint = make_fingerprint(fields_to_enable)
+	if not fingerprint_changed("fix_settings_defaults", fingerprint):
+		return
+
 	try:
 		if frappe.db.exists("SurgiShop Settings", "SurgiShop Settings"):
-			# Fields that should default to 1 (enabled) if they are 0 or None
-			fields_to_enable = [
-				"prompt_create_item_on_unknown_gtin",
-				"create_item_inline",
-			]
-
-			doc = frappe.get_doc("SurgiShop Settings")
 			updated = False
 
 			for field in fields_to_enable:
-				current_value = doc.get(field)
+				current_value = frappe.db.get_single_value("SurgiShop Settings", field)
 				# If value is 0 or None, set it to 1
 				if current_value in (0, None, ""):
-					doc.set(field, 1)
+					frappe.db.set_single_value("SurgiShop Settings", field, 1)
 					updated = True
 					print(f"Fixed {field}: {current_value} -> 1")
 
 			if updated:
-				doc.save(ignore_permissions=True)
-				frappe.db.commit()
+				frappe.clear_document_cache("SurgiShop Settings", "SurgiShop Settings")
 				print("SurgiShop Settings defaults fixed.")
+
+			store_fingerprint("fix_settings_defaults", fingerprint)
+			frappe.db.commit()
 	except Exception as e:
 		print(f"Could not fix settings defaults: {e}")
 
@@ -0,0 +1,189 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Worker-local cache of the Item fields the scan path checks.
+
+Every scan reads a handful of Item fields (batch/serial flags, name, stock
+UOM, disabled). `frappe.get_cached_value` costs a Redis round trip each time;
+here they are kept as small records in a bounded LRU inside each web worker
+process, so repeated scans of an item are dictionary hits.
+
+Misses are loaded through `frappe.get_cached_value`, so the Redis document
+cache stays the second level. Misses on the read replica are read from the
+database and kept in neither cache: a lagging replica row would outlive the
+invalidation of the change it is missing. Saving, renaming or deleting an Item
+publishes its name on a per-site Redis channel once the transaction commits; a
+listener thread in every worker drops the record. Records also expire after a
+TTL, which bounds staleness from changes that bypass document events. Until a
+worker's listener is subscribed, and outside web requests (background jobs run
+in short-lived processes), lookups skip the worker-local records.
+
+Size and TTL can be changed with the `surgishop_item_flags_cache_size` and
+`surgishop_item_flags_cache_ttl` site config keys.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import frappe
+
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_metrics import log_scan_warning
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_replica import on_replica, replica_cached_value
+
+ITEM_FLAG_FIELDS = (
+	"name", "item_name", "stock_uom", "has_batch_no", "has_serial_no", "is_stock_item", "disabled",
+)
+
+INVALIDATION_CHANNEL = "surgishop_scanner:item_flags"
+
+DEFAULT_CACHE_SIZE = 5000
+
+# Seconds
+DEFAULT_CACHE_TTL = 300
+LISTENER_RETRY_DELAY = 5
+
+_lock = threading.Lock()
+# (site channel, item_code) -> (expires_at, record)
+_records = OrderedDict()
+_listener = {"pid": None, "thread": None, "subscribed": False}
+
+
+def get_item_flags(item_code, fields=None):
+	"""
+	Return Item fields used by the scan path.
+
+	Args:
+		item_code (str): Item name
+		fields (list): Subset of ITEM_FLAG_FIELDS, all when omitted
+
+	Returns:
+		frappe._dict | None: The fields, or None when the item does not exist
+	"""
+	if not item_code:
+		return None
+
+	if not local_cache_enabled():
+		return replica_cached_value("Item", item_code, fields or ITEM_FLAG_FIELDS, as_dict=True)
+
+	key = (get_channel(), item_code)
+	now = time.monotonic()
+	with _lock:
+		cached = _records.get(key)
+		if cached and cached[0] > now:
+			_records.move_to_end(key)
+			record = cached[1]
+		else:
+			record = None
+
+	if record is None:
+		replica = on_replica()
+		record = replica_cached_value("Item", item_code, ITEM_FLAG_FIELDS, as_dict=True)
+		if not record:
+			return None
+		record = tuple(record[field] for field in ITEM_FLAG_FIELDS)
+		if not replica:
+			store_record(key, record, now)
+
+	values = dict(zip(ITEM_FLAG_FIELDS, record))
+	return frappe._dict({field: values[field] for field in fields} if fields else values)
+
+
+def store_record(key, record, now):
+	size = frappe.conf.get("surgishop_item_flags_cache_size") or DEFAULT_CACHE_SIZE
+	ttl = frappe.conf.get("surgishop_item_flags_cache_ttl") or DEFAULT_CACHE_TTL
+	with _lock:
+		_records[key] = (now + ttl, record)
+		_records.move_to_end(key)
+		while len(_records) > size:
+			_records.popitem(last=False)
+
+
+def get_channel():
+	"""Invalidation channel of the current site; also keys the site's records."""
+	return frappe.safe_decode(frappe.cache.make_key(INVALIDATION_CHANNEL))
+
+
+def local_cache_enabled():
+	"""Whether lookups may use the worker-local records, starting the listener if needed."""
+	if getattr(frappe.local, "request", None) is None:
+		return False
+
+	if _listener["pid"] != os.getpid():
+		# New process (e.g. forked): records and listener of the parent do not apply
+		with _lock:
+			_records.clear()
+		_listener.update(pid=os.getpid(), thread=None, subscribed=False)
+
+	thread = _listener["thread"]
+	if thread is None or not thread.is_alive():
+		start_listener()
+	return _listener["subscribed"]
+
+
+def start_listener():
+	with _lock:
+		if _listener["thread"] is not None and _listener["thread"].is_alive():
+			return
+		# The process-wide Redis client; the thread has no frappe.local
+		thread = threading.Thread(
+			target=listen_for_invalidations,
+			args=(frappe.cache, "*" + INVALIDATION_CHANNEL),
+			name="surgishop-item-flags",
+			daemon=True,
+		)
+		_listener["thread"] = thread
+	thread.start()
+
+
+def listen_for_invalidations(client, pattern):
+	"""Listener thread: drop records named on any site's invalidation channel."""
+	while True:
+		pubsub = None
+		try:
+			pubsub = client.pubsub(ignore_subscribe_messages=True)
+			pubsub.psubscribe(pattern)
+			_listener["subscribed"] = True
+			for message in pubsub.listen():
+				if message.get("type") == "pmessage":
+					drop_record(frappe.safe_decode(message["channel"]), frappe.safe_decode(message["data"]))
+		except Exception as e:
+			log_scan_warning("Item flag invalidation listener failed: %s", e)
+		finally:
+			# Updates may have been missed while disconnected
+			_listener["subscribed"] = False
+			with _lock:
+				_records.clear()
+			if pubsub is not None:
+				try:
+					pubsub.close()
+				except Exception:
+					pass
+		time.sleep(LISTENER_RETRY_DELAY)
+
+
+def drop_record(channel, item_code):
+	with _lock:
+		_records.pop((channel, item_code), None)
+
+
+def invalidate_item_flags(doc, method=None, *args):
+	"""Item doc event: drop the item's records in every worker once the change commits."""
+	item_codes = {doc.name}
+	if method == "after_rename" and args:
+		item_codes.add(args[0])
+
+	channel = get_channel()
+	for item_code in item_codes:
+		drop_record(channel, item_code)
+
+	def publish():
+		try:
+			for item_code in item_codes:
+				frappe.cache.execute_command("PUBLISH", channel, item_code)
+		except Exception as e:
+			log_scan_warning("Could not publish item flag invalidation: %s", e)
+
+	frappe.db.after_commit.add(publish)
@@ -0,0 +1,41 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Content fingerprints for after_migrate hooks.
+
+A hook hashes everything its outcome depends on and compares it with the hash
+stored after its last successful run; when they match the hook has nothing to
+do and returns without writing or clearing caches. Fingerprints are stored as
+global defaults, one per hook.
+"""
+
+import hashlib
+import json
+
+import frappe
+
+FINGERPRINT_KEY = "surgishop_migrate_fingerprint:{0}"
+
+
+def make_fingerprint(*parts):
+	"""
+	Hash the given values.
+
+	Args:
+		*parts: JSON-serialisable values the hook outcome depends on
+
+	Returns:
+		str: Hex digest
+	"""
+	payload = json.dumps(parts, sort_keys=True, default=str)
+	return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def fingerprint_changed(hook, fingerprint):
+	"""Whether the hook last ran with different inputs (or never ran)."""
+	return frappe.db.get_global(FINGERPRINT_KEY.format(hook)) != fingerprint
+
+
+def store_fingerprint(hook, fingerprint):
+	frappe.db.set_global(FINGERPRINT_KEY.format(hook), fingerprint)
@@ -0,0 +1,59 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+import frappe
+
+EXPIRY_FIELD = "custom_expiration_date"
+
+
+def get_batch_expiry_map(batch_nos):
+	"""
+	Load the expiry dates of many batches in one query.
+
+	Args:
+		batch_nos (Iterable[str]): Batch names
+
+	Returns:
+		dict: {batch_no: expiry_date or None}
+	"""
+	batch_nos = list({batch_no for batch_no in batch_nos if batch_no})
+	if not batch_nos:
+		return {}
+
+	return dict(
+		frappe.get_all(
+			"Batch",
+			filters={"name": ["in", batch_nos]},
+			fields=["name", "expiry_date"],
+			as_list=True,
+			limit_page_length=len(batch_nos),
+		)
+	)
+
+
+def fill_batch_expiry_dates(doc, method=None):
+	"""
+	Copy batch expiry dates into `custom_expiration_date` on validate.
+
+	Covers rows whose expiry the desk did not fill (imports, mapped documents,
+	API inserts). Only child tables that have the field are touched, and rows
+	keep their value when the batch has no expiry.
+
+	Args:
+		doc: Stock transaction document
+		method: Hook method name (unused)
+	"""
+	rows = []
+	for table_field in doc.meta.get_table_fields():
+		child_meta = frappe.get_meta(table_field.options)
+		if child_meta.has_field(EXPIRY_FIELD) and child_meta.has_field("batch_no"):
+			rows.extend(row for row in doc.get(table_field.fieldname) or [] if row.get("batch_no"))
+
+	if not rows:
+		return
+
+	expiries = get_batch_expiry_map(row.batch_no for row in rows)
+	for row in rows:
+		expiry_date = expiries.get(row.batch_no)
+		if expiry_date:
+			row.set(EXPIRY_FIELD, expiry_date)
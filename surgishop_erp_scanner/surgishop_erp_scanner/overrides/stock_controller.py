@@ -5,6 +5,8 @@ import frappe
 from frappe import _
 from frappe.utils import getdate, get_link_to_form, flt
 
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_profiler import profile_scanner_call
+
 # Handle potential import path changes between ERPNext versions
 try:
 	from erpnext.controllers.stock_controller import BatchExpiredError
@@ -93,6 +95,30 @@ def is_expired_batch_allowed_for_doc(doc, item_row):
 	return False
 
 
+def is_expiry_check_skipped(doc, item_row):
+	"""
+	Whether expired batches are accepted on a row, by the rules of
+	`validate_serialized_batch_with_expired_override`.
+
+	Args:
+		doc: The document, or a dict with doctype, purpose and is_return
+		item_row: The item row, or a dict with qty and warehouses
+
+	Returns:
+		bool: True if the expiry check does not apply
+	"""
+	settings = get_surgishop_settings()
+
+	if settings.skip_batch_expiry_validation:
+		return True
+
+	# Material issues and transfers are not checked
+	if doc.get("doctype") == "Stock Entry" and doc.get("purpose") in ["Material Issue", "Material Transfer"]:
+		return True
+
+	return is_expired_batch_allowed_for_doc(doc, item_row)
+
+
 def get_serial_nos_helper(serial_no_str):
 	"""
 	Get serial numbers from a string, handling different ERPNext versions.
@@ -107,6 +133,7 @@ def get_serial_nos_helper(serial_no_str):
 		return [s.strip() for s in serial_no_str.strip().split('\n') if s.strip()]
 
 
+@profile_scanner_call("validate_serialized_batch_with_expired_override")
 def validate_serialized_batch_with_expired_override(doc, method):
 	"""
 	Override the validate_serialized_batch method to allow expired products 
@@ -115,15 +142,6 @@ def validate_serialized_batch_with_expired_override(doc, method):
 	This is called via doc_events hook for better update-proofing.
 	Compatible with Frappe/ERPNext v15 and v16.
 	"""
-	settings = get_surgishop_settings()
-	
-	# If all validation is skipped, only validate serial/batch relationship
-	skip_expiry_check = settings.skip_batch_expiry_validation
-
-	is_material_issue = False
-	if doc.doctype == "Stock Entry" and doc.purpose in ["Material Issue", "Material Transfer"]:
-		is_material_issue = True
-
 	for d in doc.get("items"):
 		# Validate serial number belongs to batch (always enforced)
 		if hasattr(d, "serial_no") and hasattr(d, "batch_no") and d.serial_no and d.batch_no:
@@ -141,16 +159,9 @@ def validate_serialized_batch_with_expired_override(doc, method):
 						)
 					)
 
-		# Skip all expiry validation if setting is enabled
-		if skip_expiry_check:
-			continue
-
-		# Skip batch expiry validation for material issues
-		if is_material_issue:
-			continue
-
-		# Skip batch expiry validation if allowed for this document type
-		if is_expired_batch_allowed_for_doc(doc, d):
+		# Skip batch expiry validation if skipped globally, for material
+		# issues, or allowed for this document type
+		if is_expiry_check_skipped(doc, d):
 			continue
 
 		# Keep the original batch expiry validation for outbound transactions
@@ -0,0 +1,348 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Recall sweep: from a manufacturer's list of lots to on-hand stock and the
+documents the lots left on.
+
+Each entry of a recall notice is a bare lot number or a raw GS1 string. GS1
+strings resolve their GTIN to an item and form the batch id with
+`format_batch_id`, exactly like a scan. Bare lots are matched with the item
+given for the sweep, or, without one, against every batch whose id the naming
+format could have produced for that lot.
+
+Balances and vouchers are then read with one grouped query per source over
+the batch indexes of the ledger, never per lot:
+
+- Serial and Batch Entry rows of submitted, non-cancelled bundles
+- Stock Ledger Entry rows that carry the batch directly (stock posted before
+  Serial and Batch Bundles)
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import flt, getdate
+
+from surgishop_erp_scanner.surgishop_erp_scanner.api.gs1_parser import (
+	format_batch_id,
+	get_scanner_settings,
+	parse_gs1_string,
+)
+from surgishop_erp_scanner.surgishop_erp_scanner.barcode_import import (
+	get_barcode_key,
+	get_gtin_variants,
+	normalize_gtin,
+)
+
+# Values per IN list
+CHUNK_SIZE = 1000
+
+# Lots per batch id suffix scan
+SUFFIX_CHUNK_SIZE = 100
+
+# Outbound vouchers returned, most recent first
+MAX_VOUCHERS = 20000
+
+# Voucher type -> party field shown with outbound vouchers
+VOUCHER_PARTY_FIELDS = {
+	"Delivery Note": "customer",
+	"Sales Invoice": "customer",
+	"POS Invoice": "customer",
+	"Purchase Receipt": "supplier",
+	"Purchase Invoice": "supplier",
+	"Stock Entry": "stock_entry_type",
+}
+
+
+def parse_recall_entries(entries):
+	"""
+	Normalise the entries of a recall notice.
+
+	Args:
+		entries (str | list): Newline separated text or a list of lots and GS1 strings
+
+	Returns:
+		list[str]: Distinct non-empty entries in their original order
+	"""
+	if isinstance(entries, str):
+		entries = entries.splitlines()
+	return list(dict.fromkeys(str(entry).strip() for entry in entries if str(entry or "").strip()))
+
+
+def recall_sweep(entries, item_code=None, from_date=None):
+	"""
+	Find every batch, on-hand balance and outbound voucher of recalled lots.
+
+	Args:
+		entries (str | list): Lot numbers and/or raw GS1 strings
+		item_code (str): Item the bare lots belong to, if the notice is for one product
+		from_date (str): Only list outbound vouchers posted on or after this date
+
+	Returns:
+		dict: batches (entry, batch_no, item_code, expiry_date), unresolved
+		      (entry, reason), balances (batch_no, item_code, warehouse, qty) and
+		      vouchers (batch_no, item_code, voucher_type, voucher_no,
+		      posting_date, warehouse, qty, party)
+	"""
+	batches, unresolved = resolve_recall_batches(parse_recall_entries(entries), item_code)
+	batch_nos = list({row.batch_no for row in batches})
+	items = {row.batch_no: row.item_code for row in batches}
+
+	balances = get_batch_balances(batch_nos)
+	vouchers = get_outbound_vouchers(batch_nos, from_date)
+	for row in balances + vouchers:
+		row.item_code = items.get(row.batch_no)
+
+	return {
+		"batches": batches,
+		"unresolved": unresolved,
+		"balances": balances,
+		"vouchers": vouchers,
+	}
+
+
+def resolve_recall_batches(entries, item_code=None):
+	"""
+	Map recall entries to existing batches.
+
+	Args:
+		entries (list[str]): Lot numbers and/or raw GS1 strings
+		item_code (str): Item the bare lots belong to
+
+	Returns:
+		tuple[list, list]: Matched batches and unresolved entries
+	"""
+	naming_format = get_scanner_settings().get("batch_naming_format") or "{item}-{lot}"
+
+	gs1_entries = {}
+	lots = {}
+	for entry in entries:
+		gs1_data = parse_gs1_string(entry)
+		if gs1_data and gs1_data.get("gtin") and gs1_data.get("lot"):
+			gs1_entries[entry] = gs1_data
+		else:
+			lots[entry] = gs1_data["lot"] if gs1_data and gs1_data.get("lot") else entry
+
+	# 1) Expected batch id and item per entry; GTINs resolved in one query
+	gtin_items = get_gtin_items({data["gtin"] for data in gs1_entries.values()})
+	unresolved = {}
+	expected = {}
+	for entry, gs1_data in gs1_entries.items():
+		entry_item = gtin_items.get(get_barcode_key(gs1_data["gtin"]))
+		if not entry_item:
+			unresolved[entry] = _("No item found for GTIN {0}").format(gs1_data["gtin"])
+			continue
+		batch_id = format_batch_id(entry_item, gs1_data["lot"], naming_format)
+		expected.setdefault(batch_id, []).append((entry, entry_item))
+
+	suffix_lots = {}
+	for entry, lot in lots.items():
+		if item_code or naming_format == "{lot}":
+			batch_id = format_batch_id(item_code, lot, naming_format)
+			expected.setdefault(batch_id, []).append((entry, item_code))
+		else:
+			suffix_lots.setdefault(lot, []).append(entry)
+
+	# 2) Batches by id, a chunk of ids per query
+	batches = []
+	batch_ids = list(expected)
+	for start in range(0, len(batch_ids), CHUNK_SIZE):
+		for row in frappe.get_all(
+			"Batch",
+			filters={"batch_id": ["in", batch_ids[start:start + CHUNK_SIZE]]},
+			fields=["name", "batch_id", "item", "expiry_date"],
+		):
+			for entry, entry_item in expected[row.batch_id]:
+				if not entry_item or entry_item == row.item:
+					batches.append(make_batch_row(entry, row))
+
+	# 3) Bare lots without an item: batches the naming format could have
+	#    produced for the lot, confirmed against each batch's own item
+	lot_list = list(suffix_lots)
+	for start in range(0, len(lot_list), SUFFIX_CHUNK_SIZE):
+		for lot, row in find_batches_by_lot(lot_list[start:start + SUFFIX_CHUNK_SIZE], naming_format):
+			for entry in suffix_lots[lot]:
+				batches.append(make_batch_row(entry, row))
+
+	matched = {row.entry for row in batches}
+	for entry in entries:
+		if entry not in matched:
+			unresolved.setdefault(entry, _("No matching batch"))
+
+	return batches, [frappe._dict(entry=entry, reason=reason) for entry, reason in unresolved.items()]
+
+
+def make_batch_row(entry, batch):
+	return frappe._dict(
+		entry=entry,
+		batch_no=batch.name,
+		item_code=batch.item,
+		expiry_date=batch.expiry_date,
+	)
+
+
+def get_gtin_items(gtins):
+	"""
+	Items of scanned GTINs, matching barcodes stored in any GTIN length.
+
+	Returns:
+		dict: 14 digit GTIN key -> item code
+	"""
+	variants = []
+	for gtin in gtins:
+		gtin14 = normalize_gtin(gtin)
+		variants.extend(get_gtin_variants(gtin14) if gtin14 else [gtin])
+
+	gtin_items = {}
+	for start in range(0, len(variants), CHUNK_SIZE):
+		for row in frappe.get_all(
+			"Item Barcode",
+			filters={"barcode": ["in", variants[start:start + CHUNK_SIZE]], "parenttype": "Item"},
+			fields=["barcode", "parent"],
+			order_by="creation",
+		):
+			gtin_items.setdefault(get_barcode_key(row.barcode), row.parent)
+	return gtin_items
+
+
+def find_batches_by_lot(lots, naming_format):
+	"""
+	Batches whose id ends with `-<lot>` and equals `format_batch_id(batch.item, lot)`.
+
+	Batch ids carry the lot as a suffix, which no index covers, so this is one
+	scan of the Batch table per chunk of lots; the ledger is never scanned.
+
+	Yields:
+		tuple: (lot, batch row)
+	"""
+	conditions = " or ".join(["batch_id like %s"] * len(lots))
+	patterns = ["%-" + escape_like(lot) for lot in lots]
+	by_suffix = {f"-{lot}": lot for lot in lots}
+
+	for row in frappe.db.sql(
+		f"""
+		select name, batch_id, item, expiry_date
+		from `tabBatch`
+		where {conditions}
+		""",
+		patterns,
+		as_dict=True,
+	):
+		for suffix, lot in by_suffix.items():
+			if row.batch_id.endswith(suffix) and row.batch_id == format_batch_id(row.item, lot, naming_format):
+				yield lot, row
+
+
+def escape_like(value):
+	return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def get_batch_balances(batch_nos):
+	"""
+	On-hand quantity per batch and warehouse, zero balances left out.
+
+	Returns:
+		list[frappe._dict]: batch_no, warehouse, qty
+	"""
+	totals = {}
+	for start in range(0, len(batch_nos), CHUNK_SIZE):
+		chunk = batch_nos[start:start + CHUNK_SIZE]
+		for row in frappe.db.sql(
+			"""
+			select sbe.batch_no, sbb.warehouse, sum(sbe.qty) as qty
+			from `tabSerial and Batch Entry` sbe
+			inner join `tabSerial and Batch Bundle` sbb on sbb.name = sbe.parent
+			where sbe.batch_no in %(batch_nos)s
+				and sbb.docstatus = 1
+				and sbb.is_cancelled = 0
+			group by sbe.batch_no, sbb.warehouse
+			union all
+			select batch_no, warehouse, sum(actual_qty) as qty
+			from `tabStock Ledger Entry`
+			where batch_no in %(batch_nos)s
+				and is_cancelled = 0
+				and ifnull(serial_and_batch_bundle, '') = ''
+			group by batch_no, warehouse
+			""",
+			{"batch_nos": chunk},
+		):
+			key = (row[0], row[1])
+			totals[key] = totals.get(key, 0) + flt(row[2])
+
+	return [
+		frappe._dict(batch_no=batch_no, warehouse=warehouse, qty=qty)
+		for (batch_no, warehouse), qty in sorted(totals.items())
+		if flt(qty, 6)
+	]
+
+
+def get_outbound_vouchers(batch_nos, from_date=None):
+	"""
+	Submitted vouchers that took recalled batches out of a warehouse, most
+	recent first, with the customer, supplier or stock entry type.
+
+	Returns:
+		list[frappe._dict]: batch_no, voucher_type, voucher_no, posting_date,
+		                    warehouse, qty (positive), party
+	"""
+	date_condition = "and sbb.posting_date >= %(from_date)s" if from_date else ""
+	sle_date_condition = "and posting_date >= %(from_date)s" if from_date else ""
+
+	vouchers = []
+	for start in range(0, len(batch_nos), CHUNK_SIZE):
+		vouchers.extend(frappe.db.sql(
+			f"""
+			select
+				sbe.batch_no, sbb.voucher_type, sbb.voucher_no, sbb.posting_date,
+				sbb.warehouse, -sum(sbe.qty) as qty
+			from `tabSerial and Batch Entry` sbe
+			inner join `tabSerial and Batch Bundle` sbb on sbb.name = sbe.parent
+			where sbe.batch_no in %(batch_nos)s
+				and sbb.docstatus = 1
+				and sbb.is_cancelled = 0
+				and sbb.type_of_transaction = 'Outward'
+				{date_condition}
+			group by sbe.batch_no, sbb.voucher_type, sbb.voucher_no, sbb.posting_date, sbb.warehouse
+			union all
+			select
+				batch_no, voucher_type, voucher_no, posting_date,
+				warehouse, -sum(actual_qty) as qty
+			from `tabStock Ledger Entry`
+			where batch_no in %(batch_nos)s
+				and is_cancelled = 0
+				and actual_qty < 0
+				and ifnull(serial_and_batch_bundle, '') = ''
+				{sle_date_condition}
+			group by batch_no, voucher_type, voucher_no, posting_date, warehouse
+			""",
+			{"batch_nos": batch_nos[start:start + CHUNK_SIZE], "from_date": getdate(from_date) if from_date else None},
+			as_dict=True,
+		))
+
+	vouchers.sort(key=lambda row: (row.posting_date, row.voucher_no), reverse=True)
+	vouchers = vouchers[:MAX_VOUCHERS]
+	add_voucher_parties(vouchers)
+	return vouchers
+
+
+def add_voucher_parties(vouchers):
+	"""Set `party` on vouchers, one query per voucher type."""
+	names = {}
+	for row in vouchers:
+		if row.voucher_type in VOUCHER_PARTY_FIELDS:
+			names.setdefault(row.voucher_type, set()).add(row.voucher_no)
+
+	parties = {}
+	for voucher_type, voucher_nos in names.items():
+		voucher_nos = list(voucher_nos)
+		for start in range(0, len(voucher_nos), CHUNK_SIZE):
+			for name, party in frappe.get_all(
+				voucher_type,
+				filters={"name": ["in", voucher_nos[start:start + CHUNK_SIZE]]},
+				fields=["name", VOUCHER_PARTY_FIELDS[voucher_type]],
+				as_list=True,
+			):
+				parties[(voucher_type, name)] = party
+
+	for row in vouchers:
+		row.party = parties.get((row.voucher_type, row.voucher_no))
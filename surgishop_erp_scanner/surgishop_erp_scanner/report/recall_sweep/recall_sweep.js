@@ -0,0 +1,32 @@
+// Copyright (c) 2025, SurgiShop and Contributors
+// License: MIT. See license.txt
+
+frappe.query_reports['Recall Sweep'] = {
+	filters: [
+		{
+			fieldname: 'entries',
+			label: __('Lots or GS1 Barcodes'),
+			fieldtype: 'Small Text',
+			description: __('One lot number or raw GS1 barcode per line'),
+			reqd: 1
+		},
+		{
+			fieldname: 'item_code',
+			label: __('Item'),
+			fieldtype: 'Link',
+			options: 'Item'
+		},
+		{
+			fieldname: 'from_date',
+			label: __('Outbound Since'),
+			fieldtype: 'Date'
+		},
+		{
+			fieldname: 'show',
+			label: __('Show'),
+			fieldtype: 'Select',
+			options: 'Stock Balances\nOutbound Documents\nBatches\nUnresolved Entries',
+			default: 'Stock Balances'
+		}
+	]
+}
@@ -0,0 +1,69 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+import frappe
+from frappe import _
+
+from surgishop_erp_scanner.surgishop_erp_scanner.recall_sweep import recall_sweep
+
+# Show option -> result key and columns with untranslated labels
+VIEWS = {
+	"Stock Balances": ("balances", [
+		{"fieldname": "batch_no", "label": "Batch", "fieldtype": "Link", "options": "Batch", "width": 200},
+		{"fieldname": "item_code", "label": "Item", "fieldtype": "Link", "options": "Item", "width": 180},
+		{"fieldname": "warehouse", "label": "Warehouse", "fieldtype": "Link", "options": "Warehouse", "width": 200},
+		{"fieldname": "qty", "label": "Qty On Hand", "fieldtype": "Float", "width": 120},
+	]),
+	"Outbound Documents": ("vouchers", [
+		{"fieldname": "posting_date", "label": "Posting Date", "fieldtype": "Date", "width": 110},
+		{"fieldname": "voucher_type", "label": "Voucher Type", "fieldtype": "Link", "options": "DocType", "width": 140},
+		{
+			"fieldname": "voucher_no",
+			"label": "Voucher No",
+			"fieldtype": "Dynamic Link",
+			"options": "voucher_type",
+			"width": 180,
+		},
+		{"fieldname": "party", "label": "Party", "fieldtype": "Data", "width": 180},
+		{"fieldname": "batch_no", "label": "Batch", "fieldtype": "Link", "options": "Batch", "width": 200},
+		{"fieldname": "item_code", "label": "Item", "fieldtype": "Link", "options": "Item", "width": 180},
+		{"fieldname": "warehouse", "label": "From Warehouse", "fieldtype": "Link", "options": "Warehouse", "width": 200},
+		{"fieldname": "qty", "label": "Qty", "fieldtype": "Float", "width": 100},
+	]),
+	"Batches": ("batches", [
+		{"fieldname": "entry", "label": "Entry", "fieldtype": "Data", "width": 260},
+		{"fieldname": "batch_no", "label": "Batch", "fieldtype": "Link", "options": "Batch", "width": 200},
+		{"fieldname": "item_code", "label": "Item", "fieldtype": "Link", "options": "Item", "width": 180},
+		{"fieldname": "expiry_date", "label": "Expiry Date", "fieldtype": "Date", "width": 110},
+	]),
+	"Unresolved Entries": ("unresolved", [
+		{"fieldname": "entry", "label": "Entry", "fieldtype": "Data", "width": 260},
+		{"fieldname": "reason", "label": "Reason", "fieldtype": "Data", "width": 300},
+	]),
+}
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	show = filters.show if filters.show in VIEWS else "Stock Balances"
+	key, columns = VIEWS[show]
+	columns = [{**column, "label": _(column["label"])} for column in columns]
+
+	if not (filters.entries or "").strip():
+		return columns, []
+
+	result = recall_sweep(filters.entries, item_code=filters.item_code, from_date=filters.from_date)
+	return columns, result[key], get_message(result)
+
+
+def get_message(result):
+	on_hand = sum(row.qty for row in result["balances"] if row.qty > 0)
+	return _(
+		"{0} batches matched, {1} entries unresolved. {2} on hand in {3} warehouses, {4} outbound documents."
+	).format(
+		len({row.batch_no for row in result["batches"]}),
+		len(result["unresolved"]),
+		frappe.format(on_hand, {"fieldtype": "Float"}),
+		len({row.warehouse for row in result["balances"] if row.qty > 0}),
+		len({(row.voucher_type, row.voucher_no) for row in result["vouchers"]}),
+	)
@@ -0,0 +1,22 @@
+// Copyright (c) 2025, SurgiShop and Contributors
+// License: MIT. See license.txt
+
+frappe.query_reports['Scan Client Latency'] = {
+	filters: [
+		{
+			fieldname: 'scan_doctype',
+			label: __('Document Type'),
+			fieldtype: 'Select',
+			options: [
+				'',
+				'Stock Entry',
+				'Purchase Order',
+				'Purchase Receipt',
+				'Purchase Invoice',
+				'Sales Invoice',
+				'Delivery Note',
+				'Stock Reconciliation'
+			].join('\n')
+		}
+	]
+}
@@ -0,0 +1,79 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import flt
+
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_metrics import (
+	CLIENT_METRICS_KEY,
+	CLIENT_PHASES,
+	ROW_COUNT_BUCKETS,
+	get_histograms,
+	histogram_quantile,
+)
+
+PHASE_LABELS = {
+	"total": "End to End",
+	"api": "Server Response",
+	"apply": "Row Applied",
+	"render": "Grid Rendered",
+}
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	data = get_data(filters)
+	return get_columns(), data, None, get_chart(data)
+
+
+def get_columns():
+	columns = [
+		{"fieldname": "scan_doctype", "label": _("Document Type"), "fieldtype": "Link", "options": "DocType", "width": 160},
+		{"fieldname": "rows", "label": _("Rows"), "fieldtype": "Data", "width": 80},
+		{"fieldname": "scans", "label": _("Scans"), "fieldtype": "Int", "width": 90},
+	]
+	for phase in ("total", "api", "apply", "render"):
+		for quantile in ("p50", "p99"):
+			columns.append({
+				"fieldname": f"{phase}_{quantile}",
+				"label": _("{0} {1} (ms)").format(_(PHASE_LABELS[phase]), quantile),
+				"fieldtype": "Float",
+				"precision": 0,
+				"width": 150,
+			})
+	return columns
+
+
+def get_data(filters):
+	"""p50 and p99 of each phase per document type and row count, from the client histograms."""
+	histograms = get_histograms(CLIENT_METRICS_KEY)
+	groups = {}
+	for (doctype, rows, phase), histogram in histograms.items():
+		if phase not in CLIENT_PHASES or (filters.scan_doctype and doctype != filters.scan_doctype):
+			continue
+		row = groups.setdefault((doctype, rows), frappe._dict(scan_doctype=doctype, rows=rows, scans=0))
+		if phase == "total":
+			row.scans = histogram["count"]
+		for quantile, value in (("p50", 0.5), ("p99", 0.99)):
+			seconds = histogram_quantile(value, histogram)
+			row[f"{phase}_{quantile}"] = flt(seconds * 1000, 1) if seconds is not None else None
+
+	row_order = {rows: i for i, rows in enumerate(ROW_COUNT_BUCKETS)}
+	return sorted(groups.values(), key=lambda row: (row.scan_doctype, row_order.get(row.rows, len(row_order))))
+
+
+def get_chart(data):
+	if not data:
+		return None
+
+	return {
+		"data": {
+			"labels": [f"{row.scan_doctype} ({row.rows})" for row in data],
+			"datasets": [
+				{"name": _("End to End p50 (ms)"), "values": [row.get("total_p50") or 0 for row in data]},
+				{"name": _("End to End p99 (ms)"), "values": [row.get("total_p99") or 0 for row in data]},
+			],
+		},
+		"type": "bar",
+	}
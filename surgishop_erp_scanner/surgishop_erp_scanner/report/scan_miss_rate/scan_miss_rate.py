@@ -0,0 +1,103 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, flt, getdate
+
+# Group by option -> (expression, column definition with an untranslated label)
+GROUP_BY = {
+	"Day": ("date_format(scanned_at, '%%Y-%%m-%%d')", {"label": "Day", "fieldtype": "Data", "width": 120}),
+	"Document Type": (
+		"ifnull(scan_doctype, '')",
+		{"label": "Document Type", "fieldtype": "Link", "options": "DocType", "width": 180},
+	),
+	"User": ("user", {"label": "User", "fieldtype": "Link", "options": "User", "width": 200}),
+	"Scanned Value": ("raw_value", {"label": "Scanned Value", "fieldtype": "Data", "width": 260}),
+}
+
+# Rows shown when grouping by scanned value
+MAX_VALUES = 500
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	group_by = filters.group_by if filters.group_by in GROUP_BY else "Day"
+	data = get_data(filters, group_by)
+	return get_columns(group_by), data, None, get_chart(data, group_by)
+
+
+def get_columns(group_by):
+	return [
+		{**GROUP_BY[group_by][1], "fieldname": "group_value", "label": _(GROUP_BY[group_by][1]["label"])},
+		{"fieldname": "scans", "label": _("Scans"), "fieldtype": "Int", "width": 90},
+		{"fieldname": "misses", "label": _("Not Found"), "fieldtype": "Int", "width": 100},
+		{"fieldname": "errors", "label": _("Errors"), "fieldtype": "Int", "width": 90},
+		{"fieldname": "miss_rate", "label": _("Miss Rate %"), "fieldtype": "Percent", "width": 110},
+		{"fieldname": "error_rate", "label": _("Error Rate %"), "fieldtype": "Percent", "width": 110},
+	]
+
+
+def get_data(filters, group_by):
+	"""
+	Scan outcomes per group. Grouped by scanned value, only values that were not
+	resolved at least once are listed, most frequent first.
+	"""
+	conditions = ["scanned_at >= %(from_date)s", "scanned_at < %(to_date)s"]
+	if filters.user:
+		conditions.append("user = %(user)s")
+	if filters.scan_doctype:
+		conditions.append("scan_doctype = %(scan_doctype)s")
+
+	having = ""
+	order_by = "group_value"
+	limit = ""
+	if group_by == "Scanned Value":
+		having = "having sum(outcome != 'hit') > 0"
+		order_by = "sum(outcome != 'hit') desc, scans desc"
+		limit = f"limit {MAX_VALUES}"
+
+	rows = frappe.db.sql(
+		f"""
+		select
+			{GROUP_BY[group_by][0]} as group_value,
+			count(*) as scans,
+			sum(outcome = 'miss') as misses,
+			sum(outcome = 'error') as errors
+		from `tabSurgiShop Scan Event`
+		where {' and '.join(conditions)}
+		group by group_value
+		{having}
+		order by {order_by}
+		{limit}
+		""",
+		{
+			"from_date": getdate(filters.from_date),
+			# Include the whole last day
+			"to_date": add_days(getdate(filters.to_date), 1),
+			"user": filters.user,
+			"scan_doctype": filters.scan_doctype,
+		},
+		as_dict=True,
+	)
+
+	for row in rows:
+		row.miss_rate = flt(row.misses) * 100 / row.scans if row.scans else 0
+		row.error_rate = flt(row.errors) * 100 / row.scans if row.scans else 0
+	return rows
+
+
+def get_chart(data, group_by):
+	if not data or group_by == "Scanned Value":
+		return None
+
+	return {
+		"data": {
+			"labels": [row.group_value for row in data],
+			"datasets": [
+				{"name": _("Miss Rate %"), "values": [flt(row.miss_rate, 2) for row in data]},
+				{"name": _("Error Rate %"), "values": [flt(row.error_rate, 2) for row in data]},
+			],
+		},
+		"type": "line" if group_by == "Day" else "bar",
+	}
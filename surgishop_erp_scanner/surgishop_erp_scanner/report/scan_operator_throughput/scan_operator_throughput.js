@@ -0,0 +1,40 @@
+// Copyright (c) 2025, SurgiShop and Contributors
+// License: MIT. See license.txt
+
+frappe.query_reports['Scan Operator Throughput'] = {
+	filters: [
+		{
+			fieldname: 'from_date',
+			label: __('From Date'),
+			fieldtype: 'Date',
+			default: frappe.datetime.add_days(frappe.datetime.get_today(), -7),
+			reqd: 1
+		},
+		{
+			fieldname: 'to_date',
+			label: __('To Date'),
+			fieldtype: 'Date',
+			default: frappe.datetime.get_today(),
+			reqd: 1
+		},
+		{
+			fieldname: 'period',
+			label: __('Period'),
+			fieldtype: 'Select',
+			options: 'Hour\nDay\nWeek',
+			default: 'Day'
+		},
+		{
+			fieldname: 'user',
+			label: __('User'),
+			fieldtype: 'Link',
+			options: 'User'
+		},
+		{
+			fieldname: 'scan_doctype',
+			label: __('Document Type'),
+			fieldtype: 'Link',
+			options: 'DocType'
+		}
+	]
+}
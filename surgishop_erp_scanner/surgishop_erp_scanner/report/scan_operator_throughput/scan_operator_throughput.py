@@ -0,0 +1,104 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, flt, getdate
+
+PERIOD_FORMATS = {
+	"Hour": "%Y-%m-%d %H:00",
+	"Day": "%Y-%m-%d",
+	"Week": "%x-W%v",
+}
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	return get_columns(), get_data(filters), None, get_chart(filters)
+
+
+def get_columns():
+	return [
+		{"fieldname": "period", "label": _("Period"), "fieldtype": "Data", "width": 140},
+		{"fieldname": "user", "label": _("User"), "fieldtype": "Link", "options": "User", "width": 200},
+		{"fieldname": "scans", "label": _("Scans"), "fieldtype": "Int", "width": 90},
+		{"fieldname": "hits", "label": _("Resolved"), "fieldtype": "Int", "width": 90},
+		{"fieldname": "misses", "label": _("Not Found"), "fieldtype": "Int", "width": 90},
+		{"fieldname": "errors", "label": _("Errors"), "fieldtype": "Int", "width": 90},
+		{"fieldname": "active_minutes", "label": _("Active Minutes"), "fieldtype": "Int", "width": 120},
+		{"fieldname": "scans_per_hour", "label": _("Scans / Active Hour"), "fieldtype": "Float", "precision": 1, "width": 150},
+		{"fieldname": "avg_latency_ms", "label": _("Avg Latency (ms)"), "fieldtype": "Float", "precision": 1, "width": 140},
+	]
+
+
+def get_conditions(filters):
+	conditions = ["scanned_at >= %(from_date)s", "scanned_at < %(to_date)s"]
+	if filters.user:
+		conditions.append("user = %(user)s")
+	if filters.scan_doctype:
+		conditions.append("scan_doctype = %(scan_doctype)s")
+	return " and ".join(conditions)
+
+
+def get_query_values(filters):
+	return {
+		"from_date": getdate(filters.from_date),
+		# Include the whole last day
+		"to_date": add_days(getdate(filters.to_date), 1),
+		"user": filters.user,
+		"scan_doctype": filters.scan_doctype,
+		"period_format": PERIOD_FORMATS.get(filters.period or "Day", PERIOD_FORMATS["Day"]),
+		"minute_format": "%Y-%m-%d %H:%i",
+	}
+
+
+def get_data(filters):
+	"""Scans per user and period, with throughput over the minutes the user was scanning."""
+	rows = frappe.db.sql(
+		f"""
+		select
+			date_format(scanned_at, %(period_format)s) as period,
+			user,
+			count(*) as scans,
+			sum(outcome = 'hit') as hits,
+			sum(outcome = 'miss') as misses,
+			sum(outcome = 'error') as errors,
+			count(distinct date_format(scanned_at, %(minute_format)s)) as active_minutes,
+			avg(latency_ms) as avg_latency_ms
+		from `tabSurgiShop Scan Event`
+		where {get_conditions(filters)}
+		group by period, user
+		order by period, scans desc
+		""",
+		get_query_values(filters),
+		as_dict=True,
+	)
+
+	for row in rows:
+		row.scans_per_hour = flt(row.scans) * 60 / row.active_minutes if row.active_minutes else 0
+	return rows
+
+
+def get_chart(filters):
+	"""Total scans per period."""
+	totals = frappe.db.sql(
+		f"""
+		select date_format(scanned_at, %(period_format)s) as period, count(*) as scans
+		from `tabSurgiShop Scan Event`
+		where {get_conditions(filters)}
+		group by period
+		order by period
+		""",
+		get_query_values(filters),
+		as_dict=True,
+	)
+	if not totals:
+		return None
+
+	return {
+		"data": {
+			"labels": [row.period for row in totals],
+			"datasets": [{"name": _("Scans"), "values": [row.scans for row in totals]}],
+		},
+		"type": "bar",
+	}
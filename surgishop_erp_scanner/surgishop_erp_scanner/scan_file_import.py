@@ -0,0 +1,271 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Streaming import of raw scan files into draft receiving documents.
+
+Scan logs and supplier ASN exports are plain text (one scan per line) or CSV
+files. The file is read line by line and only the distinct scanned values are
+kept, with their quantities, so memory grows with the number of distinct lines
+rather than the file size. Distinct values are then resolved in chunks with
+`get_batches_for_gs1` (the `parse_gs1_and_get_batch` rules in bulk), summed per
+(item, batch) and written to a single draft Purchase Receipt or Stock Entry.
+"""
+
+import csv
+from collections import Counter, defaultdict
+
+import frappe
+from frappe import _
+
+from surgishop_erp_scanner.surgishop_erp_scanner.api.gs1_parser import (
+	get_batches_for_gs1,
+	parse_gs1_string,
+)
+
+IMPORT_DOCTYPES = ("Purchase Receipt", "Stock Entry")
+
+# Distinct scanned values resolved per chunk
+RESOLVE_CHUNK_SIZE = 500
+
+# Unresolved values listed in the import summary
+MAX_REPORTED_ERRORS = 50
+
+
+def read_scan_counts(file_path, column=0, qty_column=None):
+	"""
+	Stream a scan file into quantities per distinct scanned value.
+
+	Args:
+		file_path (str): Path to a .txt (one scan per line) or .csv file
+		column (int): CSV column holding the scanned value
+		qty_column (int): Optional CSV column holding a quantity (default 1 per line)
+
+	Returns:
+		tuple[Counter, int, int, list]: Quantity per distinct value, number of
+		                                lines read, number of lines skipped for an
+		                                invalid quantity, and the first
+		                                MAX_REPORTED_ERRORS of them
+	"""
+	counts = Counter()
+	lines = 0
+	qty_error_count = 0
+	qty_errors = []
+
+	with open(file_path, newline="", encoding="utf-8-sig") as f:
+		if file_path.lower().endswith(".csv"):
+			rows = csv.reader(f)
+		else:
+			rows = ([line] for line in f)
+
+		for line_no, row in enumerate(rows, 1):
+			if len(row) <= column:
+				continue
+			value = row[column].strip()
+			if not value:
+				continue
+
+			lines += 1
+			qty, error = parse_scan_qty(row[qty_column] if qty_column is not None and len(row) > qty_column else "")
+			if error:
+				qty_error_count += 1
+				if len(qty_errors) < MAX_REPORTED_ERRORS:
+					qty_errors.append({"line": line_no, "value": value, "qty": row[qty_column], "error": error})
+				continue
+			counts[value] += qty
+
+	return counts, lines, qty_error_count, qty_errors
+
+
+def parse_scan_qty(text):
+	"""
+	Parse the quantity cell of a scan line.
+
+	Args:
+		text (str): Cell content; empty means one unit
+
+	Returns:
+		tuple[float, str]: The quantity, or None and an error for anything that
+		                   is not a positive number
+	"""
+	text = (text or "").strip()
+	if not text:
+		return 1, None
+
+	try:
+		qty = float(text)
+	except ValueError:
+		return None, _("Quantity {0} is not a number").format(text)
+
+	if qty <= 0:
+		return None, _("Quantity {0} must be greater than 0").format(text)
+	return qty, None
+
+
+def resolve_scan_values(values):
+	"""
+	Resolve distinct scanned values to items and batches.
+
+	GS1 strings with a GTIN and lot go through `get_batches_for_gs1`; anything
+	else is looked up as a plain barcode of a non-batch item.
+
+	Args:
+		values (list[str]): Distinct scanned values
+
+	Returns:
+		tuple[dict, dict]: {value: (item_code, batch_no)} for resolved values,
+		                   {value: error} for the rest
+	"""
+	resolved = {}
+	errors = {}
+
+	gs1_values = []
+	gs1_entries = []
+	barcodes = {}
+	for value in values:
+		gs1_data = parse_gs1_string(value)
+		if gs1_data and gs1_data.get("gtin") and gs1_data.get("lot"):
+			gs1_values.append(value)
+			gs1_entries.append(gs1_data)
+		else:
+			barcodes[value] = (gs1_data or {}).get("gtin") or value
+
+	if gs1_entries:
+		for value, result in zip(gs1_values, get_batches_for_gs1(gs1_entries)):
+			if result.get("found_item"):
+				resolved[value] = (result["found_item"], result["batch"])
+			else:
+				errors[value] = result.get("error")
+
+	if barcodes:
+		barcode_items = {}
+		for row in frappe.get_all(
+			"Item Barcode",
+			filters={"barcode": ["in", list(set(barcodes.values()))]},
+			fields=["barcode", "parent"],
+		):
+			barcode_items.setdefault(row.barcode, row.parent)
+
+		batch_items = set()
+		if barcode_items:
+			batch_items = set(frappe.get_all(
+				"Item",
+				filters={"name": ["in", list(set(barcode_items.values()))], "has_batch_no": 1},
+				pluck="name",
+			))
+
+		for value, barcode in barcodes.items():
+			item_code = barcode_items.get(barcode)
+			if not item_code:
+				errors[value] = _("Cannot find Item with this Barcode")
+			elif item_code in batch_items:
+				errors[value] = _("Item {0} requires a lot number").format(item_code)
+			else:
+				resolved[value] = (item_code, None)
+
+	return resolved, errors
+
+
+def import_scan_file(file_path, target_doctype, company, warehouse, supplier=None, column=0, qty_column=None):
+	"""
+	Import a scan file into a new draft receiving document.
+
+	Args:
+		file_path (str): Path to the scan file
+		target_doctype (str): Purchase Receipt or Stock Entry (Material Receipt)
+		company (str): Company of the new document
+		warehouse (str): Receiving warehouse
+		supplier (str): Supplier, required for Purchase Receipt
+		column (int): CSV column holding the scanned value
+		qty_column (int): Optional CSV column holding a quantity
+
+	Returns:
+		dict: Summary with the created document, line counts and unresolved values
+	"""
+	if target_doctype not in IMPORT_DOCTYPES:
+		frappe.throw(_("Scan files can only be imported into {0}").format(", ".join(IMPORT_DOCTYPES)))
+	if target_doctype == "Purchase Receipt" and not supplier:
+		frappe.throw(_("Supplier is required to import into a Purchase Receipt"))
+
+	counts, lines, qty_error_count, qty_errors = read_scan_counts(file_path, column=column, qty_column=qty_column)
+	if not counts:
+		frappe.throw(_("No scans found in the file"))
+
+	quantities = defaultdict(float)
+	errors = {}
+	values = list(counts)
+
+	for start in range(0, len(values), RESOLVE_CHUNK_SIZE):
+		resolved, chunk_errors = resolve_scan_values(values[start:start + RESOLVE_CHUNK_SIZE])
+		for value, key in resolved.items():
+			quantities[key] += counts[value]
+		errors.update(chunk_errors)
+		# Keep batches created for this chunk even if a later chunk fails
+		frappe.db.commit()
+
+	if not quantities:
+		frappe.throw(_("None of the {0} distinct scans could be resolved").format(len(counts)))
+
+	doc = make_receiving_document(target_doctype, company, warehouse, supplier, quantities)
+
+	return {
+		"doctype": doc.doctype,
+		"name": doc.name,
+		"lines": lines,
+		"distinct": len(counts),
+		"rows": len(quantities),
+		"unresolved_count": len(errors),
+		"unresolved": [
+			{"value": value, "qty": counts[value], "error": error}
+			for value, error in list(errors.items())[:MAX_REPORTED_ERRORS]
+		],
+		"invalid_qty_count": qty_error_count,
+		"invalid_qty": qty_errors,
+	}
+
+
+def make_receiving_document(target_doctype, company, warehouse, supplier, quantities):
+	"""Insert one draft document with a row per (item, batch)."""
+	doc = frappe.new_doc(target_doctype)
+	doc.company = company
+
+	if target_doctype == "Purchase Receipt":
+		doc.supplier = supplier
+		doc.set_warehouse = warehouse
+		warehouse_field = "warehouse"
+	else:
+		doc.stock_entry_type = "Material Receipt"
+		doc.purpose = "Material Receipt"
+		doc.to_warehouse = warehouse
+		warehouse_field = "t_warehouse"
+
+	for (item_code, batch_no), qty in sorted(quantities.items(), key=lambda row: (row[0][0], row[0][1] or "")):
+		doc.append("items", {
+			"item_code": item_code,
+			"qty": qty,
+			"batch_no": batch_no,
+			"use_serial_batch_fields": 1 if batch_no else 0,
+			warehouse_field: warehouse,
+		})
+
+	doc.run_method("set_missing_values")
+	doc.insert()
+	return doc
+
+
+def format_import_summary(summary):
+	"""Plain text summary for the bench command."""
+	lines = [
+		f"Created draft {summary['doctype']} {summary['name']}",
+		f"Lines read:      {summary['lines']}",
+		f"Distinct scans:  {summary['distinct']}",
+		f"Rows:            {summary['rows']}",
+		f"Unresolved:      {summary['unresolved_count']}",
+	]
+	for row in summary["unresolved"]:
+		lines.append(f"  {row['value']!r} (qty {row['qty']}): {row['error']}")
+	if summary["invalid_qty_count"]:
+		lines.append(f"Invalid qty:     {summary['invalid_qty_count']}")
+	for row in summary["invalid_qty"]:
+		lines.append(f"  line {row['line']} {row['value']!r}: {row['error']}")
+	return "\n".join(lines)
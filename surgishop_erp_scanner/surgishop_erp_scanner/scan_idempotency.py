@@ -0,0 +1,132 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Idempotency keys for scanner API calls.
+
+Handhelds on weak Wi-Fi retry calls whose first attempt already succeeded.
+Scanner endpoints accept a client-generated key (the `idempotency_key` argument
+or an `Idempotency-Key` header); the result of the first call is kept in Redis
+for a short time and a retry with the same key gets it back without running
+lookups or side effects again. A retry arriving while the first call is still
+running waits for its result.
+"""
+
+import functools
+import json
+import time
+
+import frappe
+from frappe import _
+
+IDEMPOTENCY_KEY = "surgishop_scanner:idempotency:{0}:{1}:{2}"
+
+# Seconds a stored result is replayed (site config override:
+# surgishop_scan_idempotency_ttl)
+DEFAULT_RESULT_TTL = 300
+
+# Longest a first call may run before duplicates stop waiting for it
+LOCK_TIMEOUT_MS = 30000
+
+# How long and how often a duplicate polls for the first call's result
+WAIT_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+
+
+def get_idempotency_key():
+	"""Read the client key from the request arguments or headers."""
+	key = frappe.form_dict.get("idempotency_key")
+	if not key and getattr(frappe.local, "request", None):
+		key = frappe.get_request_header("Idempotency-Key")
+	return str(key).strip()[:128] if key else None
+
+
+def idempotent_scan_call(endpoint):
+	"""
+	Decorator replaying stored results for repeated idempotency keys.
+
+	Calls without a key run as before. Results are stored once the request
+	transaction is committed, so a call that fails or rolls back is never
+	replayed.
+
+	Args:
+		endpoint (str): Endpoint label, part of the cache key
+	"""
+
+	def decorator(fn):
+		@functools.wraps(fn)
+		def wrapper(*args, **kwargs):
+			key = get_idempotency_key()
+			if not key or getattr(frappe.local, "surgishop_idempotent_call", False):
+				return fn(*args, **kwargs)
+
+			result_key = frappe.cache.make_key(
+				IDEMPOTENCY_KEY.format(frappe.session.user, endpoint, key)
+			)
+			lock_key = f"{result_key}:lock"
+
+			stored = frappe.cache.execute_command("GET", result_key)
+			if stored is not None:
+				return json.loads(stored)
+
+			if not frappe.cache.execute_command("SET", lock_key, 1, "NX", "PX", LOCK_TIMEOUT_MS):
+				return wait_for_result(result_key, lock_key)
+
+			frappe.local.surgishop_idempotent_call = True
+			try:
+				result = fn(*args, **kwargs)
+			except Exception:
+				release_lock(lock_key)
+				raise
+			finally:
+				frappe.local.surgishop_idempotent_call = False
+
+			store_result(result_key, lock_key, result)
+			return result
+
+		return wrapper
+
+	return decorator
+
+
+def store_result(result_key, lock_key, result):
+	"""Store the result when the request commits; drop the lock either way."""
+	ttl = frappe.conf.get("surgishop_scan_idempotency_ttl", DEFAULT_RESULT_TTL)
+	payload = json.dumps(result, default=str)
+
+	def save():
+		pipe = frappe.cache.pipeline()
+		pipe.set(result_key, payload, ex=ttl)
+		pipe.delete(lock_key)
+		pipe.execute()
+
+	request = getattr(frappe.local, "request", None)
+	if request is None or request.method == "GET":
+		# Read-only requests are never committed
+		save()
+		return
+
+	frappe.db.after_commit.add(save)
+	frappe.db.after_rollback.add(lambda: release_lock(lock_key))
+
+
+def release_lock(lock_key):
+	frappe.cache.execute_command("DEL", lock_key)
+
+
+def wait_for_result(result_key, lock_key):
+	"""Wait for the call holding the lock to store its result."""
+	deadline = time.monotonic() + WAIT_TIMEOUT
+	while time.monotonic() < deadline:
+		time.sleep(WAIT_INTERVAL)
+		stored = frappe.cache.execute_command("GET", result_key)
+		if stored is not None:
+			return json.loads(stored)
+		if not frappe.cache.execute_command("EXISTS", lock_key):
+			# The first call failed; let the client retry with a new attempt
+			break
+
+	frappe.throw(
+		_("The previous attempt of this scan did not complete. Please scan again."),
+		title=_("Scan Retry"),
+	)
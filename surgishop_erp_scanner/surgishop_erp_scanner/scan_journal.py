@@ -0,0 +1,185 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Scan event journal.
+
+When **Enable Scan Journal** is set in SurgiShop Settings, every `scan_barcode`
+and `parse_gs1_and_get_batch` call records a compact event (user, document
+type, scanned value, what it resolved to, latency and outcome). Events are
+pushed to a Redis list, never written inline; `flush_scan_journal` moves them
+to `SurgiShop Scan Event` with multi-row inserts. It runs from the scheduler
+and is enqueued whenever the buffer fills up by another batch.
+
+The desk scanner sends the form's doctype as `scan_doctype`. Retries replayed
+from the idempotency store and throttled calls are not journaled.
+"""
+
+import functools
+import inspect
+import json
+from time import perf_counter
+
+import frappe
+from frappe.utils import now_datetime
+
+JOURNAL_KEY = "surgishop_scanner:scan_journal"
+
+FLUSH_JOB = "surgishop_erp_scanner.surgishop_erp_scanner.scan_journal.flush_scan_journal"
+FLUSH_JOB_ID = "surgishop_scan_journal_flush"
+
+# Events written per INSERT; the flush job is also enqueued every time the
+# buffer grows by this many events
+FLUSH_BATCH_SIZE = 1000
+
+# Most batches written per job run, so one run cannot hold a worker for long
+MAX_BATCHES_PER_RUN = 50
+
+# Oldest events are dropped beyond this many, should the flush job stop running
+MAX_BUFFERED_EVENTS = 200000
+
+EVENT_FIELDS = (
+	"scanned_at", "user", "scan_doctype", "endpoint", "raw_value",
+	"resolution", "item_code", "outcome", "latency_ms",
+)
+
+
+def journal_enabled():
+	try:
+		return bool(frappe.get_cached_doc("SurgiShop Settings").get("enable_scan_journal"))
+	except Exception:
+		return False
+
+
+def journal_scan_call(endpoint, describe):
+	"""
+	Decorator recording a scan event for each call of a scanner endpoint.
+
+	Args:
+		endpoint (str): Endpoint label stored with the event
+		describe (callable): `(arguments, result) -> (raw_value, resolution,
+			outcome, item_code)`, with the call arguments by name
+	"""
+
+	def decorator(fn):
+		signature = inspect.signature(fn)
+
+		@functools.wraps(fn)
+		def wrapper(*args, **kwargs):
+			if not journal_enabled():
+				return fn(*args, **kwargs)
+
+			arguments = signature.bind_partial(*args, **kwargs).arguments
+			started = perf_counter()
+			try:
+				result = fn(*args, **kwargs)
+			except Exception:
+				raw_value = describe(arguments, None)[0]
+				record_scan_event(endpoint, raw_value, None, "error", None, perf_counter() - started)
+				raise
+
+			raw_value, resolution, outcome, item_code = describe(arguments, result or {})
+			record_scan_event(endpoint, raw_value, resolution, outcome, item_code, perf_counter() - started)
+			return result
+
+		return wrapper
+
+	return decorator
+
+
+def describe_barcode_scan(arguments, result):
+	"""Journal fields of a `scan_barcode` call."""
+	raw_value = arguments.get("search_value")
+	if result is None:
+		return raw_value, None, "error", None
+
+	for resolution in ("serial_no", "batch_no", "warehouse"):
+		if result.get(resolution):
+			return raw_value, resolution, "hit", result.get("item_code")
+	if result.get("barcode"):
+		return raw_value, "item_barcode", "hit", result.get("item_code")
+	return raw_value, "none", "miss", None
+
+
+def describe_gs1_scan(arguments, result):
+	"""Journal fields of a `parse_gs1_and_get_batch` call, the value in GS1 element form."""
+	raw_value = "".join(
+		f"({ai}){arguments[name]}"
+		for ai, name in (("01", "gtin"), ("17", "expiry"), ("10", "lot"))
+		if arguments.get(name)
+	)
+	if result is None:
+		return raw_value, None, "error", None
+
+	if result.get("found_item"):
+		return raw_value, "gs1", "hit", result["found_item"]
+	if result.get("gtin_not_found"):
+		return raw_value, "none", "miss", None
+	return raw_value, "gs1", "error", None
+
+
+def record_scan_event(endpoint, raw_value, resolution, outcome, item_code, seconds):
+	"""Buffer one scan event in Redis."""
+	event = [
+		str(now_datetime()),
+		frappe.session.user,
+		frappe.form_dict.get("scan_doctype"),
+		endpoint,
+		str(raw_value or "")[:140],
+		resolution,
+		item_code,
+		outcome,
+		round(seconds * 1000, 2),
+	]
+	try:
+		key = frappe.cache.make_key(JOURNAL_KEY)
+		pipe = frappe.cache.pipeline()
+		pipe.rpush(key, json.dumps(event, separators=(",", ":")))
+		pipe.ltrim(key, -MAX_BUFFERED_EVENTS, -1)
+		buffered = pipe.execute()[0]
+	except Exception:
+		# The journal must never break a scan
+		return
+
+	if buffered % FLUSH_BATCH_SIZE == 0:
+		frappe.enqueue(FLUSH_JOB, queue="short", job_id=FLUSH_JOB_ID, deduplicate=True)
+
+
+def flush_scan_journal():
+	"""
+	Move buffered events to SurgiShop Scan Event in batches.
+
+	Returns:
+		int: Number of events written
+	"""
+	key = frappe.cache.make_key(JOURNAL_KEY)
+	fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus", *EVENT_FIELDS]
+	written = 0
+
+	for _batch in range(MAX_BATCHES_PER_RUN):
+		# Read and remove the batch atomically
+		pipe = frappe.cache.pipeline()
+		pipe.lrange(key, 0, FLUSH_BATCH_SIZE - 1)
+		pipe.ltrim(key, FLUSH_BATCH_SIZE, -1)
+		entries = pipe.execute()[0]
+		if not entries:
+			break
+
+		values = []
+		for entry in entries:
+			event = json.loads(entry)
+			scanned_at, user = event[0], event[1]
+			values.append((frappe.generate_hash(length=10), scanned_at, scanned_at, user, user, 0, *event))
+
+		try:
+			frappe.db.bulk_insert("SurgiShop Scan Event", fields, values)
+			frappe.db.commit()
+		except Exception:
+			frappe.db.rollback()
+			# Put the batch back in front for the next run
+			frappe.cache.execute_command("LPUSH", key, *reversed(entries))
+			raise
+
+		written += len(values)
+
+	return written
@@ -0,0 +1,304 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Per-stage latency instrumentation for the scanner endpoints.
+
+Each scanner call runs inside a `scan_timer`. Code on the hot path wraps its
+expensive parts in `scan_stage("...")`; when the call finishes, the stage
+durations and the total are added to cumulative histograms kept in Redis, which
+`get_scan_metrics` exposes in Prometheus text format.
+
+The desk scanner also times its own phases per scan (server response, row
+applied, grid rendered) and sends histograms in the same buckets, labelled by
+document type and row count, which are added to a second hash.
+
+Hot path logging goes through `log_scan`, which checks the log level before
+formatting anything and only emits a sample of the lines.
+"""
+
+import logging
+import random
+from contextlib import contextmanager
+from time import perf_counter
+
+import frappe
+
+LOG_PREFIX = "🏥 SurgiShop ERP Scanner: "
+
+# Share of hot path info lines that are actually written (site config override:
+# surgishop_scan_log_sample_rate)
+DEFAULT_LOG_SAMPLE_RATE = 0.1
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_KEY = "surgishop_scanner:latency"
+
+CLIENT_METRICS_KEY = "surgishop_scanner:client_latency"
+
+# Desk scan phases: input to server response, response to row applied, row
+# applied to grid rendered, and input to rendered
+CLIENT_PHASES = ("api", "apply", "render", "total")
+
+# Row count labels of the items table when the scan started
+ROW_COUNT_BUCKETS = ("0-10", "11-50", "51-200", "201-500", "500+")
+
+
+def log_scan(message, *args):
+	"""
+	Write a sampled, level-gated info line for the scan hot path.
+
+	Args:
+		message (str): %-style format string, formatted only if the line is written
+		*args: Format arguments
+	"""
+	logger = frappe.logger()
+	if not logger.isEnabledFor(logging.INFO):
+		return
+
+	sample_rate = frappe.conf.get("surgishop_scan_log_sample_rate", DEFAULT_LOG_SAMPLE_RATE)
+	if random.random() >= sample_rate:
+		return
+
+	logger.info(LOG_PREFIX + message, *args)
+
+
+def log_scan_warning(message, *args):
+	"""Write a level-gated warning line; warnings are never sampled."""
+	frappe.logger().warning(LOG_PREFIX + message, *args)
+
+
+def log_scan_error(message, *args):
+	"""Write a level-gated error line; errors are never sampled."""
+	frappe.logger().error(LOG_PREFIX + message, *args)
+
+
+class ScanTimer:
+	"""Accumulates stage durations for a single scanner call."""
+
+	def __init__(self, endpoint):
+		self.endpoint = endpoint
+		self.started = perf_counter()
+		self.stages = {}
+
+	@contextmanager
+	def stage(self, name):
+		started = perf_counter()
+		try:
+			yield
+		finally:
+			self.stages[name] = self.stages.get(name, 0.0) + perf_counter() - started
+
+	@property
+	def elapsed(self):
+		return perf_counter() - self.started
+
+	def finish(self):
+		timings = dict(self.stages)
+		timings["total"] = self.elapsed
+		record_timings(self.endpoint, timings)
+
+
+@contextmanager
+def scan_timer(endpoint):
+	"""
+	Time a scanner endpoint call.
+
+	Nested calls (e.g. `get_item_by_barcode` calling `scan_barcode`) reuse the
+	outer timer, so each request is recorded once.
+
+	Args:
+		endpoint (str): Endpoint label used in the metrics
+	"""
+	current = getattr(frappe.local, "surgishop_scan_timer", None)
+	if current:
+		yield current
+		return
+
+	timer = ScanTimer(endpoint)
+	frappe.local.surgishop_scan_timer = timer
+	try:
+		yield timer
+	finally:
+		frappe.local.surgishop_scan_timer = None
+		timer.finish()
+
+
+@contextmanager
+def scan_stage(name):
+	"""
+	Time a stage of the current scanner call.
+
+	A no-op when no scan timer is active, so helpers can be called from
+	anywhere.
+	"""
+	timer = getattr(frappe.local, "surgishop_scan_timer", None)
+	if not timer:
+		yield
+		return
+
+	with timer.stage(name):
+		yield
+
+
+def get_bucket(seconds):
+	"""Return the label of the smallest histogram bucket holding `seconds`."""
+	for bound in LATENCY_BUCKETS:
+		if seconds <= bound:
+			return str(bound)
+	return "+Inf"
+
+
+def record_timings(endpoint, timings):
+	"""
+	Add stage timings to the Redis histograms in a single round trip.
+
+	Args:
+		endpoint (str): Endpoint label
+		timings (dict): Seconds keyed by stage name
+	"""
+	try:
+		key = frappe.cache.make_key(METRICS_KEY)
+		pipe = frappe.cache.pipeline(transaction=False)
+		for stage, seconds in timings.items():
+			prefix = f"{endpoint}|{stage}"
+			pipe.hincrby(key, f"{prefix}|bucket|{get_bucket(seconds)}", 1)
+			pipe.hincrby(key, f"{prefix}|count", 1)
+			pipe.hincrbyfloat(key, f"{prefix}|sum", seconds)
+		pipe.execute()
+	except Exception:
+		# Metrics must never break a scan
+		pass
+
+
+def get_bucket_labels():
+	return [*map(str, LATENCY_BUCKETS), "+Inf"]
+
+
+def record_client_histograms(histograms):
+	"""
+	Add histograms aggregated by the desk scanner in a single round trip.
+
+	Args:
+		histograms (list[dict]): doctype, rows, phase, buckets ({le: count}),
+		                         count and sum (seconds), already validated
+	"""
+	key = frappe.cache.make_key(CLIENT_METRICS_KEY)
+	pipe = frappe.cache.pipeline(transaction=False)
+	for histogram in histograms:
+		prefix = f"{histogram['doctype']}|{histogram['rows']}|{histogram['phase']}"
+		for bound, count in histogram["buckets"].items():
+			pipe.hincrby(key, f"{prefix}|bucket|{bound}", count)
+		pipe.hincrby(key, f"{prefix}|count", histogram["count"])
+		pipe.hincrbyfloat(key, f"{prefix}|sum", histogram["sum"])
+	pipe.execute()
+
+
+def get_histograms(key=METRICS_KEY):
+	"""
+	Load the histograms from Redis.
+
+	Args:
+		key (str): METRICS_KEY (labels: endpoint, stage) or CLIENT_METRICS_KEY
+		           (labels: doctype, rows, phase)
+
+	Returns:
+		dict: {labels: {"buckets": {le: count}, "count": int, "sum": float}}
+	"""
+	# Raw HGETALL: RedisWrapper.hgetall would prefix the key again and unpickle values
+	raw = frappe.cache.execute_command("HGETALL", frappe.cache.make_key(key)) or {}
+	histograms = {}
+
+	for field, value in raw.items():
+		parts = frappe.safe_decode(field).split("|")
+		if len(parts) > 2 and parts[-2] == "bucket":
+			labels, kind, bucket = parts[:-2], "bucket", parts[-1]
+		else:
+			labels, kind, bucket = parts[:-1], parts[-1], None
+
+		histogram = histograms.setdefault(
+			tuple(labels), {"buckets": {}, "count": 0, "sum": 0.0}
+		)
+		if kind == "bucket":
+			histogram["buckets"][bucket] = int(value)
+		elif kind == "count":
+			histogram["count"] = int(value)
+		elif kind == "sum":
+			histogram["sum"] = float(value)
+
+	return histograms
+
+
+def histogram_quantile(quantile, histogram):
+	"""
+	Estimate a quantile from histogram buckets, interpolating linearly within
+	the bucket like Prometheus' `histogram_quantile`.
+
+	Args:
+		quantile (float): 0-1
+		histogram (dict): As returned by `get_histograms`
+
+	Returns:
+		float | None: Seconds, or None for an empty histogram
+	"""
+	total = sum(histogram["buckets"].values())
+	if not total:
+		return None
+
+	rank = quantile * total
+	cumulative = 0
+	lower = 0.0
+	for bound in LATENCY_BUCKETS:
+		count = histogram["buckets"].get(str(bound), 0)
+		if count and cumulative + count >= rank:
+			return lower + (bound - lower) * (rank - cumulative) / count
+		cumulative += count
+		lower = bound
+
+	# Beyond the largest bound: report the bound, as Prometheus does
+	return LATENCY_BUCKETS[-1]
+
+
+def render_prometheus(histograms=None):
+	"""
+	Render the histograms in Prometheus text exposition format.
+
+	Returns:
+		str: Metrics text
+	"""
+	if histograms is None:
+		histograms = get_histograms()
+
+	lines = render_histograms(
+		"surgishop_scan_stage_seconds",
+		"Scanner endpoint latency by stage.",
+		("endpoint", "stage"),
+		histograms,
+	)
+	lines += render_histograms(
+		"surgishop_scan_client_seconds",
+		"Desk scan latency measured in the browser by phase.",
+		("doctype", "rows", "phase"),
+		get_histograms(CLIENT_METRICS_KEY),
+	)
+	return "\n".join(lines) + "\n"
+
+
+def render_histograms(name, description, label_names, histograms):
+	"""Exposition lines of one histogram metric."""
+	lines = [
+		f"# HELP {name} {description}",
+		f"# TYPE {name} histogram",
+	]
+
+	for label_values, histogram in sorted(histograms.items()):
+		labels = ",".join(f'{label}="{value}"' for label, value in zip(label_names, label_values))
+		cumulative = 0
+		for bound in get_bucket_labels():
+			cumulative += histogram["buckets"].get(bound, 0)
+			lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+		lines.append(f'{name}_sum{{{labels}}} {histogram["sum"]}')
+		lines.append(f'{name}_count{{{labels}}} {histogram["count"]}')
+
+	return lines
@@ -0,0 +1,146 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Opt-in sampled profiler for scanner endpoints and stock validate hooks.
+
+Controlled from the Diagnostics section of SurgiShop Settings. A profiled call
+runs under cProfile with every SQL statement it issues captured; the result is
+saved as a SurgiShop Scan Profile with the raw profile attached for download.
+"""
+
+import base64
+import cProfile
+import functools
+import io
+import marshal
+import pstats
+import random
+from time import perf_counter
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+# Number of functions listed in the stored stats summary
+STATS_LIMIT = 60
+
+
+def profile_scanner_call(endpoint):
+	"""
+	Decorator that profiles a sample of calls when enabled in SurgiShop Settings.
+
+	Args:
+		endpoint (str): Label stored on the profile record
+	"""
+
+	def decorator(fn):
+		@functools.wraps(fn)
+		def wrapper(*args, **kwargs):
+			if not should_profile():
+				return fn(*args, **kwargs)
+			return run_profiled(endpoint, fn, args, kwargs)
+
+		return wrapper
+
+	return decorator
+
+
+def should_profile():
+	"""Check the profiling settings for the current call."""
+	if getattr(frappe.local, "surgishop_profiling", False):
+		# Already inside a profiled call
+		return False
+
+	try:
+		settings = frappe.get_cached_doc("SurgiShop Settings")
+	except Exception:
+		return False
+
+	if not settings.get("enable_scanner_profiling"):
+		return False
+
+	if settings.get("profiling_until") and now_datetime() > get_datetime(settings.profiling_until):
+		return False
+
+	if settings.get("profiling_user") and settings.profiling_user != frappe.session.user:
+		return False
+
+	return random.random() * 100 < (settings.get("profiling_sample_rate") or 0)
+
+
+def run_profiled(endpoint, fn, args, kwargs):
+	"""Run `fn` under cProfile, capturing SQL, and queue the profile for saving."""
+	queries = []
+	original_sql = frappe.db.sql
+
+	def capturing_sql(*sql_args, **sql_kwargs):
+		started = perf_counter()
+		try:
+			return original_sql(*sql_args, **sql_kwargs)
+		finally:
+			queries.append((perf_counter() - started, frappe.db.last_query or sql_args[0]))
+
+	profiler = cProfile.Profile()
+	frappe.local.surgishop_profiling = True
+	frappe.db.sql = capturing_sql
+	started = perf_counter()
+	try:
+		return profiler.runcall(fn, *args, **kwargs)
+	finally:
+		duration = perf_counter() - started
+		del frappe.db.sql
+		frappe.local.surgishop_profiling = False
+		queue_profile(endpoint, profiler, duration, queries)
+
+
+def queue_profile(endpoint, profiler, duration, queries):
+	"""
+	Hand the profile to a background job.
+
+	The job is enqueued immediately rather than after commit, so profiles of
+	calls that fail and roll back are kept too.
+	"""
+	try:
+		profiler.create_stats()
+		summary = io.StringIO()
+		pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(STATS_LIMIT)
+
+		frappe.enqueue(
+			"surgishop_erp_scanner.surgishop_erp_scanner.scan_profiler.save_profile",
+			queue="short",
+			endpoint=endpoint,
+			user=frappe.session.user,
+			duration_ms=duration * 1000,
+			profile_stats=summary.getvalue(),
+			raw_profile=base64.b64encode(marshal.dumps(profiler.stats)).decode(),
+			queries=[(seconds * 1000, str(query)) for seconds, query in queries],
+		)
+	except Exception:
+		frappe.log_error(title="SurgiShop Scan Profile Error", message=frappe.get_traceback())
+
+
+def save_profile(endpoint, user, duration_ms, profile_stats, raw_profile, queries):
+	"""Background job: store a captured profile with its raw cProfile file."""
+	doc = frappe.get_doc({
+		"doctype": "SurgiShop Scan Profile",
+		"endpoint": endpoint,
+		"user": user,
+		"duration_ms": duration_ms,
+		"query_count": len(queries),
+		"query_time_ms": sum(ms for ms, _query in queries),
+		"profile_stats": profile_stats,
+		"sql_queries": "\n\n".join(f"-- {ms:.2f} ms\n{query};" for ms, query in queries),
+	})
+	doc.insert(ignore_permissions=True)
+
+	file_doc = frappe.get_doc({
+		"doctype": "File",
+		"file_name": f"{doc.name}.prof",
+		"attached_to_doctype": doc.doctype,
+		"attached_to_name": doc.name,
+		"attached_to_field": "profile_file",
+		"is_private": 1,
+		"content": base64.b64decode(raw_profile),
+	})
+	file_doc.insert(ignore_permissions=True)
+	doc.db_set("profile_file", file_doc.file_url, update_modified=False)
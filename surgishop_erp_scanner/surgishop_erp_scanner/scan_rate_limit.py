@@ -0,0 +1,122 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Token-bucket rate limiting for the scanner endpoints.
+
+Each user and device (the `X-Scanner-Device` header or a `device_id` argument)
+gets a bucket in Redis that refills at the configured scans per second up to
+the burst size. The check and the refill run in one Lua script, so concurrent
+workers see a consistent bucket. Calls over the limit are not executed: they
+return `{"throttled": 1, "retry_after_ms": ...}` and `CustomBarcodeScanner`
+queues the scan locally and retries it after that delay.
+
+Configured in the Scan Rate Limiting section of SurgiShop Settings.
+"""
+
+import functools
+
+import frappe
+
+RATE_LIMIT_KEY = "surgishop_scanner:rate:{0}:{1}"
+
+# KEYS[1] bucket; ARGV[1] tokens per second, ARGV[2] burst size.
+# Returns {allowed (0/1), milliseconds until a token is available}
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+	tokens = tokens - 1
+	allowed = 1
+else
+	retry_after = math.ceil((1 - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return {allowed, retry_after}
+"""
+
+_token_bucket = None
+
+
+def rate_limited_scan_call(fn):
+	"""
+	Decorator applying the scan rate limit to a whitelisted scanner endpoint.
+
+	Only limits HTTP requests; calls from background jobs and nested calls
+	inside an already limited request pass through.
+	"""
+
+	@functools.wraps(fn)
+	def wrapper(*args, **kwargs):
+		if getattr(frappe.local, "surgishop_rate_checked", False) or not getattr(frappe.local, "request", None):
+			return fn(*args, **kwargs)
+
+		frappe.local.surgishop_rate_checked = True
+		try:
+			retry_after_ms = check_rate_limit()
+			if retry_after_ms:
+				return {"throttled": 1, "retry_after_ms": retry_after_ms}
+			return fn(*args, **kwargs)
+		finally:
+			frappe.local.surgishop_rate_checked = False
+
+	return wrapper
+
+
+def get_rate_limit_settings():
+	"""Return (scans per second, burst size), or None when limiting is off."""
+	try:
+		settings = frappe.get_cached_doc("SurgiShop Settings")
+	except Exception:
+		return None
+
+	if not settings.get("enable_scan_rate_limit"):
+		return None
+
+	rate = settings.get("scan_rate_limit_per_second") or 0
+	burst = settings.get("scan_rate_limit_burst") or 0
+	if rate <= 0 or burst < 1:
+		return None
+	return rate, burst
+
+
+def get_device_id():
+	device = frappe.get_request_header("X-Scanner-Device") or frappe.form_dict.get("device_id")
+	return str(device).strip()[:64] if device else "default"
+
+
+def check_rate_limit():
+	"""
+	Take a token from the caller's bucket.
+
+	Returns:
+		int: 0 when the call may proceed, else milliseconds to wait
+	"""
+	limits = get_rate_limit_settings()
+	if not limits:
+		return 0
+
+	global _token_bucket
+	try:
+		if _token_bucket is None:
+			_token_bucket = frappe.cache.register_script(TOKEN_BUCKET_SCRIPT)
+
+		key = frappe.cache.make_key(RATE_LIMIT_KEY.format(frappe.session.user, get_device_id()))
+		allowed, retry_after_ms = _token_bucket(keys=[key], args=list(limits))
+	except Exception:
+		# Never block scans because the limiter itself failed
+		return 0
+
+	return 0 if allowed else max(int(retry_after_ms), 1)
@@ -0,0 +1,163 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Read-replica routing for scanner lookups.
+
+When the site is configured with Frappe's replica settings (`read_from_replica`,
+`replica_host` and optionally `replica_db_port`, `different_credentials_for_replica`,
+`replica_db_user`, `replica_db_password`), read-only scan lookups run on the
+replica. A lookup that finds nothing there is repeated on the primary, so
+barcodes, items and batches created moments ago are still found while the
+replica catches up.
+
+Unlike `frappe.read_only`, the replica connection is opened once per request or
+job and kept next to the primary connection; blocks only swap `frappe.local.db`.
+If the replica cannot be reached, the rest of the request stays on the primary.
+Reads never move to the replica while the request has uncommitted writes, and
+rows read there are never written to the shared Redis caches.
+"""
+
+from contextlib import contextmanager
+
+import frappe
+
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_metrics import log_scan_warning
+
+
+def replica_configured():
+	return bool(frappe.conf.get("read_from_replica") and frappe.conf.get("replica_host"))
+
+
+def on_replica():
+	"""Whether the current connection is the scanner replica connection."""
+	replica = getattr(frappe.local, "surgishop_replica_db", None)
+	return replica is not None and frappe.local.db is replica
+
+
+def get_replica_db():
+	"""Return the replica connection of this request, connecting on first use."""
+	replica = getattr(frappe.local, "surgishop_replica_db", None)
+	if replica is not None or getattr(frappe.local, "surgishop_replica_failed", False):
+		return replica
+
+	from frappe.database import get_db
+
+	conf = frappe.local.conf
+	user = conf.db_user
+	password = conf.db_password
+	if conf.different_credentials_for_replica:
+		user = conf.replica_db_user or conf.replica_db_name
+		password = conf.replica_db_password
+
+	try:
+		replica = get_db(
+			host=conf.replica_host,
+			port=conf.replica_db_port,
+			user=user,
+			password=password,
+			cur_db_name=conf.db_name,
+		)
+		replica.connect()
+	except Exception as e:
+		mark_replica_failed(e)
+		return None
+
+	frappe.local.surgishop_replica_db = replica
+	return replica
+
+
+def mark_replica_failed(error):
+	"""Keep the rest of the request on the primary."""
+	log_scan_warning("Scanner read replica unavailable, using primary: %s", error)
+	close_replica()
+	frappe.local.surgishop_replica_failed = True
+
+
+def close_replica():
+	"""after_request / after_job hook: close the replica connection, if any."""
+	replica = getattr(frappe.local, "surgishop_replica_db", None)
+	frappe.local.surgishop_replica_db = None
+	frappe.local.surgishop_replica_failed = False
+	if replica is not None:
+		try:
+			replica.close()
+		except Exception:
+			pass
+
+
+@contextmanager
+def replica_reads():
+	"""
+	Run the block on the read replica when one is configured and usable.
+
+	Yields:
+		bool: True when the block runs on the replica
+	"""
+	if (
+		not replica_configured()
+		or on_replica()
+		or getattr(frappe.db, "transaction_writes", 0)
+		or get_replica_db() is None
+	):
+		yield False
+		return
+
+	primary = frappe.local.db
+	frappe.local.db = frappe.local.surgishop_replica_db
+	try:
+		yield True
+	finally:
+		frappe.local.db = primary
+
+
+def read_from_replica(fn, *args, **kwargs):
+	"""
+	Call a read-only function on the replica, repeating it on the primary
+	when the replica result is empty.
+
+	Validation errors raised by the function are passed on; connection errors
+	on the replica fall back to the primary.
+
+	Args:
+		fn (callable): Function doing the reads through `frappe.db`
+
+	Returns:
+		The function result
+	"""
+	with replica_reads() as replica:
+		if replica:
+			try:
+				result = fn(*args, **kwargs)
+			except frappe.ValidationError:
+				raise
+			except Exception as e:
+				mark_replica_failed(e)
+				result = None
+
+			if result:
+				return result
+
+	return fn(*args, **kwargs)
+
+
+def replica_get_value(*args, **kwargs):
+	"""`frappe.db.get_value` on the replica, falling back to the primary."""
+	return read_from_replica(lambda: frappe.db.get_value(*args, **kwargs))
+
+
+def replica_exists(*args, **kwargs):
+	"""`frappe.db.exists` on the replica, falling back to the primary."""
+	return read_from_replica(lambda: frappe.db.exists(*args, **kwargs))
+
+
+def replica_cached_value(doctype, name, fieldname, as_dict=False):
+	"""
+	`frappe.get_cached_value` that never fills the document cache from the replica.
+
+	On the replica connection the value is read directly: a lagging row cached
+	there would outlive the invalidation of the change it is missing.
+	"""
+	if on_replica():
+		return frappe.db.get_value(doctype, name, fieldname, as_dict=as_dict)
+	return frappe.get_cached_value(doctype, name, fieldname, as_dict=as_dict)
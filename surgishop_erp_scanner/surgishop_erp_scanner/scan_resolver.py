@@ -0,0 +1,126 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Server-side scan resolution.
+
+Resolves a raw scanned string the way `CustomBarcodeScanner.process_scan` does
+in the browser: GS1 strings carrying a GTIN and lot go through
+`parse_gs1_and_get_batch`, everything else through `scan_barcode`. Results use
+the same keys the desk scanner applies to a row (item_code, batch_no, ...).
+"""
+
+import frappe
+from frappe import _
+
+from surgishop_erp_scanner.surgishop_erp_scanner.api.barcode import scan_barcode
+from surgishop_erp_scanner.surgishop_erp_scanner.api.gs1_parser import (
+	parse_gs1_and_get_batch,
+	parse_gs1_string,
+)
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_metrics import log_scan_error
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_side_effects import queue_error_log
+
+# Form doctypes the scanner is attached to
+SCANNER_DOCTYPES = (
+	"Stock Entry",
+	"Purchase Order",
+	"Purchase Receipt",
+	"Purchase Invoice",
+	"Sales Invoice",
+	"Delivery Note",
+	"Stock Reconciliation",
+)
+
+# Undoes the writes of a scan that failed to resolve, e.g. a half-created batch
+RESOLVE_SAVEPOINT = "surgishop_resolve_scan"
+
+
+def resolve_scan(raw_value, ctx=None):
+	"""
+	Resolve one raw scan.
+
+	Args:
+		raw_value (str): Scanned string
+		ctx (dict): Document context (company, set_warehouse) for enrichment
+
+	Returns:
+		dict: Scan-ready row data, or a dict with `error` when unresolved;
+		      only lost-transaction errors (deadlock, lock wait timeout) raise
+	"""
+	raw_value = (raw_value or "").strip()
+	if not raw_value:
+		return {"error": _("Empty scan")}
+
+	frappe.db.savepoint(RESOLVE_SAVEPOINT)
+	try:
+		gs1_data = parse_gs1_string(raw_value)
+		if gs1_data and gs1_data.get("gtin") and gs1_data.get("lot"):
+			return _resolve_gs1(raw_value, gs1_data)
+
+		result = scan_barcode(raw_value, frappe._dict(ctx or {}))
+	except frappe.ValidationError as e:
+		frappe.db.rollback(save_point=RESOLVE_SAVEPOINT)
+		return {"raw": raw_value, "error": str(e)}
+	except Exception as e:
+		if frappe.db.is_deadlocked(e) or frappe.db.is_timedout(e):
+			# The whole transaction is gone, not just this scan: let the caller retry
+			raise
+		# One bad scan must not lose the scans resolved with it
+		frappe.db.rollback(save_point=RESOLVE_SAVEPOINT)
+		log_scan_error("Could not resolve scan %s: %s", raw_value, e)
+		queue_error_log(
+			title="Scan Resolution Error",
+			message=f"Scan: {raw_value}\n\n{frappe.get_traceback()}",
+		)
+		return {"raw": raw_value, "error": _("Could not resolve scan: {0}").format(str(e))}
+
+	if not result:
+		return {"raw": raw_value, "error": _("Cannot find Item with this Barcode")}
+
+	result["raw"] = raw_value
+	return result
+
+
+def _resolve_gs1(raw_value, gs1_data):
+	result = parse_gs1_and_get_batch(gs1_data["gtin"], gs1_data.get("expiry"), gs1_data["lot"]) or {}
+	result["raw"] = raw_value
+
+	if result.get("gtin_not_found"):
+		result["error"] = _("No item found for GTIN: {0}").format(gs1_data["gtin"])
+	elif result.get("found_item"):
+		result["item_code"] = result["found_item"]
+		result["batch_no"] = result["batch"]
+
+	return result
+
+
+def resolve_scans(raw_values, ctx=None):
+	"""
+	Resolve a list of raw scans, caching repeated values.
+
+	Args:
+		raw_values (list[str]): Scanned strings
+		ctx (dict): Document context for enrichment
+
+	Returns:
+		list[dict]: One result per input, in order
+	"""
+	resolved = {}
+	results = []
+
+	for raw_value in raw_values:
+		if raw_value not in resolved:
+			resolved[raw_value] = resolve_scan(raw_value, ctx)
+		results.append(dict(resolved[raw_value]))
+
+	return results
+
+
+def get_document_scan_context(doctype, docname):
+	"""Build the enrichment context the desk scanner sends for a document."""
+	fields = ["company"]
+	if frappe.get_meta(doctype).has_field("set_warehouse"):
+		fields.append("set_warehouse")
+
+	return frappe.db.get_value(doctype, docname, fields, as_dict=True) or frappe._dict()
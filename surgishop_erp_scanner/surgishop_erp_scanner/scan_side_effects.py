@@ -0,0 +1,177 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Write-behind queue for non-critical scan side effects.
+
+Scans only do their read path inline. Expiry backfills on existing batches,
+expiry mismatch notes and error log writes are pushed to Redis and applied by a
+background job:
+
+- Expiry backfills live in a hash keyed by batch, so a burst of scans of the
+  same lot results in a single Batch update.
+- Mismatch notes and error logs go to a list and are written in one pass,
+  with mismatches collapsed per batch and scanned expiry; a mismatch already
+  noted on the batch is not noted again. A batch that fails to write is put
+  back on the list; malformed entries are logged and dropped.
+
+The scheduler also runs the processor, so nothing is stranded if a job was
+skipped because another one was still running.
+"""
+
+import json
+
+import frappe
+
+EXPIRY_BACKFILL_KEY = "surgishop_scanner:expiry_backfill"
+LOG_QUEUE_KEY = "surgishop_scanner:log_queue"
+
+PROCESS_JOB = "surgishop_erp_scanner.surgishop_erp_scanner.scan_side_effects.process_scan_side_effects"
+PROCESS_JOB_ID = "surgishop_scan_side_effects"
+
+# Log entries written per job run
+LOG_BATCH_SIZE = 500
+
+
+def queue_expiry_backfill(batch_name, expiry_date):
+	"""
+	Queue setting the expiry date of a batch that has none.
+
+	Args:
+		batch_name (str): Batch name
+		expiry_date (str): Expiry date as YYYY-MM-DD
+	"""
+	frappe.cache.execute_command("HSET", frappe.cache.make_key(EXPIRY_BACKFILL_KEY), batch_name, expiry_date)
+	_enqueue_processor()
+
+
+def queue_expiry_mismatch(batch_name, batch_expiry, scanned_expiry):
+	"""Queue a note that a scan carried a different expiry than its batch."""
+	_push_log_entry({
+		"kind": "expiry_mismatch",
+		"batch": batch_name,
+		"batch_expiry": str(batch_expiry),
+		"scanned_expiry": scanned_expiry,
+	})
+
+
+def queue_error_log(title, message):
+	"""Queue an Error Log entry instead of writing it inside the scan request."""
+	_push_log_entry({"kind": "error", "title": title, "message": message})
+
+
+def _push_log_entry(entry):
+	frappe.cache.execute_command("RPUSH", frappe.cache.make_key(LOG_QUEUE_KEY), json.dumps(entry))
+	_enqueue_processor()
+
+
+def _enqueue_processor():
+	frappe.enqueue(
+		PROCESS_JOB,
+		queue="short",
+		job_id=PROCESS_JOB_ID,
+		deduplicate=True,
+	)
+
+
+def process_scan_side_effects():
+	"""Background job: apply all queued scan side effects."""
+	process_expiry_backfills()
+	process_log_queue()
+
+
+def process_expiry_backfills():
+	"""Set the expiry of each queued batch, once per batch."""
+	key = frappe.cache.make_key(EXPIRY_BACKFILL_KEY)
+	pipe = frappe.cache.pipeline()
+	pipe.hgetall(key)
+	pipe.delete(key)
+	pending, _deleted = pipe.execute()
+
+	for batch_name, expiry_date in (pending or {}).items():
+		batch_name = frappe.safe_decode(batch_name)
+		try:
+			batch_doc = frappe.get_doc("Batch", batch_name)
+			# Another scan or a user may have set it in the meantime
+			if batch_doc.expiry_date:
+				continue
+
+			batch_doc.expiry_date = frappe.safe_decode(expiry_date)
+			batch_doc.save(ignore_permissions=True)
+			frappe.db.commit()
+		except frappe.DoesNotExistError:
+			continue
+		except Exception:
+			frappe.db.rollback()
+			frappe.log_error(
+				title="GS1 Expiry Backfill Error",
+				message=f"Batch: {batch_name}\n\n{frappe.get_traceback()}",
+			)
+
+
+def process_log_queue():
+	"""
+	Write queued error logs and batch expiry mismatch notes.
+
+	A malformed entry is logged and skipped. If writing fails, the batch is put
+	back in front of the queue and the error is re-raised.
+	"""
+	key = frappe.cache.make_key(LOG_QUEUE_KEY)
+	pipe = frappe.cache.pipeline()
+	pipe.lrange(key, 0, LOG_BATCH_SIZE - 1)
+	pipe.ltrim(key, LOG_BATCH_SIZE, -1)
+	entries, _trimmed = pipe.execute()
+	if not entries:
+		return
+
+	try:
+		write_log_entries(entries)
+		frappe.db.commit()
+	except Exception:
+		# Put the batch back so its logs and notes are not lost; the scheduler
+		# runs the processor again
+		frappe.db.rollback()
+		frappe.cache.execute_command("LPUSH", key, *reversed(entries))
+		raise
+
+	if len(entries) == LOG_BATCH_SIZE:
+		_enqueue_processor()
+
+
+def write_log_entries(entries):
+	"""Write raw log queue entries, collapsing mismatches per batch and scanned expiry."""
+	mismatches = {}
+	for raw in entries:
+		try:
+			entry = json.loads(raw)
+			if entry["kind"] == "error":
+				title, message = entry["title"], entry["message"]
+			elif entry["kind"] == "expiry_mismatch":
+				mismatches[(entry["batch"], entry["scanned_expiry"])] = entry["batch_expiry"]
+				continue
+			else:
+				raise ValueError(f"Unknown log queue entry kind: {entry['kind']}")
+		except Exception:
+			frappe.log_error(
+				title="Scan Log Queue Error",
+				message=f"Entry: {frappe.safe_decode(raw)}\n\n{frappe.get_traceback()}",
+			)
+			continue
+		frappe.log_error(title=title, message=message)
+
+	for (batch, scanned_expiry), batch_expiry in mismatches.items():
+		if not frappe.db.exists("Batch", batch):
+			continue
+		note = frappe._("Scanned expiry {0} differs from batch expiry {1}").format(scanned_expiry, batch_expiry)
+		# A label scanned again and again gets one note, not one per processor run
+		if frappe.db.exists(
+			"Comment",
+			{
+				"reference_doctype": "Batch",
+				"reference_name": batch,
+				"comment_type": "Info",
+				"content": note,
+			},
+		):
+			continue
+		frappe.get_doc("Batch", batch).add_comment("Info", note)
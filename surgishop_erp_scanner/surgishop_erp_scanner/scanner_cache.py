@@ -0,0 +1,236 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Barcode cache and scan frequency driven warmup.
+
+Item Barcode matches are cached in a Redis hash (barcode -> item and UOM) and
+dropped whenever the owning Item changes. Every matched scan also bumps a
+counter in a sorted set. Once an hour the counters are folded into a decayed
+snapshot kept in the database, so the history survives a Redis flush, and the
+most scanned values are replayed through the scan lookup and enrichment path.
+That fills the barcode cache and the Item, warehouse and pricing documents the
+scan path reads, so the first scans after a deploy or flush hit warm caches.
+
+Rates are not stored: they depend on the document context and pricing rules,
+so the warmup only loads what computing them reads.
+
+The warmup also runs after every migrate. The number of values warmed can be
+changed with the `surgishop_scanner_warmup_size` site config.
+"""
+
+import json
+
+import frappe
+
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_replica import on_replica
+
+BARCODE_CACHE_KEY = "surgishop_scanner:barcode_cache"
+SCAN_FREQUENCY_KEY = "surgishop_scanner:scan_frequency"
+
+# Global default holding the persisted frequency snapshot
+FREQUENCY_SNAPSHOT_KEY = "surgishop_scanner_scan_frequency"
+
+WARMUP_JOB = "surgishop_erp_scanner.surgishop_erp_scanner.scanner_cache.warm_scanner_cache"
+WARMUP_JOB_ID = "surgishop_scanner_cache_warmup"
+
+# Values warmed per run (site config override: surgishop_scanner_warmup_size)
+DEFAULT_WARMUP_SIZE = 500
+
+# Weight kept by older counts each time the snapshot is refreshed
+FREQUENCY_DECAY = 0.5
+
+# Values kept in the snapshot, relative to the warmup size
+SNAPSHOT_FACTOR = 4
+
+
+def get_cached_barcode(barcode):
+	"""Return the cached Item Barcode match for a value, or None."""
+	try:
+		cached = frappe.cache.execute_command("HGET", frappe.cache.make_key(BARCODE_CACHE_KEY), barcode)
+	except Exception:
+		return None
+	return frappe._dict(json.loads(cached)) if cached else None
+
+
+def set_cached_barcode(barcode, barcode_data):
+	try:
+		frappe.cache.execute_command(
+			"HSET",
+			frappe.cache.make_key(BARCODE_CACHE_KEY),
+			barcode,
+			json.dumps(barcode_data, default=str),
+		)
+	except Exception:
+		pass
+
+
+def get_barcode_item(barcode):
+	"""
+	Look up the Item Barcode row of a scanned value through the cache.
+
+	Args:
+		barcode (str): Scanned value
+
+	Returns:
+		frappe._dict: barcode, item_code and uom, or None when not a barcode
+	"""
+	barcode_data = get_cached_barcode(barcode)
+	if barcode_data:
+		return barcode_data
+
+	barcode_data = frappe.db.get_value(
+		"Item Barcode",
+		{"barcode": barcode},
+		["barcode", "parent as item_code", "uom"],
+		as_dict=True,
+	)
+	# Replica reads may lag an invalidation, so only primary reads are cached
+	if barcode_data and not on_replica():
+		set_cached_barcode(barcode, barcode_data)
+	return barcode_data
+
+
+def invalidate_item_barcodes(doc, method=None, *args):
+	"""Item doc event: drop cached barcodes of the item, before and after the change."""
+	barcodes = {row.barcode for row in doc.get("barcodes") or [] if row.barcode}
+
+	before = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+	if before:
+		barcodes.update(row.barcode for row in before.get("barcodes") or [] if row.barcode)
+
+	if method == "after_rename":
+		barcodes.update(frappe.get_all("Item Barcode", filters={"parent": doc.name}, pluck="barcode"))
+
+	if barcodes:
+		try:
+			frappe.cache.execute_command("HDEL", frappe.cache.make_key(BARCODE_CACHE_KEY), *barcodes)
+		except Exception:
+			pass
+
+
+def clear_barcode_cache():
+	frappe.cache.execute_command("DEL", frappe.cache.make_key(BARCODE_CACHE_KEY))
+
+
+def record_scan(value):
+	"""Count a matched scan of a value towards the warmup ranking."""
+	if not value:
+		return
+	try:
+		frappe.cache.execute_command("ZINCRBY", frappe.cache.make_key(SCAN_FREQUENCY_KEY), 1, value)
+	except Exception:
+		# Counting is best effort and must never fail a scan
+		pass
+
+
+def get_warmup_size():
+	return frappe.conf.get("surgishop_scanner_warmup_size", DEFAULT_WARMUP_SIZE)
+
+
+def snapshot_scan_frequency():
+	"""
+	Fold the live counters into the persisted snapshot.
+
+	Older counts are decayed so the ranking follows recent usage. The live
+	counters are moved aside first, so scans counted meanwhile are kept for
+	the next run.
+
+	Returns:
+		dict: value -> decayed scan count
+	"""
+	snapshot = {
+		value: count * FREQUENCY_DECAY
+		for value, count in get_frequency_snapshot().items()
+	}
+
+	key = frappe.cache.make_key(SCAN_FREQUENCY_KEY)
+	work_key = f"{key}:snapshot"
+	try:
+		frappe.cache.execute_command("RENAME", key, work_key)
+	except Exception:
+		# No scans since the last run
+		work_key = None
+
+	if work_key:
+		counts = frappe.cache.execute_command("ZRANGE", work_key, 0, -1, "WITHSCORES")
+		for value, count in zip(counts[::2], counts[1::2]):
+			value = frappe.safe_decode(value)
+			snapshot[value] = snapshot.get(value, 0) + float(count)
+		frappe.cache.execute_command("DEL", work_key)
+
+	keep = get_warmup_size() * SNAPSHOT_FACTOR
+	snapshot = dict(sorted(snapshot.items(), key=lambda entry: entry[1], reverse=True)[:keep])
+	frappe.db.set_global(FREQUENCY_SNAPSHOT_KEY, json.dumps(snapshot))
+	return snapshot
+
+
+def get_frequency_snapshot():
+	stored = frappe.db.get_global(FREQUENCY_SNAPSHOT_KEY)
+	return json.loads(stored) if stored else {}
+
+
+def get_top_scanned_values(limit=None, snapshot=None):
+	"""Return the most scanned values, merging the snapshot and live counters."""
+	limit = limit or get_warmup_size()
+	counts = dict(snapshot if snapshot is not None else get_frequency_snapshot())
+
+	live = frappe.cache.execute_command(
+		"ZREVRANGE", frappe.cache.make_key(SCAN_FREQUENCY_KEY), 0, limit - 1, "WITHSCORES"
+	)
+	for value, count in zip(live[::2], live[1::2]):
+		value = frappe.safe_decode(value)
+		counts[value] = counts.get(value, 0) + float(count)
+
+	return [value for value, _count in sorted(counts.items(), key=lambda entry: entry[1], reverse=True)[:limit]]
+
+
+def enqueue_cache_warmup():
+	"""after_migrate hook: warm the scanner caches in the background."""
+	# Patches may have changed barcodes without going through Item events
+	clear_barcode_cache()
+	frappe.enqueue(
+		WARMUP_JOB,
+		queue="long",
+		job_id=WARMUP_JOB_ID,
+		deduplicate=True,
+	)
+
+
+def refresh_scanner_cache():
+	"""Scheduled job: refresh the frequency snapshot, then warm the caches."""
+	warm_scanner_cache(snapshot_scan_frequency())
+
+
+def warm_scanner_cache(snapshot=None):
+	"""
+	Replay the most scanned values through the scan lookup and enrichment.
+
+	Args:
+		snapshot (dict): Frequency snapshot to rank by, read when not given
+
+	Returns:
+		int: Number of values warmed
+	"""
+	from surgishop_erp_scanner.surgishop_erp_scanner.api.barcode import (
+		_get_item_details,
+		_lookup_scan_value,
+	)
+
+	ctx = frappe._dict(company=frappe.defaults.get_global_default("company"))
+	warmed_items = set()
+	warmed = 0
+
+	for value in get_top_scanned_values(snapshot=snapshot):
+		try:
+			scan_result = _lookup_scan_value(value)
+			item_code = scan_result.get("item_code")
+			if item_code and item_code not in warmed_items:
+				warmed_items.add(item_code)
+				_get_item_details(frappe._dict(scan_result), ctx)
+			warmed += 1
+		except Exception:
+			# Values that no longer resolve, or resolve to an error, are skipped
+			continue
+
+	return warmed
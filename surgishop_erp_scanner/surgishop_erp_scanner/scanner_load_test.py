@@ -0,0 +1,338 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+"""
+Concurrent scanner load test.
+
+Simulates N scanner stations hitting the scanner endpoints of a running bench
+over HTTP, replaying a realistic mix of GS1 labels, plain item barcodes, serial
+numbers, warehouse labels and unknown labels sampled from the site itself.
+
+GS1 scans draw their lots from a small shared pool, so several stations scan the
+same new lot at the same time and exercise the batch auto-create race.
+
+Usage:
+	bench --site <site> surgishop-scanner-load-test --sessions 40 --duration 60 \\
+		--api-key <key> --api-secret <secret>
+"""
+
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import frappe
+
+SCAN_BARCODE_METHOD = "surgishop_erp_scanner.surgishop_erp_scanner.api.barcode.scan_barcode"
+GS1_PARSER_METHOD = "surgishop_erp_scanner.surgishop_erp_scanner.api.gs1_parser.parse_gs1_and_get_batch"
+
+# Share of each scan kind in the generated traffic
+DEFAULT_SCAN_MIX = {
+	"gs1": 0.40,
+	"barcode": 0.30,
+	"serial": 0.10,
+	"warehouse": 0.05,
+	"unknown": 0.15,
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+def get_sample_values(sample_size=200):
+	"""
+	Sample real scan values from the site.
+
+	Args:
+		sample_size (int): Maximum rows to sample per scan kind
+
+	Returns:
+		dict: Lists of values keyed by scan kind
+	"""
+	batch_barcodes = frappe.db.sql(
+		"""
+		SELECT ib.barcode, ib.parent AS item_code
+		FROM `tabItem Barcode` ib
+		INNER JOIN `tabItem` i ON i.name = ib.parent
+		WHERE i.has_batch_no = 1 AND i.disabled = 0
+		LIMIT %(limit)s
+		""",
+		{"limit": sample_size},
+		as_dict=True,
+	)
+
+	plain_barcodes = frappe.get_all(
+		"Item Barcode",
+		pluck="barcode",
+		limit_page_length=sample_size,
+	)
+
+	return {
+		"gs1": batch_barcodes,
+		"barcode": plain_barcodes,
+		"serial": frappe.get_all("Serial No", pluck="name", limit_page_length=sample_size),
+		"warehouse": frappe.get_all(
+			"Warehouse",
+			filters={"disabled": 0, "is_group": 0},
+			pluck="name",
+			limit_page_length=sample_size,
+		),
+	}
+
+
+class ScanMix:
+	"""Generates scanner requests following a weighted mix of scan kinds."""
+
+	def __init__(self, samples, mix=None, lot_pool_size=20):
+		self.samples = samples
+		self.run_id = frappe.generate_hash(length=6).upper()
+		self.lot_pool = [f"LT{self.run_id}{n:03d}" for n in range(lot_pool_size)]
+		self.expiry = (date.today() + timedelta(days=365)).strftime("%y%m%d")
+
+		# Drop kinds the site has no data for, then normalise the weights
+		weights = {
+			kind: weight
+			for kind, weight in (mix or DEFAULT_SCAN_MIX).items()
+			if kind == "unknown" or samples.get(kind)
+		}
+		self.kinds = list(weights)
+		self.weights = list(weights.values())
+
+	def next_request(self, rng):
+		"""
+		Build the next request.
+
+		Returns:
+			tuple[str, str, dict]: (scan kind, method, form data)
+		"""
+		kind = rng.choices(self.kinds, weights=self.weights)[0]
+
+		if kind == "gs1":
+			row = rng.choice(self.samples["gs1"])
+			return kind, GS1_PARSER_METHOD, {
+				"gtin": row.barcode,
+				"lot": rng.choice(self.lot_pool),
+				"expiry": self.expiry,
+			}
+
+		if kind == "unknown":
+			value = f"UNKNOWN-{rng.randrange(10**9):09d}"
+		else:
+			value = rng.choice(self.samples[kind])
+
+		return kind, SCAN_BARCODE_METHOD, {"search_value": value}
+
+
+def classify_response(response):
+	"""
+	Classify a scanner HTTP response.
+
+	Returns:
+		str: One of ok, miss, throttled, duplicate_race, lock_wait, error
+	"""
+	body = response.text or ""
+
+	if "Duplicate entry" in body or "DuplicateEntryError" in body:
+		return "duplicate_race"
+	if "Lock wait timeout" in body or "Deadlock found" in body or "QueryDeadlockError" in body:
+		return "lock_wait"
+	if response.status_code >= 400:
+		return "error"
+
+	try:
+		message = response.json().get("message")
+	except ValueError:
+		return "error"
+
+	if not message or message.get("gtin_not_found"):
+		return "miss"
+	# Rejected by the scan rate limiter without reaching the database
+	if message.get("throttled"):
+		return "throttled"
+	if message.get("error"):
+		return "error"
+	return "ok"
+
+
+def percentile(sorted_values, pct):
+	"""Nearest-rank percentile of an already sorted list."""
+	if not sorted_values:
+		return 0.0
+	rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+	return sorted_values[rank]
+
+
+def get_innodb_lock_status():
+	"""Read the InnoDB row lock counters from the database server."""
+	rows = frappe.db.sql("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock%%'")
+	return {name: int(value or 0) for name, value in rows}
+
+
+class LoadTestResults:
+	"""Thread-safe collector for per-request samples."""
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.latencies = defaultdict(list)
+		self.outcomes = defaultdict(lambda: defaultdict(int))
+
+	def add(self, kind, seconds, outcome):
+		with self.lock:
+			self.latencies[kind].append(seconds)
+			self.outcomes[kind][outcome] += 1
+
+	def summarize(self, elapsed):
+		"""
+		Build the report.
+
+		Args:
+			elapsed (float): Wall-clock duration of the run in seconds
+
+		Returns:
+			dict: Per scan kind and overall statistics
+		"""
+		summary = {}
+		all_latencies = []
+		all_outcomes = defaultdict(int)
+
+		for kind, latencies in self.latencies.items():
+			all_latencies.extend(latencies)
+			for outcome, count in self.outcomes[kind].items():
+				all_outcomes[outcome] += count
+			summary[kind] = self._summarize_one(latencies, self.outcomes[kind], elapsed)
+
+		summary["total"] = self._summarize_one(all_latencies, all_outcomes, elapsed)
+		return summary
+
+	@staticmethod
+	def _summarize_one(latencies, outcomes, elapsed):
+		latencies = sorted(latencies)
+		count = len(latencies)
+		failures = outcomes.get("error", 0) + outcomes.get("duplicate_race", 0) + outcomes.get("lock_wait", 0)
+
+		stats = {
+			"requests": count,
+			"throughput": count / elapsed if elapsed else 0.0,
+			"error_rate": failures / count if count else 0.0,
+			"outcomes": dict(outcomes),
+		}
+		for pct in PERCENTILES:
+			stats[f"p{pct}_ms"] = percentile(latencies, pct) * 1000
+		return stats
+
+
+def run_session(session_no, base_url, headers, scan_mix, results, deadline, think_time):
+	"""Drive a single simulated scanner station until the deadline."""
+	import requests
+
+	rng = random.Random(session_no)
+	http = requests.Session()
+	http.headers.update(headers)
+	# Each station gets its own rate limit bucket, as real scanners do
+	http.headers["X-Scanner-Device"] = f"load-test-{session_no}"
+
+	while time.monotonic() < deadline:
+		kind, method, data = scan_mix.next_request(rng)
+		started = time.perf_counter()
+		try:
+			response = http.post(f"{base_url}/api/method/{method}", data=data, timeout=60)
+			outcome = classify_response(response)
+		except requests.RequestException:
+			outcome = "error"
+		results.add(kind, time.perf_counter() - started, outcome)
+
+		if think_time:
+			time.sleep(rng.uniform(0, 2 * think_time))
+
+
+def run_load_test(
+	sessions=10,
+	duration=60,
+	base_url=None,
+	api_key=None,
+	api_secret=None,
+	think_time=0.5,
+	lot_pool_size=20,
+):
+	"""
+	Run the load test against the current site.
+
+	Must be called with a connected site (e.g. from the bench command) so that
+	scan values can be sampled and InnoDB lock counters read.
+
+	Args:
+		sessions (int): Number of concurrent scanner stations
+		duration (int): Test duration in seconds
+		base_url (str): Site URL, defaults to the site's configured URL
+		api_key (str): API key of the user the stations scan as
+		api_secret (str): API secret of that user
+		think_time (float): Mean pause between scans per station, in seconds
+		lot_pool_size (int): Number of distinct new lots shared by all stations
+
+	Returns:
+		dict: Report with per scan kind statistics and lock wait deltas
+	"""
+	base_url = (base_url or frappe.utils.get_url()).rstrip("/")
+	headers = {"Accept": "application/json"}
+	if api_key and api_secret:
+		headers["Authorization"] = f"token {api_key}:{api_secret}"
+
+	scan_mix = ScanMix(get_sample_values(), lot_pool_size=lot_pool_size)
+	results = LoadTestResults()
+
+	locks_before = get_innodb_lock_status()
+	started = time.monotonic()
+	deadline = started + duration
+
+	with ThreadPoolExecutor(max_workers=sessions) as executor:
+		futures = [
+			executor.submit(
+				run_session, session_no, base_url, headers, scan_mix, results, deadline, think_time
+			)
+			for session_no in range(sessions)
+		]
+	# Re-raise a crashed session instead of reporting less traffic
+	for future in futures:
+		future.result()
+
+	elapsed = time.monotonic() - started
+	locks_after = get_innodb_lock_status()
+
+	return {
+		"sessions": sessions,
+		"elapsed": elapsed,
+		"run_id": scan_mix.run_id,
+		"stats": results.summarize(elapsed),
+		"lock_waits": {
+			name: locks_after.get(name, 0) - locks_before.get(name, 0)
+			for name in ("Innodb_row_lock_waits", "Innodb_row_lock_time")
+		},
+	}
+
+
+def format_report(report):
+	"""Format a load test report as a plain text table."""
+	lines = [
+		f"Scanner load test {report['run_id']}: {report['sessions']} sessions, {report['elapsed']:.1f}s",
+		"",
+		f"{'kind':<12}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}  outcomes",
+	]
+
+	for kind, stats in sorted(report["stats"].items(), key=lambda kv: kv[0] == "total"):
+		outcomes = ", ".join(f"{k}={v}" for k, v in sorted(stats["outcomes"].items()))
+		lines.append(
+			f"{kind:<12}{stats['requests']:>10}{stats['throughput']:>10.1f}"
+			f"{stats['p50_ms']:>10.0f}{stats['p95_ms']:>10.0f}{stats['p99_ms']:>10.0f}"
+			f"{stats['error_rate']:>8.1%}  {outcomes}"
+		)
+
+	lines.append("")
+	lines.append(
+		"InnoDB row lock waits: {0} ({1} ms total)".format(
+			report["lock_waits"]["Innodb_row_lock_waits"],
+			report["lock_waits"]["Innodb_row_lock_time"],
+		)
+	)
+	return "\n".join(lines)
@@ -0,0 +1,73 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.model.naming import make_autoname
+from frappe.tests import IntegrationTestCase
+
+from surgishop_erp_scanner.surgishop_erp_scanner.bundle_builder import (
+	BUNDLE_DOCTYPE,
+	SIMPLE_SERIES,
+	reserve_series_names,
+)
+
+
+def make_prefix():
+	"""Series prefix no other test or site data uses."""
+	return f"_TSB{frappe.generate_hash(length=8).upper()}-"
+
+
+def get_series_current(prefix):
+	return frappe.db.sql("select `current` from `tabSeries` where `name` = %s", prefix)[0][0]
+
+
+class TestSimpleSeries(IntegrationTestCase):
+	def test_prefix_and_hashes(self):
+		match = SIMPLE_SERIES.match("SABB-.########")
+		self.assertEqual(match.group(1), "SABB-")
+		self.assertEqual(len(match.group(2)), 8)
+
+	def test_other_placeholders(self):
+		self.assertIsNone(SIMPLE_SERIES.match("SABB-.YYYY.-.#####"))
+		self.assertIsNone(SIMPLE_SERIES.match("{company}.#####"))
+		self.assertIsNone(SIMPLE_SERIES.match("SABB-#####"))
+
+
+class TestReserveSeriesNames(IntegrationTestCase):
+	def test_nothing_to_reserve(self):
+		self.assertEqual(reserve_series_names(f"{make_prefix()}.#####", 0), [])
+
+	def test_new_series_starts_at_one(self):
+		prefix = make_prefix()
+		self.assertEqual(
+			reserve_series_names(f"{prefix}.#####", 3),
+			[f"{prefix}00001", f"{prefix}00002", f"{prefix}00003"],
+		)
+		self.assertEqual(get_series_current(prefix), 3)
+
+	def test_reservations_continue_the_counter(self):
+		prefix = make_prefix()
+		frappe.db.sql("insert into `tabSeries` (`name`, `current`) values (%s, %s)", (prefix, 41))
+
+		self.assertEqual(reserve_series_names(f"{prefix}.####", 2), [f"{prefix}0042", f"{prefix}0043"])
+		self.assertEqual(reserve_series_names(f"{prefix}.####", 1), [f"{prefix}0044"])
+		self.assertEqual(get_series_current(prefix), 44)
+
+	def test_autoname_continues_after_reserved_range(self):
+		prefix = make_prefix()
+		reserve_series_names(f"{prefix}.#####", 5)
+		self.assertEqual(make_autoname(f"{prefix}.#####", BUNDLE_DOCTYPE), f"{prefix}00006")
+
+	def test_other_series_are_named_one_by_one(self):
+		series = "SABB-.YYYY.-.#####"
+		with patch(
+			"surgishop_erp_scanner.surgishop_erp_scanner.bundle_builder.make_autoname",
+			side_effect=["SABB-2025-00001", "SABB-2025-00002"],
+		) as autoname:
+			names = reserve_series_names(series, 2)
+
+		self.assertEqual(names, ["SABB-2025-00001", "SABB-2025-00002"])
+		self.assertEqual(autoname.call_count, 2)
+		autoname.assert_called_with(series, BUNDLE_DOCTYPE)
@@ -0,0 +1,79 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+from frappe.tests import UnitTestCase
+
+from surgishop_erp_scanner.surgishop_erp_scanner.api.gs1_parser import parse_gs1_expiry, parse_gs1_string
+
+GTIN = "00889842101282"
+
+# Raw strings and what `surgishop.GS1Parser.parse` (public/js/gs1-utils.js)
+# returns for them; the server parser must agree
+CLIENT_PARSER_RESULTS = (
+	("01" + GTIN + "17271231" + "10LOT123", {"gtin": GTIN, "expiry": "271231", "lot": "LOT123"}),
+	("01" + GTIN + "102024A1B2C" + "17271231", {"gtin": GTIN, "lot": "2024A1B2C", "expiry": "271231"}),
+	("01" + GTIN + "17271231", {"gtin": GTIN, "expiry": "271231"}),
+	("10LOT99", {"lot": "LOT99"}),
+	(
+		"01" + GTIN + "11190501" + "15270101" + "10X7Y8",
+		{"gtin": GTIN, "prod_date": "190501", "best_before": "270101", "lot": "X7Y8"},
+	),
+	("01" + GTIN + "310200015", {"gtin": GTIN, "net_weight_kg": "200015"}),
+	("01" + GTIN + "370012", {"gtin": GTIN, "quantity": "0012"}),
+	("01" + GTIN + "300005", {"gtin": GTIN, "count": "0005"}),
+	("01" + GTIN + "211234567890ABC", {"gtin": GTIN, "serial": "1234567890ABC"}),
+	# Lots longer than the 20 characters of the spec are kept whole
+	(
+		"01" + GTIN + "17271231" + "1012345678901234567890123",
+		{"gtin": GTIN, "expiry": "271231", "lot": "12345678901234567890123"},
+	),
+	("01" + GTIN + "17271231" + "10", {"gtin": GTIN, "expiry": "271231", "lot": ""}),
+	# Truncated fixed length field
+	("01" + GTIN[:12], None),
+	("1727123", None),
+	# Unknown AI
+	("9912345", None),
+	("10ABC" + "1727123", None),
+)
+
+
+class TestParseGS1String(UnitTestCase):
+	def test_matches_client_parser(self):
+		for raw, expected in CLIENT_PARSER_RESULTS:
+			with self.subTest(raw=raw):
+				self.assertEqual(parse_gs1_string(raw), expected)
+
+	def test_group_separator_ends_variable_field(self):
+		self.assertEqual(
+			parse_gs1_string("01" + GTIN + "10ABC\x1d" + "17271231"),
+			{"gtin": GTIN, "lot": "ABC", "expiry": "271231"},
+		)
+		self.assertEqual(parse_gs1_string("01" + GTIN + "10ABC\x1d"), {"gtin": GTIN, "lot": "ABC"})
+
+	def test_symbology_prefix_is_stripped(self):
+		self.assertEqual(
+			parse_gs1_string("]C1" + "01" + GTIN + "17271231" + "10LOT1"),
+			{"gtin": GTIN, "expiry": "271231", "lot": "LOT1"},
+		)
+		self.assertEqual(
+			parse_gs1_string("]d2" + "01" + GTIN + "10A1\x1d" + "21S9"),
+			{"gtin": GTIN, "lot": "A1", "serial": "S9"},
+		)
+
+	def test_surrounding_whitespace_is_ignored(self):
+		self.assertEqual(parse_gs1_string(" 01" + GTIN + " "), {"gtin": GTIN})
+
+	def test_rejects_non_gs1_input(self):
+		for raw in (None, "", 123):
+			with self.subTest(raw=raw):
+				self.assertIsNone(parse_gs1_string(raw))
+
+
+class TestParseGS1Expiry(UnitTestCase):
+	def test_converts_yymmdd(self):
+		self.assertEqual(parse_gs1_expiry("271231"), "2027-12-31")
+
+	def test_rejects_invalid_dates(self):
+		for expiry in (None, "", "2712", "271331", "27123A"):
+			with self.subTest(expiry=expiry):
+				self.assertIsNone(parse_gs1_expiry(expiry))
@@ -0,0 +1,51 @@
+# Copyright (c) 2025, SurgiShop and Contributors
+# License: MIT. See license.txt
+
+from frappe.tests import UnitTestCase
+
+from surgishop_erp_scanner.surgishop_erp_scanner.scan_metrics import get_bucket, histogram_quantile
+
+
+def make_histogram(buckets):
+	"""Histogram shaped like `get_histograms` results, from {bound: count}."""
+	buckets = {str(bound): count for bound, count in buckets.items()}
+	return {"buckets": buckets, "count": sum(buckets.values()), "sum": 0.0}
+
+
+class TestGetBucket(UnitTestCase):
+	def test_bounds_are_inclusive(self):
+		self.assertEqual(get_bucket(0), "0.005")
+		self.assertEqual(get_bucket(0.005), "0.005")
+		self.assertEqual(get_bucket(0.0051), "0.01")
+		self.assertEqual(get_bucket(10.0), "10.0")
+
+	def test_slower_than_largest_bound(self):
+		self.assertEqual(get_bucket(10.5), "+Inf")
+
+
+class TestHistogramQuantile(UnitTestCase):
+	def test_empty_histogram(self):
+		self.assertIsNone(histogram_quantile(0.5, make_histogram({})))
+
+	def test_interpolates_within_bucket(self):
+		# 10 observations in (0.05, 0.1]: the median is half way through it
+		self.assertAlmostEqual(histogram_quantile(0.5, make_histogram({0.1: 10})), 0.075)
+
+	def test_first_bucket_starts_at_zero(self):
+		self.assertAlmostEqual(histogram_quantile(0.5, make_histogram({0.005: 4})), 0.0025)
+
+	def test_lower_bound_skips_empty_buckets(self):
+		histogram = make_histogram({0.01: 50, 0.1: 50})
+		# Rank 50 is the last observation of (0.005, 0.01]
+		self.assertAlmostEqual(histogram_quantile(0.5, histogram), 0.01)
+		# Rank 99 is in (0.05, 0.1], not (0.01, 0.1]
+		self.assertAlmostEqual(histogram_quantile(0.99, histogram), 0.099)
+
+	def test_highest_quantile_is_upper_bound(self):
+		self.assertAlmostEqual(histogram_quantile(1, make_histogram({0.1: 3, 0.25: 1})), 0.25)
+
+	def test_beyond_largest_bound(self):
+		# As in Prometheus, observations above the last bound report that bound
+		histogram = make_histogram({0.1: 1, "+Inf": 9})
+		self.assertEqual(histogram_quantile(0.5, histogram), 10.0)
+		self.assertAlmostEqual(histogram_quantile(0.05, histogram), 0.075)
@@ -8,35 +8,48 @@ In v16, the left sidebar is controlled by a SEPARATE DocType called "Workspace S
 NOT the Workspace's links/shortcuts tables.
 
 This module creates/updates the SurgiShop Workspace Sidebar to include our settings links.
+The check is skipped on migrate while the sidebar is unchanged since the last run.
 """
 
 import frappe
 
+from surgishop_erp_scanner.surgishop_erp_scanner.migrate_fingerprint import (
+	fingerprint_changed,
+	make_fingerprint,
+	store_fingerprint,
+)
+
+FINGERPRINT_HOOK = "workspace_sidebar"
+
 
 def ensure_surgishop_workspace_condition_settings_link():
 	"""
 	Ensure "SurgiShop Condition Settings" appears in the SurgiShop workspace sidebar.
 	Creates or updates the Workspace Sidebar for SurgiShop.
 	"""
-	print("\n>>> SurgiShop: Running Workspace Sidebar injection...")
-
 	try:
 		sidebar_name = 'SurgiShop'
 		target_link = 'SurgiShop Condition Settings'
 
+		# Any edit of the sidebar changes its modified timestamp, and so the fingerprint
+		fingerprint = get_sidebar_fingerprint(sidebar_name, target_link)
+		if not fingerprint_changed(FINGERPRINT_HOOK, fingerprint):
+			return
+
 		# Check if Workspace Sidebar exists
 		if frappe.db.exists('Workspace Sidebar', sidebar_name):
-			print(f">>> SurgiShop: Workspace Sidebar '{sidebar_name}' exists, updating...")
 			sidebar = frappe.get_doc('Workspace Sidebar', sidebar_name)
 
 			# Check if link already exists
 			existing_links = [item.get('link_to') for item in sidebar.items or []]
-			print(f">>> SurgiShop: Existing sidebar items: {existing_links}")
 
 			if target_link in existing_links:
-				print(">>> SurgiShop: SKIP - Link already exists in sidebar")
+				store_fingerprint(FINGERPRINT_HOOK, fingerprint)
+				frappe.db.commit()
 				return
 
+			print(f"\n>>> SurgiShop: Workspace Sidebar '{sidebar_name}' exists, updating...")
+
 			# Add the new link
 			sidebar.append('items', {
 				'type': 'Link',
@@ -55,7 +68,7 @@ def ensure_surgishop_workspace_condition_settings_link():
 			sidebar.save()
 
 		else:
-			print(f">>> SurgiShop: Creating new Workspace Sidebar '{sidebar_name}'...")
+			print(f"\n>>> SurgiShop: Creating new Workspace Sidebar '{sidebar_name}'...")
 
 			sidebar = frappe.get_doc({
 				'doctype': 'Workspace Sidebar',
@@ -107,9 +120,12 @@ def ensure_surgishop_workspace_condition_settings_link():
 			sidebar.insert()
 			print(">>> SurgiShop: CREATED new Workspace Sidebar")
 
+		store_fingerprint(FINGERPRINT_HOOK, get_sidebar_fingerprint(sidebar_name, target_link))
 		frappe.db.commit()
+
+		# Sidebars are sent with the boot info; no need to clear every cache
 		frappe.clear_cache(doctype='Workspace Sidebar')
-		frappe.clear_cache()
+		frappe.cache.delete_key("bootinfo")
 		print(">>> SurgiShop: === SUCCESS ===\n")
 
 	except Exception as e:
@@ -118,3 +134,8 @@ def ensure_surgishop_workspace_condition_settings_link():
 			title='SurgiShop Workspace Sidebar - ERROR',
 			message=frappe.get_traceback(),
 		)
+
+
+def get_sidebar_fingerprint(sidebar_name, target_link):
+	modified = frappe.db.get_value("Workspace Sidebar", sidebar_name, "modified")
+	return make_fingerprint(sidebar_name, target_link, modified)